@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import logging
+import glob
+import time
+import sys
+import re
+import os
+
+from src.utils import setup_logger, load_csv, read_yaml, get_settings, set_settings_filepath
+from src.export import EXPORT_FORMATS, get_report_sheets, save_frames
+from src.profiling import StageProfiler, log_stage
+from src import operations
+
+
+setup_logger(__name__)
+
+
+def get_job_name(inputs: [str]) -> str:
+    name = re.sub(r"[^\w.-]+", "_", "_".join(os.path.splitext(path)[0] for path in inputs)).strip("_.")
+
+    return name or "attendance_list"
+
+
+def expand_inputs(inputs: [str]) -> [str]:
+    """
+    Expand the inputs of a job: CSV filepaths, directory paths and glob patterns (e.g. `reports/2022-09-*.csv`).
+
+    Parameters
+    ----------
+    inputs: [str]
+        CSV filepaths, directory paths or glob patterns.
+
+    Returns
+    -------
+    paths: [str]
+        CSV filepaths and directory paths, following the inputs order (glob matches sorted by name).
+    """
+    paths = []
+
+    for path in inputs:
+        if glob.has_magic(path):
+            paths.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            paths.append(path)
+
+    return paths
+
+
+def load_jobs(filepath: str) -> [dict]:
+    """
+    Load jobs from a YAML-based file, for example:
+
+        jobs:
+          - name: 2022-09
+            input: ["data/meetingAttendanceList_09-*.csv"]
+            start_time: "17:00"
+            end_time: "17:45"
+            ignore_inactive_users: false
+            calculate_overall_uptime: true
+            partition_by: date
+
+    Parameters
+    ----------
+    filepath: str
+        Jobs filepath.
+
+    Returns
+    -------
+    jobs: [dict]
+        Jobs (name, input, start_time, end_time, ignore_inactive_users, calculate_overall_uptime, partition_by and
+        output).
+    """
+    jobs = read_yaml(filepath).get('jobs') or []
+
+    for job in jobs:
+        job['input'] = [job['input']] if isinstance(job['input'], str) else list(job['input'])
+        job['name'] = str(job.get('name') or get_job_name(job['input']))
+
+    return jobs
+
+
+def run_job(job: dict) -> dict:
+    """
+    Compute and save the attendance list of a job.
+
+    Parameters
+    ----------
+    job: dict
+        Job (see `load_jobs`), with the output filepath defined.
+
+    Returns
+    -------
+    summary: dict
+        Job name, output filepath, number of files, rows and users, elapsed time, stages (if profiled) and error
+        (if failed).
+    """
+    start = time.perf_counter()
+    summary = {'name': job['name'], 'output': job['output'], 'files': 0, 'rows': 0, 'users': 0, 'error': None}
+    profiler = StageProfiler() if job.get('profile') else None
+
+    try:
+        paths = expand_inputs(job['input'])
+
+        if not paths:
+            raise FileNotFoundError(f"no files found for '{', '.join(job['input'])}'")
+
+        df_list = load_csv(paths, parallel=False, preprocess=operations.normalize_attendance_list, profiler=profiler)
+
+        if not df_list:
+            raise ValueError("no attendance list could be read")
+
+        options = {
+            'df_list': df_list,
+            'event_start_time': job.get('start_time'),
+            'event_end_time': job.get('end_time'),
+            'ignore_inactive_users': job.get('ignore_inactive_users', True),
+            'profiler': profiler
+        }
+        get_attendance_list = operations.get_attendance_list
+
+        # Large jobs can be partitioned (by event date or user) over worker processes:
+        if job.get('partition_by'):
+            options.update({'partition_by': job['partition_by'], 'max_workers': job.get('partition_workers')})
+            get_attendance_list = operations.get_attendance_list_partitioned
+
+        calculate_overall_uptime = job.get('calculate_overall_uptime', False)
+        df = get_attendance_list(calculate_overall_uptime=calculate_overall_uptime, **options)
+        frames = df
+
+        # XLSX reports have one sheet per event date, plus an overall sheet (only the missing one is calculated):
+        if job.get('format', "csv") == "xlsx":
+            df_other = get_attendance_list(calculate_overall_uptime=not calculate_overall_uptime, **options)
+            frames = get_report_sheets(
+                df=df_other if calculate_overall_uptime else df,
+                df_overall=df if calculate_overall_uptime else df_other
+            )
+
+        save_frames(frames, job['output'], export_format=job.get('format', "csv"))
+
+        summary.update({
+            'files': len(df_list),
+            'rows': sum(len(df) for df in df_list),
+            'users': len(operations.extract_users_list(df))
+        })
+    except Exception as e:
+        summary['error'] = str(e)
+
+    summary['seconds'] = time.perf_counter() - start
+    summary['stages'] = profiler.records if profiler is not None else None
+
+    return summary
+
+
+def init_worker(settings_filepath: str = None) -> None:
+    set_settings_filepath(settings_filepath)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compute attendance lists of many jobs in parallel.")
+    parser.add_argument(
+        "-i", "--input", nargs="+", action="append", default=[],
+        help="CSV filepaths, directory paths or glob patterns of a job (repeat it for more jobs)"
+    )
+    parser.add_argument("-j", "--jobs", default=None, help="YAML-based jobs filepath (see `load_jobs`)")
+    parser.add_argument("-o", "--output-dir", default="output", help="output directory path (one file per job)")
+    parser.add_argument(
+        "-f", "--format", default="csv", choices=EXPORT_FORMATS, help="output format, unless defined per job"
+    )
+    parser.add_argument("--start-time", default=None, help="event start time (`HH:mm`), unless defined per job")
+    parser.add_argument("--end-time", default=None, help="event end time (`HH:mm`), unless defined per job")
+    parser.add_argument("--keep-inactive-users", action="store_true", help="do not ignore inactive users")
+    parser.add_argument("--overall", action="store_true", help="calculate overall uptime per user")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: number of CPUs)")
+    parser.add_argument(
+        "--partition-by", default=None, choices=operations.PARTITIONS,
+        help="partition the users actions of each job over worker processes (by event date or user)"
+    )
+    parser.add_argument(
+        "--partition-workers", type=int, default=None,
+        help="number of processes per partitioned job (default: number of CPUs)"
+    )
+    parser.add_argument("--settings", default=None, help="settings filepath (default: 'src/assets/settings.yml')")
+    parser.add_argument("--profile", action="store_true", help="log the pipeline stages of each job as JSON")
+    args = parser.parse_args()
+
+    set_settings_filepath(args.settings)
+    event_settings = get_settings()['spreadsheets']['event']
+    defaults = {
+        'start_time': args.start_time or event_settings['start_time'],
+        'end_time': args.end_time or event_settings['end_time'],
+        'ignore_inactive_users': not args.keep_inactive_users,
+        'calculate_overall_uptime': args.overall,
+        'partition_by': args.partition_by,
+        'partition_workers': args.partition_workers
+    }
+    jobs = [{'name': get_job_name(inputs), 'input': inputs} for inputs in args.input]
+
+    if args.jobs:
+        jobs += load_jobs(args.jobs)
+
+    if not jobs:
+        parser.error("no jobs defined (use --input or --jobs).")
+
+    names = [job['name'] for job in jobs]
+
+    for i, job in enumerate(jobs):
+        for key, value in defaults.items():
+            job.setdefault(key, value)
+
+        # Jobs with the same name are numbered, so that their outputs are not overwritten:
+        if names.count(job['name']) > 1:
+            job['name'] = f"{job['name']}_{names[:i + 1].count(job['name'])}"
+
+        job.setdefault('format', args.format)
+        job.setdefault('output', os.path.join(args.output_dir, f"{job['name']}.{job['format']}"))
+        job['profile'] = args.profile
+
+    max_workers = min(args.workers or os.cpu_count(), len(jobs))
+    logging.info(f"Running {len(jobs)} jobs ({max_workers} processes)...")
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(args.settings,)) as pool:
+        futures = [pool.submit(run_job, job) for job in jobs]
+
+        for future in as_completed(futures):
+            summary = future.result()
+
+            if summary['error'] is None:
+                logging.info(
+                    f"Job '{summary['name']}' saved at '{summary['output']}' ({summary['files']} files, "
+                    f"{summary['rows']} rows, {summary['users']} users, {summary['seconds']:.2f}s)."
+                )
+            else:
+                failed += 1
+                logging.error(f"Job '{summary['name']}' failed: {summary['error']}")
+
+            for record in summary['stages'] or []:
+                log_stage(record, job=summary['name'])
+
+    logging.info(f"{len(jobs) - failed} of {len(jobs)} jobs completed.")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
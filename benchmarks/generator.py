@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from datetime import date as dt_date, datetime, timedelta
+import pandas as pd
+import numpy as np
+import unicodedata
+import argparse
+import logging
+import os
+
+
+FIRST_NAMES = (
+    "Ana", "André", "Beatriz", "Bruno", "Camila", "Carlos", "Cauê", "Débora", "Diego", "Eugênio", "Fernanda",
+    "Francisco", "Gabriel", "Gustavo", "Helena", "Isabela", "João", "José", "Juliana", "Lorena", "Luís", "Marcos",
+    "Maria", "Matheus", "Moisés", "Patrícia", "Paulo", "Priscila", "Rafael", "Renan", "Rodrigo", "Rômulo", "Sabrina",
+    "Sérgio", "Thiago", "Vitória"
+)
+LAST_NAMES = (
+    "Albuquerque", "Almeida", "Alves", "Andrade", "Antunes", "Araújo", "Barbosa", "Cabral", "Camargo", "Cardoso",
+    "Carvalho", "Costa", "Damico", "Falcão", "Farias", "Ferreira", "Garcia", "Gaspar", "Kemp", "Lima", "Martins",
+    "Medeiros", "Mendes", "Mendonça", "Miranda", "Moura", "Nascimento", "Oliveira", "Paiva", "Pereira", "Queiroz",
+    "Ramos", "Ribeiro", "Rodrigues", "Santos", "Silva", "Soares", "Sousa", "Tavares", "Vieira"
+)
+NAME_PARTICLES = ("da", "de", "do", "dos")
+
+HEADERS = {
+    'en': ["Full Name", "User Action", "Timestamp"],
+    'pt': ["Nome Completo", "Atividade", "Data e hora"],
+}
+ACTIONS = {
+    'en': {'joined_before': "Joined before", 'joined': "Joined", 'left': "Left"},
+    'pt': {'joined_before': "Entrou antes de", 'joined': "Entrou", 'left': "Saiu"},
+}
+
+# Timestamp formats found in Microsoft Teams exports (see `examples/`):
+TIMESTAMP_FORMATS = (
+    "%m/%d/%y, %I:%M:%S %p",
+    "%d/%m/%Y, %I:%M:%S %p",
+    "%d/%m/%Y %I:%M:%S %p",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%y %H:%M:%S",
+    "%d/%m/%Y %H:%M"
+)
+
+
+def generate_user_names(number: int, rng: np.random.Generator) -> [str]:
+    """
+    Generate unique usernames, formatted as Microsoft Teams does (`Last name, First name Middle names`).
+
+    Parameters
+    ----------
+    number: int
+        Number of usernames.
+    rng: np.random.Generator
+        Random numbers generator.
+
+    Returns
+    -------
+    user_names: [str]
+        Usernames.
+    """
+    user_names = {}
+
+    while len(user_names) < number:
+        first_name = rng.choice(FIRST_NAMES)
+        middle_names = [
+            f"{rng.choice(NAME_PARTICLES)} {last_name}" if rng.random() < 0.2 else last_name
+            for last_name in rng.choice(LAST_NAMES, size=rng.integers(0, 3), replace=False)
+        ]
+        last_name = rng.choice(LAST_NAMES)
+        user_names[f"{last_name}, {' '.join([first_name] + middle_names)}"] = None
+
+    return list(user_names)
+
+
+def get_user_name_alias(user_name: str, rng: np.random.Generator) -> str:
+    """
+    Get a near-duplicate username, as when the same user signs in through another Teams account (accents dropped,
+    middle name dropped, name not inverted or a typo).
+
+    Parameters
+    ----------
+    user_name: str
+        Username (`Last name, First name Middle names`).
+    rng: np.random.Generator
+        Random numbers generator.
+
+    Returns
+    -------
+    alias: str
+        Near-duplicate username.
+    """
+    last_name, name = user_name.split(", ")
+    names = name.split(" ")
+    variant = rng.integers(0, 4)
+
+    if variant == 0:
+        alias = "".join(c for c in unicodedata.normalize("NFKD", user_name) if not unicodedata.combining(c))
+    elif variant == 1 and len(names) > 1:
+        alias = f"{last_name}, {' '.join(names[:-1])}"
+    elif variant == 2:
+        alias = f"{name} {last_name}"
+    else:
+        # Repeating a letter:
+        i = rng.choice([i for i, c in enumerate(user_name) if c.isalpha()])
+        alias = user_name[:i] + user_name[i] + user_name[i:]
+
+    return alias
+
+
+def generate_attendance_list(
+        num_rows: int,
+        user_names: [str],
+        user_aliases: [str],
+        date: dt_date,
+        rng: np.random.Generator,
+        start_time: str = "17:00",
+        end_time: str = "17:45",
+        language: str = "en",
+        timestamp_format: str = TIMESTAMP_FORMATS[0],
+        alias_rate: float = 0.1
+) -> pd.DataFrame:
+    """
+    Generate the attendance list of a single meeting: users join (or joined before the list started to be recorded)
+    and leave the meeting several times around the event time slot; some of them through their alias accounts.
+
+    Parameters
+    ----------
+    num_rows: int
+        Number of users actions.
+    user_names: [str]
+        Usernames of the users that may participate.
+    user_aliases: [str]
+        Near-duplicate username of each user.
+    date: dt_date
+        Meeting date.
+    rng: np.random.Generator
+        Random numbers generator.
+    start_time: str
+        Event start time (`HH:mm`).
+    end_time: str
+        Event end time (`HH:mm`).
+    language: str
+        Header and actions language: "en" or "pt".
+    timestamp_format: str
+        Timestamps format.
+    alias_rate: float
+        Probability of a user participating through their alias account.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Attendance list, as loaded from a CSV file (sorted by timestamp).
+    """
+    assert language in HEADERS, f"language '{language}' not supported ({', '.join(HEADERS)})."
+
+    num_users = min(len(user_names), max(1, num_rows // 4))
+    users = rng.choice(len(user_names), size=num_users, replace=False)
+    names = np.where(
+        rng.random(num_users) < alias_rate, np.asarray(user_aliases)[users], np.asarray(user_names)[users]
+    )
+    joined_before = rng.random(num_users) < 0.4
+
+    # Number of actions per user (at least one):
+    counts = 1 + rng.multinomial(max(num_rows - num_users, 0), np.full(num_users, 1.0 / num_users))
+    user_index = np.repeat(np.arange(num_users), counts)
+    positions = np.arange(len(user_index)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # Users actions around the event time slot (users who joined before, did it when the list started to be
+    # recorded):
+    event_start = datetime.combine(date, datetime.strptime(start_time, "%H:%M").time())
+    event_end = datetime.combine(date, datetime.strptime(end_time, "%H:%M").time())
+    window_start = np.datetime64(event_start - timedelta(minutes=15), "s").astype("int64")
+    window_end = np.datetime64(event_end + timedelta(minutes=15), "s").astype("int64")
+    list_start = window_start + rng.integers(0, 45 * 60)
+    low = np.where(joined_before, list_start, window_start)[user_index]
+    offsets = rng.random(len(user_index))
+    offsets = offsets[np.lexsort((offsets, user_index))]
+    timestamps = (low + offsets * (window_end - low)).astype("int64")
+    timestamps[(positions == 0) & joined_before[user_index]] = list_start
+
+    actions = ACTIONS[language]
+    user_actions = np.where(positions % 2 == 1, actions['left'], actions['joined']).astype(object)
+    user_actions[(positions == 0) & joined_before[user_index]] = actions['joined_before']
+
+    order = np.argsort(timestamps, kind="mergesort")
+    df = pd.DataFrame({
+        HEADERS[language][0]: names[user_index][order],
+        HEADERS[language][1]: user_actions[order],
+        HEADERS[language][2]: pd.to_datetime(timestamps[order], unit="s").strftime(timestamp_format)
+    })
+
+    return df
+
+
+def save_attendance_list(df: pd.DataFrame, filepath: str, header: bool = True) -> None:
+    """
+    Save an attendance list just like Microsoft Teams exports it: UTF-16, tab-separated, CRLF line endings and
+    values containing commas quoted.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Attendance list.
+    filepath: str
+        CSV filepath.
+    header: bool
+        Write the header (exports may not have it).
+    """
+    def quote(values: pd.Series) -> pd.Series:
+        values = values.astype(str)
+
+        return values.where(~values.str.contains(",", regex=False), '"' + values + '"')
+
+    lines = quote(df.iloc[:, 0])
+
+    for column in df.columns[1:]:
+        lines = lines + "\t" + quote(df[column])
+
+    lines = lines.tolist()
+
+    if header:
+        lines.insert(0, "\t".join(df.columns))
+
+    with open(filepath, mode="wt", encoding="utf-16", newline="") as file:
+        file.write("\r\n".join(lines) + "\r\n")
+
+
+def generate_attendance_lists(
+        dirpath: str,
+        num_rows: int,
+        num_files: int = None,
+        num_users: int = None,
+        seed: int = None
+) -> [str]:
+    """
+    Generate synthetic attendance list files of fortnightly meetings, mixing English and Portuguese headers and
+    actions, timestamp formats, files without header and users with near-duplicate usernames.
+
+    Parameters
+    ----------
+    dirpath: str
+        Output directory path.
+    num_rows: int
+        Total number of users actions.
+    num_files: int
+        Number of files (default: one file per 10,000 actions).
+    num_users: int
+        Number of distinct users (default: a quarter of the actions per file, up to 1,000 users).
+    seed: int
+        Random numbers generator seed.
+
+    Returns
+    -------
+    filepaths: [str]
+        Generated CSV filepaths, following the meetings order.
+    """
+    rng = np.random.default_rng(seed)
+    num_files = num_files or max(1, num_rows // 10000)
+    num_users = num_users or max(1, min(num_rows // num_files // 4, 1000))
+    user_names = generate_user_names(num_users, rng)
+    user_aliases = [get_user_name_alias(user_name, rng) for user_name in user_names]
+    rows_per_file = np.full(num_files, num_rows // num_files)
+    rows_per_file[:num_rows % num_files] += 1
+    filepaths = []
+
+    os.makedirs(dirpath, exist_ok=True)
+
+    for i, num_file_rows in enumerate(rows_per_file):
+        date = dt_date(2022, 9, 13) + timedelta(days=14 * i)
+        language = list(HEADERS)[rng.integers(len(HEADERS))]
+        df = generate_attendance_list(
+            num_rows=max(int(num_file_rows), 1),
+            user_names=user_names,
+            user_aliases=user_aliases,
+            date=date,
+            rng=rng,
+            language=language,
+            timestamp_format=TIMESTAMP_FORMATS[rng.integers(len(TIMESTAMP_FORMATS))]
+        )
+        filepath = os.path.join(dirpath, f"meetingAttendanceList_{date.isoformat()}.csv")
+        save_attendance_list(df, filepath, header=rng.random() < 0.8)
+        filepaths.append(filepath)
+
+    logging.info(f"{num_files} attendance list files generated ({num_rows} users actions) at '{dirpath}'.")
+
+    return filepaths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic Microsoft Teams attendance list files.")
+    parser.add_argument("dirpath", help="output directory path")
+    parser.add_argument("--rows", type=int, default=10000, help="total number of users actions")
+    parser.add_argument("--files", type=int, default=None, help="number of files")
+    parser.add_argument("--users", type=int, default=None, help="number of distinct users")
+    parser.add_argument("--seed", type=int, default=None, help="random numbers generator seed")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level="INFO")
+    generate_attendance_lists(args.dirpath, args.rows, num_files=args.files, num_users=args.users, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
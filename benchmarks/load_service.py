@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+import pandas as pd
+import numpy as np
+import http.client
+import argparse
+import logging
+import uuid
+import json
+import time
+import sys
+import os
+
+from src.utils import setup_logger, list_csv_sources
+
+
+ENDPOINTS = ("attendance-list", "users", "vouchers")
+
+
+def encode_multipart(files: [(str, bytes)]) -> (bytes, str):
+    """
+    Encode files as a `multipart/form-data` request body.
+
+    Parameters
+    ----------
+    files: [(str, bytes)]
+        Name and content of each file.
+
+    Returns
+    -------
+    body: bytes
+        Request body.
+    content_type: str
+        Request content type (with the boundary).
+    """
+    boundary = uuid.uuid4().hex
+    body = b"".join(
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"files\"; filename=\"{os.path.basename(name)}\"\r\n"
+        f"Content-Type: text/csv\r\n\r\n".encode("utf-8") + content + b"\r\n"
+        for name, content in files
+    )
+    body += f"--{boundary}--\r\n".encode("utf-8")
+
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def send_requests(
+        host: str,
+        port: int,
+        path: str,
+        body: bytes,
+        content_type: str,
+        number: int,
+        timeout: float = 60
+) -> [dict]:
+    # Each client keeps its connection alive, reconnecting only after errors or rejected requests:
+    results, connection = [], None
+
+    for _ in range(number):
+        start = time.perf_counter()
+        status = None
+
+        try:
+            connection = connection or http.client.HTTPConnection(host, port, timeout=timeout)
+            connection.request("POST", path, body=body, headers={'Content-Type': content_type})
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+
+            if response.getheader("Connection") == "close":
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException):
+            if connection is not None:
+                connection.close()
+                connection = None
+
+        results.append({'status': status, 'ms': (time.perf_counter() - start) * 1000})
+
+    if connection is not None:
+        connection.close()
+
+    return results
+
+
+def run_load_test(
+        path: str,
+        host: str = "127.0.0.1",
+        port: int = 8502,
+        endpoint: str = "attendance-list",
+        clients: int = 8,
+        requests: int = 10,
+        **params
+) -> dict:
+    """
+    Load test the attendance list service (see `service_app.py`): concurrent clients upload the same attendance
+    lists, one request after another.
+
+    Parameters
+    ----------
+    path: str
+        CSV filepath or directory path of the attendance lists uploaded.
+    host: str
+        Service host address.
+    port: int
+        Service port.
+    endpoint: str
+        Service endpoint (see `ENDPOINTS`).
+    clients: int
+        Number of concurrent clients.
+    requests: int
+        Number of requests per client.
+    params: dict
+        Endpoint options (sent as query string).
+
+    Returns
+    -------
+    result: dict
+        Number of requests per status, throughput and latency percentiles (in milliseconds).
+    """
+    assert endpoint in ENDPOINTS, f"endpoint '{endpoint}' not supported ({', '.join(ENDPOINTS)})."
+
+    files = []
+
+    for name, filepath in list_csv_sources(path):
+        with open(filepath, mode="rb") as file:
+            files.append((name, file.read()))
+
+    body, content_type = encode_multipart(files)
+    target = f"/{endpoint}" + (f"?{urlencode(params)}" if params else "")
+    logging.info(f"Sending {clients} x {requests} requests to '{target}' ({len(body) / 1024:.1f}KB each)...")
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        futures = [
+            pool.submit(send_requests, host, port, target, body, content_type, requests) for _ in range(clients)
+        ]
+        results = [result for future in futures for result in future.result()]
+
+    seconds = time.perf_counter() - start
+    df = pd.DataFrame(results)
+    latencies = df.loc[df['status'] == 200, 'ms'].to_numpy()
+    result = {
+        'requests': len(df),
+        'statuses': {str(status): int(count) for status, count in df['status'].value_counts(dropna=False).items()},
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(len(latencies) / seconds, 2),
+    }
+
+    if len(latencies):
+        result.update({
+            f"p{percentile}_ms": round(float(np.percentile(latencies, percentile)), 2) for percentile in (50, 95, 99)
+        })
+
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the attendance list service (localhost).")
+    parser.add_argument("-i", "--input", default="examples", help="CSV filepath or directory path to be uploaded")
+    parser.add_argument("--host", default="127.0.0.1", help="service host address")
+    parser.add_argument("--port", type=int, default=8502, help="service port")
+    parser.add_argument("--endpoint", default="attendance-list", choices=ENDPOINTS, help="service endpoint")
+    parser.add_argument("--clients", type=int, default=8, help="number of concurrent clients")
+    parser.add_argument("--requests", type=int, default=10, help="number of requests per client")
+    args = parser.parse_args()
+
+    setup_logger(__name__)
+
+    result = run_load_test(
+        args.input, host=args.host, port=args.port, endpoint=args.endpoint, clients=args.clients,
+        requests=args.requests
+    )
+    print(json.dumps(result, indent=4))
+
+    return 0 if result['statuses'].get("200") else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from datetime import datetime
+from typing import Callable
+import pandas as pd
+import numpy as np
+import subprocess
+import tracemalloc
+import platform
+import argparse
+import tempfile
+import logging
+import random
+import json
+import time
+import sys
+import os
+
+from benchmarks.generator import generate_attendance_lists
+from src.utils import setup_logger, load_csv, get_settings_hash
+from src.handlers import find_string, find_strings
+from src import operations
+
+
+SIZES = (10 ** 2, 10 ** 4, 10 ** 6)
+STAGES = (
+    "load_csv",
+    "normalize_attendance_list",
+    "prepare_attendance_list",
+    "get_users_uptime",
+    "summarize_attendance_list",
+    "get_attendance_list",
+    "get_attendance_list_overall",
+    "get_attendance_list_streaming",
+    "get_attendance_list_streaming_chunked",
+    "get_attendance_list_partitioned",
+    "get_attendance_timeline",
+    "find_string",
+    "find_strings",
+    "giveaway_vouchers"
+)
+
+RESULTS_DIRPATH = os.path.join(os.path.abspath(os.path.join(os.path.realpath(__file__), os.pardir)), "results")
+
+
+def measure(function: Callable, memory: bool = True, repeat: int = 1) -> (object, dict):
+    """
+    Measure the execution time (best of `repeat` runs) and the peak memory allocated by a function.
+
+    Parameters
+    ----------
+    function: Callable
+        Function without arguments.
+    memory: bool
+        Measure the peak memory allocated, through an additional run traced by `tracemalloc` (slower).
+    repeat: int
+        Number of timed runs.
+
+    Returns
+    -------
+    result: object
+        Result of the last run.
+    measures: dict
+        Execution time (`seconds`) and peak memory allocated (`peak_memory_mb`, or `None` if not measured).
+    """
+    seconds, result = None, None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = min(seconds or np.inf, time.perf_counter() - start)
+
+    peak_memory_mb = None
+
+    if memory:
+        tracemalloc.start()
+
+        try:
+            function()
+            peak_memory_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+
+    measures = {'seconds': seconds, 'peak_memory_mb': peak_memory_mb}
+
+    return result, measures
+
+
+def run_benchmarks(
+        num_rows: int,
+        stages: [str] = STAGES,
+        memory: bool = True,
+        repeat: int = 1,
+        seed: int = 42
+) -> [dict]:
+    """
+    Benchmark the attendance pipeline stages over synthetic attendance list files (see `generator`).
+
+    Parameters
+    ----------
+    num_rows: int
+        Total number of users actions.
+    stages: [str]
+        Stages to be benchmarked (see `STAGES`).
+    memory: bool
+        Measure the peak memory allocated by each stage.
+    repeat: int
+        Number of timed runs per stage.
+    seed: int
+        Random numbers generator seed (the same seed generates the same files).
+
+    Returns
+    -------
+    results: [dict]
+        Measures of each stage.
+    """
+    results = []
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        generate_attendance_lists(dirpath, num_rows, seed=seed)
+
+        # Stages depend on the output of previous ones, so they are always run (but only reported if requested):
+        def run_stage(stage: str, function: Callable) -> object:
+            if stage not in stages:
+                return function()
+
+            logging.info(f"Benchmarking '{stage}' ({num_rows} rows)...")
+            result, measures = measure(function, memory=memory, repeat=repeat)
+            results.append({'rows': num_rows, 'stage': stage, **measures})
+
+            return result
+
+        event_start_time, event_end_time = "17:00", "17:45"
+        options = {
+            'event_start_time': event_start_time,
+            'event_end_time': event_end_time,
+            'ignore_inactive_users': False
+        }
+        df_list = run_stage("load_csv", lambda: load_csv(dirpath, cache=False))
+        df_list = run_stage(
+            "normalize_attendance_list", lambda: [operations.normalize_attendance_list(df) for df in df_list]
+        )
+        df_actions = run_stage(
+            "prepare_attendance_list",
+            lambda: pd.concat([operations.prepare_attendance_list(df, ignore_inactive_users=False) for df in df_list])
+        )
+        df_uptime = run_stage(
+            "get_users_uptime",
+            lambda: operations.get_users_uptime(df_actions.copy(), event_start_time, event_end_time)
+        )
+        run_stage("summarize_attendance_list", lambda: operations.summarize_attendance_list(df_uptime.copy()))
+        df = run_stage("get_attendance_list", lambda: operations.get_attendance_list(df_list, **options))
+        run_stage(
+            "get_attendance_list_overall",
+            lambda: operations.get_attendance_list(df_list, calculate_overall_uptime=True, **options)
+        )
+        run_stage(
+            "get_attendance_list_streaming", lambda: operations.get_attendance_list_streaming(dirpath, **options)
+        )
+        # Chunks smaller than the files must not change the attendance list (sessions span chunks):
+        df_streaming = run_stage(
+            "get_attendance_list_streaming_chunked",
+            lambda: operations.get_attendance_list_streaming(dirpath, chunksize=max(num_rows // 100, 7), **options)
+        )
+        pd.testing.assert_frame_equal(df_streaming, df)
+        run_stage(
+            "get_attendance_list_partitioned", lambda: operations.get_attendance_list_partitioned(df_list, **options)
+        )
+        run_stage("get_attendance_timeline", lambda: operations.get_attendance_timeline(df_list, **options))
+
+        users_list = operations.extract_users_list(df)
+        queries = random.Random(seed).sample(users_list, min(len(users_list), 100))
+        run_stage(
+            "find_string",
+            lambda: [find_string(query, users_list, fuzzy_method="partial_token_sort_ratio") for query in queries]
+        )
+        run_stage(
+            "find_strings",
+            lambda: find_strings(
+                queries, users_list, fuzzy_method="partial_token_sort_ratio", limit=5, score_cutoff=0.9
+            )
+        )
+        run_stage(
+            "giveaway_vouchers",
+            lambda: operations.giveaway_vouchers(users_list, number=min(len(users_list), 10), block_lucky=True)
+        )
+
+    return results
+
+
+def get_environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.realpath(__file__))
+        ).stdout.strip()
+    except Exception:
+        commit = None
+
+    environment = {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'settings_hash': get_settings_hash()
+    }
+
+    return environment
+
+
+def compare_results(results: [dict], baseline: [dict], tolerance: float = 0.2) -> [dict]:
+    """
+    Compare benchmark results with baseline ones, looking for performance regressions.
+
+    Parameters
+    ----------
+    results: [dict]
+        Benchmark results.
+    baseline: [dict]
+        Baseline benchmark results (e.g. from the main branch).
+    tolerance: float
+        Maximum relative increase allowed for the execution time and peak memory of each stage.
+
+    Returns
+    -------
+    regressions: [dict]
+        Regressions found: stage, size, measure, baseline value and current value.
+    """
+    baseline = {(result['rows'], result['stage']): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        baseline_result = baseline.get((result['rows'], result['stage']))
+
+        if baseline_result is None:
+            continue
+
+        for key in ("seconds", "peak_memory_mb"):
+            value, baseline_value = result.get(key), baseline_result.get(key)
+
+            if value is not None and baseline_value and value > baseline_value * (1 + tolerance):
+                regressions.append({
+                    'rows': result['rows'],
+                    'stage': result['stage'],
+                    'measure': key,
+                    'baseline': baseline_value,
+                    'value': value
+                })
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the attendance pipeline over synthetic files.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="total number of users actions")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES, help="stages to be benchmarked")
+    parser.add_argument("--repeat", type=int, default=1, help="number of timed runs per stage")
+    parser.add_argument("--no-memory", action="store_true", help="do not measure the peak memory allocated")
+    parser.add_argument("--seed", type=int, default=42, help="random numbers generator seed")
+    parser.add_argument("--output", default=None, help="results filepath (default: 'benchmarks/results/')")
+    parser.add_argument("--baseline", default=None, help="baseline results filepath, to look for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="maximum relative increase allowed")
+    args = parser.parse_args()
+
+    setup_logger(__name__)
+
+    results = []
+
+    for num_rows in args.sizes:
+        results += run_benchmarks(num_rows, args.stages, memory=not args.no_memory, repeat=args.repeat, seed=args.seed)
+
+    output_filepath = args.output or os.path.join(
+        RESULTS_DIRPATH, f"benchmark_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_filepath)), exist_ok=True)
+
+    with open(output_filepath, mode="wt", encoding="utf-8") as file:
+        json.dump({'environment': get_environment(), 'results': results}, file, indent=4)
+
+    print(pd.DataFrame(results).to_string(index=False))
+    logging.info(f"Benchmark results saved at '{output_filepath}'.")
+
+    if args.baseline:
+        with open(args.baseline, mode="rt", encoding="utf-8") as file:
+            regressions = compare_results(results, json.load(file)['results'], tolerance=args.tolerance)
+
+        for regression in regressions:
+            logging.warning(
+                f"Regression at '{regression['stage']}' ({regression['rows']} rows): {regression['measure']} "
+                f"{regression['baseline']:.3f} -> {regression['value']:.3f}."
+            )
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
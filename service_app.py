@@ -0,0 +1,580 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs, SplitResult
+from email.parser import HeaderParser
+from email.message import Message
+from collections import deque
+from typing import Callable
+import pandas as pd
+import numpy as np
+import argparse
+import asyncio
+import logging
+import json
+import time
+import sys
+import io
+import os
+
+from src.utils import setup_logger, load_csv, get_settings, set_settings_filepath, sting_to_time, time_to_string
+from src.export import EXPORT_FORMATS, MIME_TYPES, get_report_sheets, write_frames
+from src import operations
+
+
+setup_logger(__name__)
+
+ROUTES = {
+    ("GET", "/health"): None,
+    ("GET", "/stats"): None,
+    ("POST", "/attendance-list"): "attendance_list",
+    ("POST", "/users"): "users",
+    ("POST", "/vouchers"): "vouchers"
+}
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+MAX_HEADER_SIZE = 64 * 1024
+TRUE_VALUES = ("1", "true", "yes", "on")
+FALSE_VALUES = ("0", "false", "no", "off")
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = None):
+        super().__init__(message or REASONS.get(status, ""))
+        self.status = status
+
+
+class LatencyStats:
+    """
+    Latency of the most recent requests of each route (in milliseconds), split into the time spent waiting for a
+    worker (queue) and in total.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.latencies = {}
+        self.counts = {}
+
+    def add(self, route: str, status: int, total_ms: float, queue_ms: float = 0.0) -> None:
+        self.latencies.setdefault(route, deque(maxlen=self.window)).append((total_ms, queue_ms))
+        counts = self.counts.setdefault(route, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    def summary(self) -> dict:
+        summary = {}
+
+        for route, latencies in self.latencies.items():
+            total, queue = np.array(latencies, dtype=float).T
+            summary[route] = {
+                'requests': {str(status): count for status, count in sorted(self.counts[route].items())},
+                'window': len(total),
+                'mean_ms': round(float(total.mean()), 2),
+                'p50_ms': round(float(np.percentile(total, 50)), 2),
+                'p95_ms': round(float(np.percentile(total, 95)), 2),
+                'p99_ms': round(float(np.percentile(total, 99)), 2),
+                'max_ms': round(float(total.max()), 2),
+                'queue_p95_ms': round(float(np.percentile(queue, 95)), 2)
+            }
+
+        return summary
+
+
+def parse_header_params(name: str, value: str) -> Message:
+    return HeaderParser().parsestr(f"{name}: {value}\r\n\r\n")
+
+
+def parse_multipart(body: bytes, content_type: str) -> ([(str, bytes)], dict):
+    """
+    Parse a `multipart/form-data` request body.
+
+    Parameters
+    ----------
+    body: bytes
+        Request body.
+    content_type: str
+        Request content type (with the boundary).
+
+    Returns
+    -------
+    files: [(str, bytes)]
+        Name and content of each uploaded file, following the request order.
+    fields: dict
+        Values of each (non-file) form field.
+    """
+    boundary = parse_header_params("Content-Type", content_type).get_boundary()
+
+    if not boundary:
+        raise HTTPError(400, "multipart boundary not defined.")
+
+    files, fields = [], {}
+    parts = (b"\r\n" + body).split(b"\r\n--" + boundary.encode("latin-1"))
+
+    for part in parts[1:]:
+        if part.startswith(b"--"):  # Closing boundary.
+            break
+
+        headers, separator, content = part.partition(b"\r\n\r\n")
+
+        if not separator:
+            raise HTTPError(400, "malformed multipart body.")
+
+        headers = HeaderParser().parsestr(headers.decode("utf-8", errors="replace").strip() + "\r\n\r\n")
+        name = headers.get_param("name", header="content-disposition")
+        filename = headers.get_filename()
+
+        if filename is not None:
+            files.append((filename, content))
+        elif name is not None:
+            fields.setdefault(name, []).append(content.decode("utf-8"))
+
+    return files, fields
+
+
+def get_option(options: dict, key: str, default: object = None, cast: Callable[[str], object] = str) -> object:
+    values = options.get(key)
+
+    if not values or values[-1] == "":
+        return default
+
+    value = values[-1].strip()
+
+    try:
+        if cast is bool:
+            assert value.lower() in TRUE_VALUES + FALSE_VALUES
+            return value.lower() in TRUE_VALUES
+
+        return cast(value)
+    except (AssertionError, ValueError):
+        raise HTTPError(400, f"invalid value for '{key}': '{value}'.")
+
+
+def get_params(operation: str, options: dict) -> dict:
+    """
+    Validate the options of an operation (query string and form fields) before dispatching it to the workers.
+
+    Parameters
+    ----------
+    operation: str
+        Operation: "attendance_list", "users" or "vouchers".
+    options: dict
+        Values of each option.
+
+    Returns
+    -------
+    params: dict
+        Operation parameters.
+    """
+    params = {
+        'event_start_time': get_option(options, "start_time", cast=lambda value: time_to_string(sting_to_time(value))),
+        'event_end_time': get_option(options, "end_time", cast=lambda value: time_to_string(sting_to_time(value))),
+        'ignore_inactive_users': get_option(options, "ignore_inactive_users", True, bool),
+        'calculate_overall_uptime': get_option(options, "calculate_overall_uptime", False, bool)
+    }
+
+    if operation == "attendance_list":
+        params['format'] = get_option(options, "format", "json")
+
+        if params['format'] not in ("json",) + EXPORT_FORMATS:
+            raise HTTPError(400, f"format '{params['format']}' not supported (json, {', '.join(EXPORT_FORMATS)}).")
+    elif operation == "vouchers":
+        params.update({
+            'number': get_option(options, "number", 3, int),
+            'block_duplicates': get_option(options, "block_duplicates", True, bool),
+            'block_lucky': get_option(options, "block_lucky", False, bool),
+            'ignore_users': [user for user in options['ignore_users'] if user] if "ignore_users" in options else None,
+            'weights': get_option(options, "weights", operations.VOUCHER_WEIGHTS[0]),
+            'seed': get_option(options, "seed", None, int)
+        })
+
+        if params['number'] < 1:
+            raise HTTPError(400, "the number of vouchers must be positive.")
+
+        if params['weights'] not in operations.VOUCHER_WEIGHTS:
+            raise HTTPError(
+                400, f"weights '{params['weights']}' not supported ({', '.join(operations.VOUCHER_WEIGHTS)})."
+            )
+
+    return params
+
+
+def to_json(content: object) -> bytes:
+    return json.dumps(content, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def run_operation(operation: str, files: [(str, bytes)], params: dict) -> (str, bytes):
+    """
+    Run an operation over the uploaded attendance lists (in a worker process).
+
+    Parameters
+    ----------
+    operation: str
+        Operation: "attendance_list", "users" or "vouchers".
+    files: [(str, bytes)]
+        Name and content of each uploaded file.
+    params: dict
+        Operation parameters (see `get_params`).
+
+    Returns
+    -------
+    content_type: str
+        Response content type.
+    body: bytes
+        Response body.
+    """
+    params = dict(params)
+    sources = []
+
+    for name, content in files:
+        source = io.BytesIO(content)
+        source.name = name
+        sources.append(source)
+
+    df_list = load_csv(sources, parallel=False, preprocess=operations.normalize_attendance_list)
+
+    if not df_list:
+        raise ValueError("no attendance list could be read.")
+
+    options = {
+        'df_list': df_list,
+        'event_start_time': params.pop('event_start_time'),
+        'event_end_time': params.pop('event_end_time'),
+        'ignore_inactive_users': params.pop('ignore_inactive_users')
+    }
+    calculate_overall_uptime = params.pop('calculate_overall_uptime')
+    df = operations.get_attendance_list(calculate_overall_uptime=calculate_overall_uptime, **options)
+
+    if operation == "users":
+        users_list = operations.extract_users_list(df)
+        return "application/json", to_json({'count': len(users_list), 'users': users_list})
+
+    if operation == "vouchers":
+        weights = None
+
+        if params['weights'] != operations.VOUCHER_WEIGHTS[0]:
+            df_overall = df if calculate_overall_uptime else operations.get_attendance_list(
+                calculate_overall_uptime=True, **options
+            )
+            weights = operations.get_voucher_weights(df_overall, weight_by=params['weights'])
+
+        # Users not included in the draw (by default, the ones defined in the settings):
+        ignore_users = params['ignore_users']
+
+        if ignore_users is None:
+            ignore_users = get_settings()['spreadsheets']['operations']['giveaway_voucher']['drop_users'] or []
+
+        ignore_users = list(operations.format_user_names(pd.Series(ignore_users, dtype=object))) if ignore_users else []
+
+        df = operations.giveaway_vouchers(
+            users_list=operations.extract_users_list(df),
+            number=params['number'],
+            block_duplicates=params['block_duplicates'],
+            block_lucky=params['block_lucky'],
+            ignore_users=ignore_users,
+            weights=weights,
+            seed=params['seed']
+        )
+        name = get_settings()['spreadsheets']['attendance_list']['user_name']
+
+        return "application/json", to_json({'seed': df.attrs['seed'], 'winners': df[name].tolist()})
+
+    if params['format'] == "json":
+        return "application/json", to_json(df.to_dict(orient="records"))
+
+    frames = df
+
+    # XLSX reports have one sheet per event date, plus an overall sheet (only the missing one is calculated):
+    if params['format'] == "xlsx":
+        df_other = operations.get_attendance_list(calculate_overall_uptime=not calculate_overall_uptime, **options)
+        frames = get_report_sheets(
+            df=df_other if calculate_overall_uptime else df,
+            df_overall=df if calculate_overall_uptime else df_other
+        )
+
+    file = io.BytesIO()
+    write_frames(frames, file, export_format=params['format'])
+
+    return MIME_TYPES[params['format']], file.getvalue()
+
+
+def init_worker(settings_filepath: str = None) -> None:
+    set_settings_filepath(settings_filepath)
+
+
+class AttendanceService:
+    """
+    Local HTTP service over the attendance list operations.
+
+    Requests are parsed on an asyncio event loop, while the operations themselves (CPU-bound) run in a bounded pool
+    of worker processes, so that the event loop is never blocked:
+
+    - At most `workers` operations run at once; up to `max_pending` more requests wait for a worker. Further
+      requests are rejected right away (`503 Service Unavailable`, with `Retry-After`), before their body is read.
+    - Request bodies larger than `max_body_mb` are rejected (`413 Payload Too Large`).
+    - The latency of each request is logged, sent back (`X-Response-Time` and `X-Queue-Time` headers) and summarized
+      per route at `GET /stats`.
+
+    Endpoints (`multipart/form-data` uploads of attendance lists; options as query string or form fields):
+
+    - `POST /attendance-list`: attendance list (`start_time`, `end_time`, `ignore_inactive_users`,
+      `calculate_overall_uptime` and `format`: json, csv, parquet or xlsx).
+    - `POST /users`: attendance list users.
+    - `POST /vouchers`: vouchers winners (`number`, `block_duplicates`, `block_lucky`, `ignore_users`, `weights` and
+      `seed`, besides the attendance list options).
+    - `GET /health` and `GET /stats`.
+    """
+
+    def __init__(
+            self,
+            workers: int = None,
+            max_pending: int = 16,
+            max_body_mb: float = 64,
+            timeout: float = 30,
+            settings_filepath: str = None
+    ):
+        assert max_pending >= 0
+
+        self.workers = workers or os.cpu_count()
+        self.max_pending = max_pending
+        self.max_body_size = int(max_body_mb * 1024 ** 2)
+        self.timeout = timeout
+        self.settings_filepath = settings_filepath
+        self.stats = LatencyStats()
+        self.running = 0
+        self.admitted = 0
+        self._pool = None
+        self._slots = None
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8502) -> None:
+        self._slots = asyncio.Semaphore(self.workers)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=init_worker, initargs=(self.settings_filepath,)
+        )
+
+        try:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_SIZE)
+            logging.info(
+                f"Serving on http://{host}:{port} ({self.workers} workers, {self.max_pending} pending requests)..."
+            )
+
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            keep_alive = True
+
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=self.timeout)
+                except asyncio.IncompleteReadError:  # Connection closed by the client.
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.send(writer, 413, {'error': "request header too large."}, keep_alive=False)
+                    break
+                except asyncio.TimeoutError:
+                    await self.send(writer, 408, {'error': "request header not received in time."}, keep_alive=False)
+                    break
+
+                keep_alive = await self.handle_request(head, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, head: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        start = time.perf_counter()
+        request_line, _, headers = head.decode("latin-1").partition("\r\n")
+        headers = HeaderParser().parsestr(headers)
+        method, target, version = (request_line.split(" ", 2) + ["", ""])[:3]
+        url = urlsplit(target)
+        keep_alive = version == "HTTP/1.1" and (headers.get("Connection") or "").lower() != "close"
+        state = {'queue_ms': 0.0, 'body_read': False}
+
+        try:
+            status, content_type, body, keep_alive = await self.dispatch(
+                method, url, headers, reader, writer, keep_alive, state
+            )
+        except HTTPError as e:
+            status, content_type, body = e.status, "application/json", to_json({'error': str(e)})
+            keep_alive = keep_alive and e.status < 500 and e.status not in (411, 413)
+        except Exception as e:
+            logging.exception(f"{method} {url.path} failed.")
+            status, content_type, body = 500, "application/json", to_json({'error': str(e)})
+
+        # Connections are closed if the request body was not read (e.g. rejected requests), since the next request
+        # would be parsed from the body bytes left:
+        if not state['body_read'] and (headers.get("Content-Length") or "0").strip() != "0":
+            keep_alive = False
+
+        total_ms = (time.perf_counter() - start) * 1000
+        headers = {
+            'X-Response-Time': f"{total_ms:.1f}ms",
+            'X-Queue-Time': f"{state['queue_ms']:.1f}ms"
+        }
+
+        if status == 503:
+            headers['Retry-After'] = "1"
+
+        await self.send(writer, status, body, content_type=content_type, headers=headers, keep_alive=keep_alive)
+        self.stats.add(f"{method} {url.path}", status, total_ms, state['queue_ms'])
+        logging.info(f"{method} {url.path} {status} ({total_ms:.1f}ms, queued {state['queue_ms']:.1f}ms)")
+
+        return keep_alive
+
+    async def dispatch(
+            self,
+            method: str,
+            url: SplitResult,
+            headers: Message,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+            keep_alive: bool,
+            state: dict
+    ) -> (int, str, bytes, bool):
+        if (method, url.path) not in ROUTES:
+            if any(path == url.path for _, path in ROUTES):
+                raise HTTPError(405)
+
+            raise HTTPError(404)
+
+        operation = ROUTES[(method, url.path)]
+
+        if url.path == "/health":
+            return 200, "application/json", to_json({
+                'status': "ok", 'workers': self.workers, 'running': self.running,
+                'pending': self.admitted - self.running
+            }), keep_alive
+
+        if url.path == "/stats":
+            return 200, "application/json", to_json(self.stats.summary()), keep_alive
+
+        # Backpressure: requests beyond the pending limit are rejected before their body is read.
+        if self.admitted >= self.workers + self.max_pending:
+            raise HTTPError(503, "too many requests, try again later.")
+
+        if headers.get("Content-Length") is None:
+            raise HTTPError(411)
+
+        content_length = headers["Content-Length"].strip()
+
+        if not (content_length.isascii() and content_length.isdigit()):
+            raise HTTPError(400, "invalid 'Content-Length' header (non-negative integer expected).")
+
+        content_length = int(content_length)
+
+        if content_length > self.max_body_size:
+            raise HTTPError(413, f"request body larger than {self.max_body_size // 1024 ** 2}MB.")
+
+        self.admitted += 1
+
+        try:
+            # Clients waiting for confirmation before sending large bodies (e.g. curl) are only confirmed once admitted:
+            if (headers.get("Expect") or "").lower() == "100-continue":
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+
+            body = await asyncio.wait_for(reader.readexactly(content_length), timeout=self.timeout)
+            state['body_read'] = True
+            content_type = headers.get("Content-Type") or ""
+
+            if not content_type.startswith("multipart/form-data"):
+                raise HTTPError(415, "attendance lists must be uploaded as 'multipart/form-data'.")
+
+            files, fields = parse_multipart(body, content_type)
+            del body
+
+            if not files:
+                raise HTTPError(400, "no attendance list uploaded.")
+
+            params = get_params(operation, {**parse_qs(url.query, keep_blank_values=True), **fields})
+            queue_start = time.perf_counter()
+
+            async with self._slots:
+                state['queue_ms'] = (time.perf_counter() - queue_start) * 1000
+                self.running += 1
+
+                try:
+                    loop = asyncio.get_running_loop()
+                    content_type, body = await loop.run_in_executor(
+                        self._pool, run_operation, operation, files, params
+                    )
+                except (AssertionError, ValueError) as e:
+                    raise HTTPError(400, str(e) or "invalid request.")
+                finally:
+                    self.running -= 1
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "request body not received in time.")
+        finally:
+            self.admitted -= 1
+
+        return 200, content_type, body, keep_alive
+
+    async def send(
+            self,
+            writer: asyncio.StreamWriter,
+            status: int,
+            body: object,
+            content_type: str = "application/json",
+            headers: dict = None,
+            keep_alive: bool = True
+    ) -> None:
+        body = body if isinstance(body, bytes) else to_json(body)
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        head += [f"{key}: {value}" for key, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve the attendance list operations over HTTP (localhost).")
+    parser.add_argument("--host", default=None, help="host address (default: '127.0.0.1')")
+    parser.add_argument("--port", type=int, default=None, help="port (default: 8502)")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: number of CPUs)")
+    parser.add_argument("--max-pending", type=int, default=None, help="requests waiting for a worker (default: 16)")
+    parser.add_argument("--settings", default=None, help="settings filepath (default: 'src/assets/settings.yml')")
+    args = parser.parse_args()
+
+    set_settings_filepath(args.settings)
+    service_settings = get_settings()['system'].get('service') or {}
+    service = AttendanceService(
+        workers=args.workers or service_settings.get('workers'),
+        max_pending=service_settings.get('max_pending', 16) if args.max_pending is None else args.max_pending,
+        max_body_mb=service_settings.get('max_body_mb') or 64,
+        timeout=service_settings.get('timeout') or 30,
+        settings_filepath=args.settings
+    )
+
+    try:
+        asyncio.run(service.serve(
+            host=args.host or service_settings.get('host') or "127.0.0.1",
+            port=args.port or service_settings.get('port') or 8502
+        ))
+    except KeyboardInterrupt:
+        logging.info("Service stopped.")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
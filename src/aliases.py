@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+import threading
+import logging
+import sqlite3
+import os
+
+from src.handlers import StringIndex
+from src.utils import get_settings
+
+
+# Fuzzy method to compare usernames (see `operations.get_user_remap`):
+FUZZY_METHOD = "partial_token_sort_ratio"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS aliases (
+    name TEXT PRIMARY KEY,
+    parent TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pairs (
+    name TEXT NOT NULL,
+    match TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    confirmed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, match)
+);
+CREATE TABLE IF NOT EXISTS config (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+class AliasStore:
+    """
+    Persistent (SQLite-based) store of usernames aliases: a union-find (disjoint sets) over every username seen,
+    where each set holds the usernames identified as being the same user, represented by its longest username.
+
+    Known usernames are resolved with a dictionary lookup, and only usernames seen for the first time are scored
+    against the stored users (longest usernames first, just like `operations.get_user_remap`). New usernames are
+    compared to the username of each user (not to its aliases), so that a short username (e.g. `JOAO SILVA`) does
+    not chain different users together (e.g. `JOAO SILVA SANTOS` and `JOAO SILVA COSTA`). Since users are never
+    split by later runs, the same usernames are always identified as the same user, whatever the input order.
+
+    Matches are stored with their similarity (`pairs` table). If the minimum similarity changes, the automatic
+    matches are discarded (and usernames scored again as they are seen), while matches confirmed by hand (see
+    `confirm`) are kept.
+
+    Parameters
+    ----------
+    filepath: str
+        SQLite database filepath.
+    """
+    def __init__(self, filepath: str):
+        self.filepath = os.path.abspath(filepath)
+
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        self.connection = sqlite3.connect(self.filepath, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        self._parent = {}
+        self._index = None
+        self._data_version = None
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "AliasStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        self._refresh()
+
+        return len(self._parent)
+
+    def _refresh(self) -> None:
+        # Other connections (e.g. other processes) may have changed the store since it was loaded:
+        data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+        if data_version != self._data_version:
+            self._parent = dict(self.connection.execute("SELECT name, parent FROM aliases"))
+            self._index = None
+            self._data_version = data_version
+
+    def _get_index(self) -> StringIndex:
+        if self._index is None:
+            self._index = StringIndex(fuzzy_method=FUZZY_METHOD)
+
+            for name, parent in self._parent.items():
+                if name == parent:
+                    self._index.add(name)
+
+        return self._index
+
+    def find(self, name: str) -> str:
+        """
+        Find the username of a user (path halving, so that later lookups are faster).
+
+        Parameters
+        ----------
+        name: str
+            Username (or alias) stored.
+
+        Returns
+        -------
+        user: str
+            Username of the user.
+        """
+        parent = self._parent
+
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+
+        return name
+
+    def _union(self, name: str, match: str, keep_match: bool = False) -> [(str, str)]:
+        # Sets are represented by their longest username (or by the match's one), keeping the older one on ties:
+        name, match = self.find(name), self.find(match)
+
+        if name == match:
+            return []
+
+        root, child = (name, match) if len(name) > len(match) and not keep_match else (match, name)
+        self._parent[child] = root
+
+        return [(child, root)]
+
+    def _check_config(self, min_similarity: float) -> None:
+        row = self.connection.execute("SELECT value FROM config WHERE key = 'min_similarity'").fetchone()
+
+        if row is not None and float(row[0]) == min_similarity:
+            return
+
+        # Automatic matches depend on the minimum similarity, so the sets are rebuilt from the confirmed ones:
+        if row is not None:
+            logging.info("Minimum username similarity changed, resetting the automatic aliases...")
+
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("DELETE FROM aliases")
+            self.connection.execute("DELETE FROM pairs WHERE confirmed = 0")
+            self._parent = {}
+
+            for name, user in self.connection.execute("SELECT name, match FROM pairs ORDER BY rowid").fetchall():
+                self._add_confirmed(name, user)
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO config (key, value) VALUES ('min_similarity', ?)", (repr(min_similarity),)
+            )
+
+        self._data_version = None
+        self._refresh()
+
+    def get_user_remap(self, users: [str], min_similarity: float) -> dict:
+        """
+        Map usernames to the username of their users, scoring only the usernames seen for the first time (and
+        storing them).
+
+        Parameters
+        ----------
+        users: [str]
+            Distinct usernames.
+        min_similarity: float
+            Minimum similarity between usernames to consider that they are the same user.
+
+        Returns
+        -------
+        user_remap: dict
+            Username of each user.
+        """
+        with self._lock:
+            self._check_config(min_similarity)
+            self._refresh()
+
+            if any(user not in self._parent for user in users):
+                with self.connection:
+                    # Locking the store for writing, then loading the usernames that other processes may have added:
+                    self.connection.execute("BEGIN IMMEDIATE")
+                    self._refresh()
+                    self._add(users, min_similarity)
+
+                self._data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+            user_remap = {user: self.find(user) for user in users}
+
+        return user_remap
+
+    def _add(self, users: [str], min_similarity: float) -> None:
+        new_users = sorted((user for user in dict.fromkeys(users) if user not in self._parent), key=len, reverse=True)
+        index = self._get_index()
+        aliases, pairs = [], []
+
+        for user in new_users:
+            match, similarity = index.find(user, min_similarity=min_similarity)
+            self._parent[user] = user
+            aliases.append((user, user))
+
+            if match and similarity >= min_similarity:
+                pairs.append((user, match, similarity))
+                unions = self._union(user, match)
+                aliases.extend(unions)
+
+                # Only roots are matched, so a root merged into another set is no longer indexed:
+                for child, _ in unions:
+                    index.remove(child)
+
+            if self._parent[user] == user:
+                index.add(user)
+
+        logging.info(f"{len(new_users)} new usernames stored ({len(pairs)} identified as aliases).")
+        self.connection.executemany(
+            "INSERT INTO aliases (name, parent) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET parent = excluded.parent",
+            aliases
+        )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO pairs (name, match, similarity) VALUES (?, ?, ?)", pairs
+        )
+
+    def confirm(self, name: str, user: str) -> None:
+        """
+        Confirm that a username is an alias of a user (e.g. an account whose name is too different to be matched),
+        merging their users into the user given. Confirmed aliases are kept even if the minimum similarity changes.
+
+        Parameters
+        ----------
+        name: str
+            Username (alias).
+        user: str
+            Username of the user.
+        """
+        with self._lock:
+            with self.connection:
+                self.connection.execute("BEGIN IMMEDIATE")
+                self._refresh()
+                self._add_confirmed(name, user)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO pairs (name, match, similarity, confirmed) VALUES (?, ?, 1.0, 1)",
+                    (name, user)
+                )
+
+            self._data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+            self._index = None
+
+    def _add_confirmed(self, name: str, user: str) -> None:
+        aliases = [(username, username) for username in dict.fromkeys((name, user)) if username not in self._parent]
+        self._parent.update(aliases)
+        aliases += self._union(name, user, keep_match=True)
+        self.connection.executemany(
+            "INSERT INTO aliases (name, parent) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET parent = excluded.parent",
+            aliases
+        )
+
+    def get_aliases(self) -> dict:
+        """
+        Get the aliases of each user.
+
+        Returns
+        -------
+        aliases: dict
+            Usernames identified as being each user (users without aliases are not included).
+        """
+        with self._lock:
+            self._refresh()
+            aliases = {}
+
+            for name in sorted(self._parent):
+                user = self.find(name)
+
+                if name != user:
+                    aliases.setdefault(user, []).append(name)
+
+        return aliases
+
+
+def get_alias_store(filepath: str = None) -> AliasStore:
+    """
+    Get the process-wide alias store defined in the application settings (`system -> aliases`).
+
+    Parameters
+    ----------
+    filepath: str
+        SQLite database filepath. If not defined, uses the application settings.
+
+    Returns
+    -------
+    store: AliasStore
+        Alias store (shared by the threads of the process).
+    """
+    filepath = os.path.abspath(filepath or (get_settings()['system'].get('aliases') or {}).get('filepath')
+                               or os.path.join(".cache", "aliases.db"))
+
+    with _STORES_LOCK:
+        if filepath not in _STORES:
+            _STORES[filepath] = AliasStore(filepath)
+
+        return _STORES[filepath]
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from collections import OrderedDict
+import pandas as pd
+import threading
+import tempfile
+import hashlib
+import logging
+import sys
+import os
+
+try:
+    import pyarrow  # noqa: F401 (required by `pd.DataFrame.to_parquet`)
+except ImportError:
+    pyarrow = None
+
+
+CACHE_VERSION = "2"
+
+
+def hash_content(content: bytes, *keys: object) -> str:
+    """
+    Compute a content-addressed cache key.
+
+    Parameters
+    ----------
+    content: bytes
+        Content to be cached (e.g. raw file bytes).
+    keys: object
+        Additional values that change how the content is processed (e.g. settings), hashed through `repr`.
+
+    Returns
+    -------
+    key: str
+        SHA-256 hash of the content and keys.
+    """
+    content_hash = hashlib.sha256(content)
+    content_hash.update(repr((CACHE_VERSION,) + keys).encode("utf-8"))
+    key = content_hash.hexdigest()
+
+    return key
+
+
+def get_cache_filepath(cache_dir: str, key: str) -> str:
+    cache_filepath = os.path.join(os.path.abspath(cache_dir), key[:2], f"{key}.parquet")
+
+    return cache_filepath
+
+
+def read_cached_frame(cache_dir: str, key: str) -> pd.DataFrame:
+    """
+    Read a cached dataframe.
+
+    Parameters
+    ----------
+    cache_dir: str
+        Cache directory path.
+    key: str
+        Cache key.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Cached dataframe, or `None` if not cached (or if the cache is not available).
+    """
+    cache_filepath = get_cache_filepath(cache_dir, key)
+
+    if pyarrow is None or not os.path.isfile(cache_filepath):
+        return None
+
+    try:
+        df = pd.read_parquet(cache_filepath)
+    except Exception as e:
+        logging.warning(f"Failed to read cached file '{cache_filepath}': {e}")
+        df = None
+
+    return df
+
+
+def write_cached_frame(cache_dir: str, key: str, df: pd.DataFrame) -> None:
+    """
+    Write a dataframe to the cache (in Parquet format), replacing it atomically.
+
+    Parameters
+    ----------
+    cache_dir: str
+        Cache directory path.
+    key: str
+        Cache key.
+    df: pd.DataFrame
+        Dataframe.
+    """
+    if pyarrow is None:
+        logging.warning("Cache not available: 'pyarrow' is not installed.")
+        return
+
+    cache_filepath = get_cache_filepath(cache_dir, key)
+    os.makedirs(os.path.dirname(cache_filepath), exist_ok=True)
+    file_descriptor, tmp_filepath = tempfile.mkstemp(dir=os.path.dirname(cache_filepath), suffix=".tmp")
+    os.close(file_descriptor)
+
+    try:
+        df.to_parquet(tmp_filepath, index=True)
+        os.replace(tmp_filepath, cache_filepath)
+    except Exception as e:
+        logging.warning(f"Failed to write cached file '{cache_filepath}': {e}")
+
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+
+
+def get_size(value: object) -> int:
+    """
+    Estimate the memory used by a cached value (dataframes, bytes and lists/tuples of them).
+
+    Parameters
+    ----------
+    value: object
+        Cached value.
+
+    Returns
+    -------
+    size: int
+        Size in bytes.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        size = int(value.memory_usage(index=True, deep=True).sum())
+    elif isinstance(value, (list, tuple)):
+        size = sum(get_size(v) for v in value)
+    else:
+        size = sys.getsizeof(value)
+
+    return size
+
+
+class LRUCache:
+    """
+    In-memory, thread-safe cache bounded by the number of entries and by their (estimated) size, evicting the least
+    recently used entries first.
+
+    Parameters
+    ----------
+    max_entries: int
+        Maximum number of entries.
+    max_size_mb: float
+        Maximum size of all entries together (in MB). Values larger than it are not cached.
+    """
+    def __init__(self, max_entries: int = 32, max_size_mb: float = None):
+        assert 1 <= max_entries
+
+        self.max_entries = max_entries
+        self.max_size = max_size_mb * 1024 ** 2 if max_size_mb else None
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def get(self, key: object, default: object = None) -> object:
+        with self._lock:
+            if key not in self._entries:
+                return default
+
+            self._entries.move_to_end(key)
+
+            return self._entries[key][0]
+
+    def set(self, key: object, value: object) -> None:
+        size = get_size(value)
+
+        if self.max_size is not None and size > self.max_size:
+            logging.debug(f"Value not cached: {size / 1024 ** 2:.1f} MB is larger than the cache.")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+
+            self._entries[key] = (value, size)
+            self.size += size
+
+            while len(self._entries) > self.max_entries or (self.max_size is not None and self.size > self.max_size):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
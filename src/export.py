@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from contextlib import contextmanager
+from xml.sax.saxutils import escape, quoteattr
+from datetime import date as dt_date, datetime
+from typing import BinaryIO, Iterator, Union
+import pandas as pd
+import numpy as np
+import tempfile
+import zipfile
+import re
+import os
+
+from src.utils import get_settings, write_csv
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+EXPORT_FORMATS = ("csv", "parquet", "xlsx")
+MIME_TYPES = {
+    'csv': "text/csv",
+    'parquet': "application/vnd.apache.parquet",
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+CHUNKSIZE = 50000
+
+XLSX_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+XLSX_RELS_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+XLSX_PACKAGE_RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+XLSX_CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+# Characters not allowed in XML 1.0 documents:
+INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def iter_chunks(df: pd.DataFrame, chunksize: int = CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def write_parquet(df: pd.DataFrame, file: BinaryIO, chunksize: int = CHUNKSIZE) -> None:
+    """
+    Write a dataframe in Parquet format, one row group per chunk (requires `pyarrow`).
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Dataframe.
+    file: BinaryIO
+        Binary file (or buffer).
+    chunksize: int
+        Number of rows per chunk.
+    """
+    assert pyarrow is not None, "Parquet export requires 'pyarrow'."
+
+    schema = pyarrow.Schema.from_pandas(df, preserve_index=False)
+
+    with pyarrow.parquet.ParquetWriter(file, schema) as writer:
+        for chunk in iter_chunks(df, chunksize=chunksize):
+            writer.write_table(pyarrow.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def get_xlsx_cell(value: object) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return "<c/>"
+    elif isinstance(value, (bool, np.bool_)):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    elif isinstance(value, (int, np.integer)) or (isinstance(value, (float, np.floating)) and np.isfinite(value)):
+        return f"<c><v>{value}</v></c>"
+    elif isinstance(value, (datetime, dt_date)):
+        value = value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+
+    value = INVALID_XML_CHARS.sub("", str(value))
+
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>'
+
+
+def write_xlsx_sheet(df: pd.DataFrame, file: BinaryIO, chunksize: int = CHUNKSIZE) -> None:
+    file.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="{XLSX_MAIN_NS}">'
+               f'<sheetData>'.encode("utf-8"))
+    file.write(("<row>" + "".join(get_xlsx_cell(str(column)) for column in df.columns) + "</row>").encode("utf-8"))
+
+    for chunk in iter_chunks(df, chunksize=chunksize):
+        rows = ["<row>" + "".join(map(get_xlsx_cell, row)) + "</row>" for row in chunk.itertuples(index=False)]
+        file.write("".join(rows).encode("utf-8"))
+
+    file.write(b"</sheetData></worksheet>")
+
+
+def get_sheet_names(names: [str]) -> [str]:
+    # Sheet names are unique (case-insensitive), up to 31 characters and without `[]:*?/\`:
+    sheet_names, used = [], set()
+
+    for name in names:
+        base_name = re.sub(r"[\[\]:*?/\\]", "_", str(name))[:31] or "Sheet"
+        sheet_name, i = base_name, 1
+
+        while sheet_name.lower() in used:
+            i += 1
+            sheet_name = f"{base_name[:31 - len(str(i)) - 1]}_{i}"
+
+        sheet_names.append(sheet_name)
+        used.add(sheet_name.lower())
+
+    return sheet_names
+
+
+def write_xlsx(sheets: dict, file: BinaryIO, chunksize: int = CHUNKSIZE) -> None:
+    """
+    Write dataframes as the sheets of an Excel (XLSX) workbook, chunk by chunk, straight into the compressed file (no
+    Excel engine is required). Values are written as numbers, booleans or text (dates in ISO format).
+
+    Parameters
+    ----------
+    sheets: dict
+        Dataframe of each sheet name.
+    file: BinaryIO
+        Binary file (or buffer).
+    chunksize: int
+        Number of rows per chunk.
+    """
+    sheet_names = get_sheet_names(list(sheets) or ["Sheet"])
+    frames = list(sheets.values()) or [pd.DataFrame()]
+    sheet_ids = range(1, len(sheet_names) + 1)
+
+    content_types = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="{XLSX_CONTENT_TYPE}.worksheet+xml"/>'
+        for i in sheet_ids
+    )
+    workbook_sheets = "".join(
+        f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>' for i, name in zip(sheet_ids, sheet_names)
+    )
+    workbook_rels = "".join(
+        f'<Relationship Id="rId{i}" Type="{XLSX_RELS_NS}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+        for i in sheet_ids
+    )
+    parts = {
+        "[Content_Types].xml":
+            f'<Types xmlns="{XLSX_CONTENT_TYPES_NS}">'
+            f'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            f'<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{XLSX_CONTENT_TYPE}.sheet.main+xml"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{XLSX_CONTENT_TYPE}.styles+xml"/>'
+            f'{content_types}</Types>',
+        "_rels/.rels":
+            f'<Relationships xmlns="{XLSX_PACKAGE_RELS_NS}">'
+            f'<Relationship Id="rId1" Type="{XLSX_RELS_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            f'</Relationships>',
+        "xl/workbook.xml":
+            f'<workbook xmlns="{XLSX_MAIN_NS}" xmlns:r="{XLSX_RELS_NS}"><sheets>{workbook_sheets}</sheets></workbook>',
+        "xl/_rels/workbook.xml.rels":
+            f'<Relationships xmlns="{XLSX_PACKAGE_RELS_NS}">{workbook_rels}'
+            f'<Relationship Id="rId{len(sheet_names) + 1}" Type="{XLSX_RELS_NS}/styles" Target="styles.xml"/>'
+            f'</Relationships>',
+        "xl/styles.xml":
+            f'<styleSheet xmlns="{XLSX_MAIN_NS}">'
+            f'<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+            f'<fills count="2"><fill><patternFill patternType="none"/></fill>'
+            f'<fill><patternFill patternType="gray125"/></fill></fills>'
+            f'<borders count="1"><border/></borders>'
+            f'<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            f'<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+            f'<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            f'</styleSheet>',
+    }
+
+    with zipfile.ZipFile(file, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in parts.items():
+            zip_file.writestr(name, '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' + content)
+
+        for i, df in zip(sheet_ids, frames):
+            with zip_file.open(f"xl/worksheets/sheet{i}.xml", mode="w", force_zip64=True) as sheet_file:
+                write_xlsx_sheet(df, sheet_file, chunksize=chunksize)
+
+
+def get_report_sheets(df: pd.DataFrame, df_overall: pd.DataFrame = None) -> dict:
+    """
+    Split an attendance list into per-date sheets (most recent date first), plus an overall sheet.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Attendance list per user and date (see `operations.get_attendance_list`).
+    df_overall: pd.DataFrame
+        Overall attendance list (see `operations.get_attendance_list` with `calculate_overall_uptime`), optional.
+
+    Returns
+    -------
+    sheets: dict
+        Attendance list of each date (sheet name), followed by the overall attendance list ("Overall").
+    """
+    attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+    col_date = attendance_list_settings['date']
+    sheets = {}
+
+    if col_date in df.columns:
+        for date, df_date in df.groupby(col_date, sort=False):
+            sheets[str(date)] = df_date.drop(columns=[col_date]).reset_index(drop=True)
+    else:
+        sheets["Attendance list"] = df
+
+    if df_overall is not None:
+        sheets["Overall"] = df_overall
+
+    return sheets
+
+
+def write_frames(
+        frames: Union[pd.DataFrame, dict],
+        file: BinaryIO,
+        export_format: str = "csv",
+        chunksize: int = CHUNKSIZE
+) -> None:
+    """
+    Write dataframes to a binary file, chunk by chunk.
+
+    Parameters
+    ----------
+    frames: Union[pd.DataFrame, dict]
+        Dataframe, or dataframe of each sheet name (XLSX format only; see `get_report_sheets`).
+    file: BinaryIO
+        Binary file (or buffer).
+    export_format: str
+        Export format (see `EXPORT_FORMATS`). CSV files follow the output settings (`system -> csv -> output`).
+    chunksize: int
+        Number of rows per chunk.
+    """
+    assert export_format in EXPORT_FORMATS, \
+        f"export format '{export_format}' not supported ({', '.join(EXPORT_FORMATS)})."
+    assert isinstance(frames, pd.DataFrame) or export_format == "xlsx", \
+        "multiple sheets are only supported by the XLSX format."
+
+    if export_format == "csv":
+        csv_output_settings = get_settings()['system']['csv']['output']
+        write_csv(
+            frames, file, sep=csv_output_settings['sep'], encoding=csv_output_settings['encoding'],
+            chunksize=chunksize, index=False
+        )
+    elif export_format == "parquet":
+        write_parquet(frames, file, chunksize=chunksize)
+    else:
+        write_xlsx({"Sheet1": frames} if isinstance(frames, pd.DataFrame) else frames, file, chunksize=chunksize)
+
+
+def save_frames(frames: Union[pd.DataFrame, dict], path: str, export_format: str = None) -> None:
+    """
+    Save dataframes to a file, chunk by chunk (see `write_frames`).
+
+    Parameters
+    ----------
+    frames: Union[pd.DataFrame, dict]
+        Dataframe, or dataframe of each sheet name (XLSX format only).
+    path: str
+        Output filepath.
+    export_format: str
+        Export format (see `EXPORT_FORMATS`). If not defined, it follows the file extension.
+    """
+    export_format = export_format or os.path.splitext(path)[1].lstrip(".").lower()
+    abs_path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+
+    with open(abs_path, mode="wb") as file:
+        write_frames(frames, file, export_format=export_format)
+
+
+@contextmanager
+def open_export(frames: Union[pd.DataFrame, dict], export_format: str = "csv") -> Iterator[BinaryIO]:
+    """
+    Export dataframes to a temporary file and open it for reading (e.g. by the Streamlit `download_button`), so that
+    the output is written chunk by chunk and held in memory only by its reader.
+
+    Parameters
+    ----------
+    frames: Union[pd.DataFrame, dict]
+        Dataframe, or dataframe of each sheet name (XLSX format only).
+    export_format: str
+        Export format (see `EXPORT_FORMATS`).
+
+    Returns
+    -------
+    file: Iterator[BinaryIO]
+        Exported file, opened for reading (removed on exit).
+    """
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = os.path.join(dirpath, f"export.{export_format}")
+        save_frames(frames, filepath, export_format=export_format)
+
+        with open(filepath, mode="rb") as file:
+            yield file
@@ -6,6 +6,20 @@
 
 from fuzzywuzzy.fuzz import \
     ratio, partial_ratio, token_sort_ratio, token_set_ratio, partial_token_sort_ratio, partial_token_set_ratio
+from fuzzywuzzy.utils import full_process
+from collections import Counter
+import numpy as np
+import bisect
+import math
+
+
+FUZZY_METHODS = \
+    ("ratio", "partial_ratio", "token_sort_ratio", "token_set_ratio", "partial_token_sort_ratio",
+     "partial_token_set_ratio")
+FUZZY_SCORERS = dict(zip(
+    FUZZY_METHODS,
+    (ratio, partial_ratio, token_sort_ratio, token_set_ratio, partial_token_sort_ratio, partial_token_set_ratio)
+))
 
 
 def compare_strings(s1: str, s2: str, fuzzy_method: str = "ratio") -> float:
@@ -31,25 +45,10 @@ def compare_strings(s1: str, s2: str, fuzzy_method: str = "ratio") -> float:
     [1] Fuzzy String Matching in Python Tutorial: https://www.datacamp.com/community/tutorials/fuzzy-string-python
     [2] TheFuzz: https://github.com/seatgeek/thefuzz
     """
-    supported_fuzzy_methods = \
-        ("ratio", "partial_ratio", "token_sort_ratio", "token_set_ratio", "partial_token_sort_ratio",
-         "partial_token_set_ratio")
-
-    assert fuzzy_method in supported_fuzzy_methods, \
-        f"fuzzy method '{fuzzy_method}' not supported ({', '.join(supported_fuzzy_methods)})."
+    strings_similarity = FUZZY_SCORERS.get(fuzzy_method)
 
-    strings_similarity = ratio
-
-    if fuzzy_method == 'partial_ratio':
-        strings_similarity = partial_ratio
-    elif fuzzy_method == 'token_sort_ratio':
-        strings_similarity = token_sort_ratio
-    elif fuzzy_method == 'token_set_ratio':
-        strings_similarity = token_set_ratio
-    elif fuzzy_method == 'partial_token_sort_ratio':
-        strings_similarity = partial_token_sort_ratio
-    elif fuzzy_method == 'partial_token_set_ratio':
-        strings_similarity = partial_token_set_ratio
+    assert strings_similarity is not None, \
+        f"fuzzy method '{fuzzy_method}' not supported ({', '.join(FUZZY_METHODS)})."
 
     similarity = strings_similarity(s1, s2) / 100.0
 
@@ -57,12 +56,469 @@ def compare_strings(s1: str, s2: str, fuzzy_method: str = "ratio") -> float:
 
 
 def find_string(string: str, strings_list: [str], fuzzy_method: str = "ratio") -> (str, float):
-    best_match, best_similarity = None, 0.0
+    matches = find_strings([string], strings_list, fuzzy_method=fuzzy_method, limit=1)[0]
+    best_match, best_similarity = matches[0] if matches else (None, 0.0)
+
+    return best_match, best_similarity
 
-    for s in strings_list:
-        similarity = compare_strings(string, s, fuzzy_method=fuzzy_method)
 
-        if similarity > best_similarity:
-            best_match, best_similarity = s, similarity
+def find_strings(
+        queries: [str],
+        choices: [str],
+        fuzzy_method: str = "ratio",
+        limit: int = 1,
+        score_cutoff: float = 0.0
+) -> [[(str, float)]]:
+    """
+    Find the most similar choices of each query, preparing each string only once (see `StringIndex`).
 
-    return best_match, best_similarity
+    Parameters
+    ----------
+    queries: [str]
+        Strings to be looked up.
+    choices: [str]
+        Candidate strings.
+    fuzzy_method: str
+        Fuzzy method to compare strings.
+    limit: int
+        Maximum number of matches per query (top-k).
+    score_cutoff: float
+        Minimum similarity in range [0,1]. Pairs that cannot reach it are not scored.
+
+    Returns
+    -------
+    matches: [[(str, float)]]
+        Matches of each query (choice and similarity), from the most to the least similar (ties follow the choices
+        order). Choices that are not similar at all are never matched.
+    """
+    index = StringIndex(fuzzy_method=fuzzy_method)
+
+    for choice in choices:
+        index.add(choice)
+
+    matches = [index.find_top(query, limit=limit, min_similarity=score_cutoff) for query in queries]
+
+    return matches
+
+
+def get_similarity_matrix(
+        queries: [str],
+        choices: [str],
+        fuzzy_method: str = "ratio",
+        score_cutoff: float = 0.0
+) -> np.ndarray:
+    """
+    Compute the similarity between every query and every choice, preparing each string only once (see
+    `StringIndex`).
+
+    Parameters
+    ----------
+    queries: [str]
+        Strings (rows).
+    choices: [str]
+        Strings (columns).
+    fuzzy_method: str
+        Fuzzy method to compare strings.
+    score_cutoff: float
+        Minimum similarity in range [0,1]. Pairs that cannot reach it are not scored.
+
+    Returns
+    -------
+    similarities: np.ndarray
+        Similarity between each query and each choice in range [0,1]; similarities below `score_cutoff` are 0.
+    """
+    index = StringIndex(fuzzy_method=fuzzy_method)
+
+    for choice in choices:
+        index.add(choice)
+
+    similarities = np.zeros((len(queries), len(choices)))
+
+    for i, query in enumerate(queries):
+        similarities[i] = index.similarities(query, min_similarity=score_cutoff)
+
+    return similarities
+
+
+def prepare_string(string: str, fuzzy_method: str = "ratio") -> str:
+    """
+    Prepare string the same way the fuzzy method does before comparing strings.
+
+    Parameters
+    ----------
+    string: str
+        String.
+    fuzzy_method: str
+        Fuzzy method to compare strings.
+
+    Returns
+    -------
+    prepared_string: str
+        String compared by the fuzzy method, or `None` if the method does not compare whole strings (token set
+        methods).
+    """
+    if fuzzy_method in ("ratio", "partial_ratio"):
+        prepared_string = string
+    elif fuzzy_method in ("token_sort_ratio", "partial_token_sort_ratio"):
+        prepared_string = " ".join(sorted(full_process(string, force_ascii=True).split())).strip()
+    else:
+        prepared_string = None
+
+    return prepared_string
+
+
+def similarity_to_ratio(similarity: float) -> float:
+    """
+    Convert minimum similarity into the minimum matching ratio (before rounding) of the fuzzy methods.
+
+    Parameters
+    ----------
+    similarity: float
+        Minimum similarity between strings in range [0,1].
+
+    Returns
+    -------
+    min_ratio: float
+        Minimum matching ratio in range [0,1] that may produce a similarity greater than or equal to `similarity`.
+    """
+    min_score = math.ceil(100 * similarity - 1e-9)
+    min_ratio = (min_score - 0.5) / 100.0 - 1e-9
+
+    return min_ratio
+
+
+def prepare_tokens(string: str, fuzzy_method: str = "ratio") -> object:
+    """
+    Prepare string to be scored by the fuzzy method without repeating its preprocessing (see `score_prepared`).
+
+    Parameters
+    ----------
+    string: str
+        String.
+    fuzzy_method: str
+        Fuzzy method to compare strings.
+
+    Returns
+    -------
+    prepared_tokens: object
+        String compared by the fuzzy method (see `prepare_string`), or its set of tokens (token set methods).
+    """
+    if fuzzy_method in ("token_set_ratio", "partial_token_set_ratio"):
+        prepared_tokens = frozenset(full_process(string, force_ascii=True).split())
+    else:
+        prepared_tokens = prepare_string(string, fuzzy_method=fuzzy_method)
+
+    return prepared_tokens
+
+
+def score_prepared(tokens1: object, tokens2: object, fuzzy_method: str = "ratio") -> float:
+    """
+    Compare strings prepared by `prepare_tokens`, just like `compare_strings` compares the original strings.
+
+    Parameters
+    ----------
+    tokens1: object
+        Prepared string.
+    tokens2: object
+        Prepared string.
+    fuzzy_method: str
+        Fuzzy method to compare strings.
+
+    Returns
+    -------
+    similarity: float
+        Similarity between the original strings in range [0,1].
+    """
+    strings_similarity = partial_ratio if fuzzy_method.startswith("partial") else ratio
+
+    if not isinstance(tokens1, frozenset):
+        return strings_similarity(tokens1, tokens2) / 100.0
+
+    if not tokens1 or not tokens2:
+        return 0.0
+
+    # Same as `fuzzywuzzy.fuzz._token_set`, from the tokens sets:
+    sorted_sect = " ".join(sorted(tokens1 & tokens2))
+    combined_1to2 = (sorted_sect + " " + " ".join(sorted(tokens1 - tokens2))).strip()
+    combined_2to1 = (sorted_sect + " " + " ".join(sorted(tokens2 - tokens1))).strip()
+    similarity = max(
+        strings_similarity(sorted_sect, combined_1to2),
+        strings_similarity(sorted_sect, combined_2to1),
+        strings_similarity(combined_1to2, combined_2to1)
+    ) / 100.0
+
+    return similarity
+
+
+class StringIndex:
+    """
+    Index of strings to find the most similar string, scoring only the candidates that may be similar enough.
+
+    Fuzzy methods based on whole strings (`ratio`, `partial_ratio`, `token_sort_ratio` and `partial_token_sort_ratio`)
+    match at most as many characters as both strings have in common, so the index keeps the characters count of each
+    string and computes an upper bound of the similarity for all candidates at once. Candidates whose upper bound does
+    not reach the minimum similarity are never scored, and the remaining ones are scored from the most to the least
+    promising, stopping as soon as no candidate can beat the best match. Strings are prepared for scoring only once
+    (see `prepare_tokens`), whatever the fuzzy method.
+
+    Parameters
+    ----------
+    fuzzy_method: str
+        Fuzzy method to compare strings.
+    """
+    def __init__(self, fuzzy_method: str = "ratio"):
+        assert fuzzy_method in FUZZY_METHODS, \
+            f"fuzzy method '{fuzzy_method}' not supported ({', '.join(FUZZY_METHODS)})."
+
+        self.fuzzy_method = fuzzy_method
+        self.partial = fuzzy_method.startswith("partial")
+        self.strings = []
+        self._prepared_strings = []
+        self._tokens = []
+        self._alphabet = {}
+        self._lengths = np.zeros(16, dtype=np.int32)
+        self._profiles = np.zeros((16, 16), dtype=np.int32)
+        self._positions = {}
+        self._removed = set()
+
+    def __len__(self) -> int:
+        return len(self.strings) - len(self._removed)
+
+    def add(self, string: str) -> None:
+        """
+        Add string to the index.
+
+        Parameters
+        ----------
+        string: str
+            String.
+        """
+        prepared_string = prepare_string(string, fuzzy_method=self.fuzzy_method)
+        i = len(self.strings)
+        self._positions.setdefault(string, []).append(i)
+        self.strings.append(string)
+        self._prepared_strings.append(prepared_string)
+        self._tokens.append(
+            prepare_tokens(string, fuzzy_method=self.fuzzy_method) if prepared_string is None else prepared_string
+        )
+
+        if prepared_string is None:
+            return
+
+        chars_count = Counter(prepared_string)
+
+        for char in chars_count:
+            self._alphabet.setdefault(char, len(self._alphabet))
+
+        rows, cols = self._profiles.shape
+
+        if i >= rows or len(self._alphabet) > cols:
+            profiles = np.zeros((max(rows, 2 * (i + 1)), max(cols, 2 * len(self._alphabet))), dtype=np.int32)
+            profiles[:rows, :cols] = self._profiles
+            lengths = np.zeros(profiles.shape[0], dtype=np.int32)
+            lengths[:rows] = self._lengths
+            self._profiles, self._lengths = profiles, lengths
+
+        self._lengths[i] = len(prepared_string)
+
+        for char, count in chars_count.items():
+            self._profiles[i, self._alphabet[char]] = count
+
+    def remove(self, string: str) -> None:
+        """
+        Remove string from the index (if indexed). Its position is kept, so the indexing order of the other strings
+        does not change, but it is never a candidate again.
+
+        Parameters
+        ----------
+        string: str
+            String.
+        """
+        self._removed.update(self._positions.pop(string, ()))
+
+    def upper_bounds(self, string: str) -> np.ndarray:
+        """
+        Compute an upper bound of the matching ratio between a string and every indexed string.
+
+        Parameters
+        ----------
+        string: str
+            String.
+
+        Returns
+        -------
+        bounds: np.ndarray
+            Upper bounds of the matching ratios in range [0,1], following the indexing order.
+        """
+        n = len(self.strings)
+        prepared_string = prepare_string(string, fuzzy_method=self.fuzzy_method)
+
+        if prepared_string is None:
+            return np.ones(n)
+
+        lengths = self._lengths[:n]
+        common_chars = np.zeros(n, dtype=np.int32)
+
+        for char, count in Counter(prepared_string).items():
+            j = self._alphabet.get(char)
+
+            if j is not None:
+                common_chars += np.minimum(self._profiles[:n, j], count)
+
+        # Partial methods align the shortest string with a substring of the longest one:
+        if self.partial:
+            total_chars = np.minimum(lengths, len(prepared_string)) + common_chars
+        else:
+            total_chars = lengths + len(prepared_string)
+
+        bounds = np.divide(2.0 * common_chars, total_chars, out=np.zeros(n), where=total_chars > 0)
+
+        # Equivalent strings are always fully similar, even empty ones:
+        if not prepared_string:
+            bounds[lengths == 0] = 1.0
+
+        return bounds
+
+    def get_candidates(self, string: str, min_similarity: float = 0.0) -> (np.ndarray, np.ndarray):
+        """
+        Get the indexed strings that may be similar enough to a string, from the most to the least promising.
+
+        Parameters
+        ----------
+        string: str
+            String.
+        min_similarity: float
+            Minimum similarity in range [0,1].
+
+        Returns
+        -------
+        candidates: np.ndarray
+            Positions of the candidates (ties follow the indexing order).
+        max_similarities: np.ndarray
+            Maximum similarity each candidate may reach.
+        """
+        bounds = self.upper_bounds(string)
+
+        # Removed strings are never candidates:
+        if self._removed:
+            bounds[list(self._removed)] = -1.0
+
+        candidates = np.flatnonzero(bounds >= similarity_to_ratio(min_similarity))
+        candidates = candidates[np.argsort(-bounds[candidates], kind="stable")]
+        max_similarities = np.where(
+            bounds[candidates] > .995, 1.0, np.floor(100 * bounds[candidates] + 0.5 + 1e-9) / 100.0
+        )
+
+        return candidates, max_similarities
+
+    def similarities(self, string: str, min_similarity: float = 0.0) -> np.ndarray:
+        """
+        Compute the similarity between a string and every indexed string, scoring only the candidates that may be
+        similar enough.
+
+        Parameters
+        ----------
+        string: str
+            String.
+        min_similarity: float
+            Minimum similarity in range [0,1].
+
+        Returns
+        -------
+        similarities: np.ndarray
+            Similarities in range [0,1], following the indexing order; similarities below `min_similarity` are 0.
+        """
+        similarities = np.zeros(len(self.strings))
+
+        if not self.strings:
+            return similarities
+
+        tokens = prepare_tokens(string, fuzzy_method=self.fuzzy_method)
+        candidates, _ = self.get_candidates(string, min_similarity=min_similarity)
+
+        for i in candidates:
+            similarities[i] = score_prepared(tokens, self._tokens[i], fuzzy_method=self.fuzzy_method)
+
+        similarities[similarities < min_similarity] = 0.0
+
+        return similarities
+
+    def find_top(self, string: str, limit: int = 1, min_similarity: float = 0.0) -> [(str, float)]:
+        """
+        Find the most similar indexed strings (top-k), stopping as soon as no remaining candidate can be among them.
+
+        Parameters
+        ----------
+        string: str
+            String.
+        limit: int
+            Maximum number of matches.
+        min_similarity: float
+            Minimum similarity in range [0,1].
+
+        Returns
+        -------
+        matches: [(str, float)]
+            Matches (indexed string and similarity), from the most to the least similar (ties follow the indexing
+            order). Strings that are not similar at all are never matched.
+        """
+        assert 1 <= limit
+
+        if not self.strings:
+            return []
+
+        tokens = prepare_tokens(string, fuzzy_method=self.fuzzy_method)
+        candidates, max_similarities = self.get_candidates(string, min_similarity=min_similarity)
+        top = []
+
+        for i, max_similarity in zip(candidates, max_similarities):
+            if len(top) == limit and max_similarity < -top[-1][0]:
+                break
+
+            similarity = score_prepared(tokens, self._tokens[i], fuzzy_method=self.fuzzy_method)
+
+            if similarity > 0.0 and similarity >= min_similarity:
+                bisect.insort(top, (-similarity, i))
+                del top[limit:]
+
+        matches = [(self.strings[i], -similarity) for similarity, i in top]
+
+        return matches
+
+    def find(self, string: str, min_similarity: float = 0.0) -> (str, float):
+        """
+        Find the most similar indexed string, like `find_string` over the indexed strings (in the indexing order).
+
+        Parameters
+        ----------
+        string: str
+            String.
+        min_similarity: float
+            Minimum similarity of interest in range [0,1]. Whenever the best match is at least as similar, it is the
+            same one found by `find_string`; otherwise, the returned match (if any) is not similar enough.
+
+        Returns
+        -------
+        best_match: str
+            Most similar indexed string.
+        best_similarity: float
+            Similarity between strings `string` and `best_match` in range [0,1].
+        """
+        best_match, best_similarity, best_i = None, 0.0, None
+
+        if not self.strings:
+            return best_match, best_similarity
+
+        tokens = prepare_tokens(string, fuzzy_method=self.fuzzy_method)
+        candidates, max_similarities = self.get_candidates(string, min_similarity=min_similarity)
+
+        for i, max_similarity in zip(candidates, max_similarities):
+            if max_similarity < best_similarity:
+                break
+
+            similarity = score_prepared(tokens, self._tokens[i], fuzzy_method=self.fuzzy_method)
+
+            if similarity > best_similarity or (similarity == best_similarity and best_i is not None and i < best_i):
+                best_match, best_similarity, best_i = self.strings[i], similarity, i
+
+        return best_match, best_similarity
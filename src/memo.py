@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+from typing import Callable, Hashable, Union
+import pandas as pd
+import threading
+
+from src.utils import get_settings, get_settings_hash, load_csv
+from src.cache import LRUCache, hash_content
+from src.profiling import StageProfiler, profile_stage
+from src.export import open_export
+from src import operations
+
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_memo_cache(name: str) -> LRUCache:
+    """
+    Get a process-wide in-memory cache, which outlives Streamlit reruns (this module is imported only once).
+
+    Parameters
+    ----------
+    name: str
+        Cache name.
+
+    Returns
+    -------
+    cache: LRUCache
+        Cache, bounded as defined in the application settings (`system -> memo`).
+    """
+    with _CACHES_LOCK:
+        if name not in _CACHES:
+            memo_settings = get_settings()['system'].get('memo') or {}
+            _CACHES[name] = LRUCache(
+                max_entries=memo_settings.get('max_entries') or 32,
+                max_size_mb=memo_settings.get('max_size_mb')
+            )
+
+        return _CACHES[name]
+
+
+def clear_memo_caches() -> None:
+    with _CACHES_LOCK:
+        for cache in _CACHES.values():
+            cache.clear()
+
+
+def get_files_keys(files: [UploadedFile], *keys: object) -> [str]:
+    files_keys = [hash_content(file.getvalue(), *keys) for file in files if file is not None]
+
+    return files_keys
+
+
+def load_csv_memoized(
+        files: [UploadedFile],
+        preprocess: Callable[[pd.DataFrame], pd.DataFrame] = None,
+        profiler: StageProfiler = None
+) -> [pd.DataFrame]:
+    """
+    Load CSV files uploaded through 'streamlit' UI (see `utils.load_csv`), keeping their content in memory, keyed by
+    the file bytes, the settings and `preprocess`, so that files already loaded are not read again.
+
+    Parameters
+    ----------
+    files: [UploadedFile]
+        Files uploaded through 'streamlit' UI.
+    preprocess: Callable[[pd.DataFrame], pd.DataFrame]
+        Function applied to the content of each file (e.g. `operations.normalize_attendance_list`).
+    profiler: StageProfiler
+        Stage-level profiler (optional).
+
+    Returns
+    -------
+    df_list: [pd.DataFrame]
+        Files content, following the files order. Files that could not be read are logged and skipped.
+    """
+    cache = get_memo_cache("frames")
+    files = [file for file in files if file is not None]
+    preprocess_name = f"{preprocess.__module__}.{preprocess.__qualname__}" if preprocess else None
+
+    with profile_stage(profiler, "memo_load_csv", files=len(files)) as record:
+        files_keys = get_files_keys(files, get_settings_hash(), preprocess_name)
+        missing_files = {key: file for key, file in zip(files_keys, files) if key not in cache}
+        record['files_cached'] = len(files) - len(missing_files)
+
+    if missing_files:
+        df_list = load_csv(list(missing_files.values()), preprocess=preprocess, profiler=profiler)
+
+        # Some files could not be read, so they are read one by one to know which ones (and not try them again):
+        if len(df_list) != len(missing_files):
+            df_list = [
+                next(iter(load_csv([file], preprocess=preprocess)), None) for file in missing_files.values()
+            ]
+
+        for key, df in zip(missing_files, df_list):
+            cache.set(key, df)
+
+    df_list = [df for df in (cache.get(key) for key in files_keys) if df is not None]
+
+    return df_list
+
+
+def get_attendance_list_memoized(
+        files: [UploadedFile],
+        event_start_time: str = None,
+        event_end_time: str = None,
+        ignore_inactive_users: bool = True,
+        calculate_overall_uptime: bool = False,
+        profiler: StageProfiler = None
+) -> pd.DataFrame:
+    """
+    Get the attendance list of the files uploaded through 'streamlit' UI (see `operations.get_attendance_list`),
+    keeping the files content and the attendance list in memory. The attendance list is keyed by the files bytes,
+    the event time slot, the options and the settings, so that UI interactions that do not change them (e.g. the
+    vouchers options) do not recalculate it.
+
+    Parameters
+    ----------
+    files: [UploadedFile]
+        Files uploaded through 'streamlit' UI.
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    ignore_inactive_users: bool
+        Ignore users not present at the time the attendance list was generated.
+    calculate_overall_uptime: bool
+        Calculate overall uptime per user.
+    profiler: StageProfiler
+        Stage-level profiler (optional).
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Attendance list.
+    """
+    cache = get_memo_cache("attendance_lists")
+    files = [file for file in files if file is not None]
+
+    with profile_stage(profiler, "memo_attendance_list", files=len(files)) as record:
+        key = (
+            tuple(get_files_keys(files)),
+            event_start_time,
+            event_end_time,
+            ignore_inactive_users,
+            calculate_overall_uptime,
+            get_settings_hash()
+        )
+        df = cache.get(key)
+        record['cached'] = int(df is not None)
+
+    if df is None:
+        df_list = load_csv_memoized(files, preprocess=operations.normalize_attendance_list, profiler=profiler)
+        df = operations.get_attendance_list(
+            df_list=df_list,
+            event_start_time=event_start_time,
+            event_end_time=event_end_time,
+            ignore_inactive_users=ignore_inactive_users,
+            calculate_overall_uptime=calculate_overall_uptime,
+            profiler=profiler
+        )
+        cache.set(key, df)
+
+    return df.copy()
+
+
+def get_attendance_timeline_memoized(
+        files: [UploadedFile],
+        event_start_time: str = None,
+        event_end_time: str = None,
+        ignore_inactive_users: bool = True,
+        min_presence: float = None,
+        profiler: StageProfiler = None
+) -> (pd.DataFrame, pd.DataFrame):
+    """
+    Get the attendance timeline of the files uploaded through 'streamlit' UI (see
+    `operations.get_attendance_timeline`), keeping the files content and the timeline in memory, just like
+    `get_attendance_list_memoized`.
+
+    Parameters
+    ----------
+    files: [UploadedFile]
+        Files uploaded through 'streamlit' UI.
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    ignore_inactive_users: bool
+        Ignore users not present at the time the attendance list was generated.
+    min_presence: float
+        Minimum fraction of the event time slot attended to consider that a user was present.
+    profiler: StageProfiler
+        Stage-level profiler (optional).
+
+    Returns
+    -------
+    df_timeline: pd.DataFrame
+        Attendees per minute of each event date.
+    df_presence: pd.DataFrame
+        Presence per user and date.
+    """
+    cache = get_memo_cache("attendance_timelines")
+    files = [file for file in files if file is not None]
+
+    with profile_stage(profiler, "memo_attendance_timeline", files=len(files)) as record:
+        key = (
+            tuple(get_files_keys(files)),
+            event_start_time,
+            event_end_time,
+            ignore_inactive_users,
+            min_presence,
+            get_settings_hash()
+        )
+        frames = cache.get(key)
+        record['cached'] = int(frames is not None)
+
+    if frames is None:
+        df_list = load_csv_memoized(files, preprocess=operations.normalize_attendance_list, profiler=profiler)
+        frames = operations.get_attendance_timeline(
+            df_list=df_list,
+            event_start_time=event_start_time,
+            event_end_time=event_end_time,
+            ignore_inactive_users=ignore_inactive_users,
+            min_presence=min_presence,
+            profiler=profiler
+        )
+        cache.set(key, frames)
+
+    return tuple(df.copy() for df in frames)
+
+
+def export_memoized(
+        key: Hashable,
+        get_frames: Callable[[], Union[pd.DataFrame, dict]],
+        export_format: str = "csv"
+) -> bytes:
+    """
+    Export dataframes (see `export.open_export`), keeping the exported file in memory, keyed by the dataframes key,
+    the export format and the settings, so that reruns that do not change the dataframes (e.g. any UI interaction
+    after "Run") do not export them again.
+
+    Parameters
+    ----------
+    key: Hashable
+        Key that identifies the dataframes (e.g. the files keys and the options they were calculated with).
+    get_frames: Callable[[], Union[pd.DataFrame, dict]]
+        Function that returns the dataframe, or dataframe of each sheet name (XLSX format only), called only if the
+        export is not cached.
+    export_format: str
+        Export format (see `export.EXPORT_FORMATS`).
+
+    Returns
+    -------
+    data: bytes
+        Exported file content.
+    """
+    cache = get_memo_cache("exports")
+    key = (key, export_format, get_settings_hash())
+    data = cache.get(key)
+
+    if data is None:
+        with open_export(get_frames(), export_format=export_format) as file:
+            data = file.read()
+
+        cache.set(key, data)
+
+    return data
@@ -4,23 +4,33 @@
 # Capgemini (Brazil) - www.capgemini.com/br-pt
 # "People matter, results count"
 
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Union
+from itertools import repeat
 import pandas as pd
+import numpy as np
+import unicodedata
 import logging
 import random
-import math
+import os
 
-from src.utils import get_settings, now
-from src.handlers import find_string
+from src.utils import get_settings, get_settings_filepath, set_settings_filepath, iter_csv, now
+from src.profiling import StageProfiler, profile_stage
+from src.cache import LRUCache
+from src.timestamps import parse_timestamps
+from src.handlers import StringIndex
+from src.aliases import FUZZY_METHOD, get_alias_store
 
 ATTENDANCE_LIST = "attendance_list"
 ATTENDANCE_LIST_COUNT = "attendance_list_count"
 ATTENDANCE_LIST_DRAW_VOUCHER = "giveaway_voucher"
+ATTENDANCE_TIMELINE = "attendance_timeline"
 
 TYPES = (
     ATTENDANCE_LIST_DRAW_VOUCHER,
     ATTENDANCE_LIST_COUNT,
-    ATTENDANCE_LIST
+    ATTENDANCE_LIST,
+    ATTENDANCE_TIMELINE
 )
 
 CSV_HEADER_DEFAULT = ["Full Name", "User Action", "Timestamp"]
@@ -45,6 +55,24 @@ TRANSLATIONS = {
     }
 }
 
+# Users actions (translated) encoded as small integers (see `encode_user_actions`):
+USER_ACTIONS = ("Joined", "Joined before", "Left")
+JOINED, JOINED_BEFORE, LEFT = range(len(USER_ACTIONS))
+
+# Timestamps encoded as 64-bit integer nanoseconds (see `encode_timestamps`):
+NAT = np.iinfo(np.int64).min
+DAY = 86400 * 10 ** 9
+MINUTE = 60 * 10 ** 9
+
+# Partitions of the users actions processed by each worker (see `get_attendance_list_partitioned`):
+PARTITIONS = ("date", "user")
+
+# Vouchers draw weights (see `get_voucher_weights`):
+VOUCHER_WEIGHTS = ("uniform", "attendance", "uptime")
+
+# Formatted usernames (see `format_user_name`):
+USER_NAMES_CACHE = LRUCache(max_entries=2 ** 16)
+
 
 def translate_dataframe(df: pd.DataFrame, force_header: bool = True) -> pd.DataFrame:
     def translate_header_column(string: str) -> str:
@@ -63,65 +91,523 @@ def translate_dataframe(df: pd.DataFrame, force_header: bool = True) -> pd.DataF
     return df
 
 
+def get_header_signature(df: pd.DataFrame) -> tuple:
+    # Known header columns identify the export language (files without header have their first row as header):
+    signature = tuple(column if column in TRANSLATIONS['header'] else None for column in df.columns)
+
+    return signature
+
+
+def fold_accents(string: str) -> str:
+    folded_string = "".join(c for c in unicodedata.normalize("NFKD", string) if not unicodedata.combining(c))
+
+    return folded_string
+
+
 def format_user_name(user_name: str) -> str:
+    """
+    Format a username as `First name Middle names Last name`, in upper case, without accents and with single spaces
+    between names. Formatted usernames are kept in a least recently used cache shared by all callers (e.g. the
+    attendance list, the vouchers draw and the users to be dropped from it), since the same attendees repeat across
+    meetings.
+
+    Parameters
+    ----------
+    user_name: str
+        Username, as in Microsoft Teams (e.g. `Last name, First name Middle names`).
+
+    Returns
+    -------
+    formatted_name: str
+        Formatted username.
+    """
     # TODO: add more languages, since this function only supports English and Portuguese.
+    formatted_name = USER_NAMES_CACHE.get(user_name)
+
+    if formatted_name is not None:
+        return formatted_name
 
     if "," in user_name:
-        last_name, name = user_name.split(",")
+        last_name, name = user_name.split(",", 1)
         formatted_name = name.strip() + " " + last_name.strip()
     else:
         formatted_name = user_name
 
-    formatted_name = formatted_name.upper()
+    formatted_name = " ".join(fold_accents(formatted_name).upper().split())
+    USER_NAMES_CACHE.set(user_name, formatted_name)
 
     return formatted_name
 
 
-def user_did_not_participate(user_actions: pd.Series, timestamps: pd.Series, start_time: str, end_time: str) -> bool:
-    event_date = timestamps.iloc[0].date()
-    event_start_time = pd.to_datetime(f"{event_date} {start_time}", infer_datetime_format=True, errors="coerce")
-    event_end_time = pd.to_datetime(f"{event_date} {end_time}", infer_datetime_format=True, errors="coerce")
-
-    left_before = True if user_actions.iloc[-1] == "Left" and timestamps.iloc[-1] < event_start_time else False
-    join_after = True if user_actions.iloc[-1] == "Joined" and timestamps.iloc[-1] > event_end_time else False
-    user_off_event = left_before or join_after
+def format_user_names(user_names: pd.Series) -> pd.Series:
+    """
+    Format usernames (see `format_user_name`), formatting each distinct username only once.
+
+    Parameters
+    ----------
+    user_names: pd.Series
+        Usernames.
+
+    Returns
+    -------
+    formatted_names: pd.Series
+        Formatted usernames, aligned with `user_names` (missing usernames are kept missing).
+    """
+    codes, uniques = pd.factorize(user_names)
+    formatted_uniques = np.array([format_user_name(user_name) for user_name in uniques] + [np.nan], dtype=object)
+    formatted_names = pd.Series(formatted_uniques[codes], index=user_names.index, name=user_names.name)
+
+    return formatted_names
+
+
+def drop_inactive_users(df: pd.DataFrame, sort_actions: bool = True) -> pd.DataFrame:
+    """
+    Drop users who left the meeting before it ended, i.e. users whose last action is not joining the meeting.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Users actions of a single meeting, with translated header and parsed timestamps.
+    sort_actions: bool
+        Sort users actions by timestamp before looking for the last action of each user. Disable it if the actions are
+        already sorted.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Actions of the users who were active when the attendance list was generated.
+    """
+    attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_action = attendance_list_settings['user_action']
+    col_timestamp = attendance_list_settings['timestamp']
 
-    return user_off_event
+    if sort_actions:
+        df = df.sort_values(by=[col_timestamp], kind="mergesort")
 
+    last_actions = df.groupby(col_name, sort=False)[col_action].last()
+    active_users = last_actions.index[last_actions.str.startswith("Joined")]
+    df = df[df[col_name].isin(active_users)]
 
-def coerce_time_slot(action_timestamp: datetime, start_time: str, end_time: str) -> datetime:
-    event_date = action_timestamp.date()
-    event_start_time = pd.to_datetime(f"{event_date} {start_time}", infer_datetime_format=True, errors="coerce")
-    event_end_time = pd.to_datetime(f"{event_date} {end_time}", infer_datetime_format=True, errors="coerce")
+    return df
 
-    if action_timestamp < event_start_time:
-        new_action_timestamp = event_start_time
-    elif action_timestamp > event_end_time:
-        new_action_timestamp = event_end_time
-    else:
-        new_action_timestamp = action_timestamp
 
-    return new_action_timestamp
+def normalize_attendance_list(df: pd.DataFrame, profiler: StageProfiler = None) -> pd.DataFrame:
+    """
+    Normalize the attendance list of a single meeting: translate the header and actions, convert usernames to upper
+    case and parse timestamps. Normalizing an already normalized attendance list has no effect, so normalized lists
+    can be cached (see `utils.load_csv`).
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Attendance list of a single meeting, as loaded from a CSV file.
+    profiler: StageProfiler
+        Stage-level profiler (optional).
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Normalized attendance list. Timestamps are kept unparsed if any of them is missing.
+    """
+    attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_timestamp = attendance_list_settings['timestamp']
 
+    signature = get_header_signature(df)
 
-def ignore_time_slot(action_timestamp: datetime, start_time: str, end_time: str) -> datetime:
-    event_date = action_timestamp.date()
-    event_start_time = pd.to_datetime(f"{event_date} {start_time}", infer_datetime_format=True, errors="coerce")
-    event_end_time = pd.to_datetime(f"{event_date} {end_time}", infer_datetime_format=True, errors="coerce")
+    with profile_stage(profiler, "translate", rows=len(df)):
+        df = translate_dataframe(df)
+        df[col_name] = df[col_name].str.upper()
 
-    new_action_timestamp = action_timestamp if event_start_time <= action_timestamp <= event_end_time else None
+    with profile_stage(profiler, "parse_timestamps", rows=len(df)):
+        if not df[col_timestamp].isnull().any():
+            df[col_timestamp] = parse_timestamps(df[col_timestamp], signature=signature)
 
-    return new_action_timestamp
+    return df
 
 
-def get_attendance_list(
-        df_list: [pd.DataFrame],
-        event_start_time: str = None,
-        event_end_time: str = None,
+def prepare_attendance_list(
+        df: pd.DataFrame,
         ignore_inactive_users: bool = True,
-        calculate_overall_uptime: bool = False
+        profiler: StageProfiler = None
 ) -> pd.DataFrame:
-    logging.info("Fetching the attendance list...")
+    """
+    Prepare the users actions of a single meeting: normalize the attendance list, sort actions by timestamp and
+    (optionally) ignore users who left the meeting before it ended.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Attendance list of a single meeting, as loaded from a CSV file (or normalized).
+    ignore_inactive_users: bool
+        Ignore users not present at the time the attendance list was generated.
+    profiler: StageProfiler
+        Stage-level profiler (optional).
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Users actions (name, action and timestamp).
+    """
+    attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_action = attendance_list_settings['user_action']
+    col_timestamp = attendance_list_settings['timestamp']
+
+    df = normalize_attendance_list(df, profiler=profiler)
+
+    # Timestamps are not parsed if any of them is missing:
+    if not pd.api.types.is_datetime64_any_dtype(df[col_timestamp]):
+        df[col_timestamp] = now()
+
+    with profile_stage(profiler, "sort_actions", rows=len(df)):
+        df = df.dropna(how="any").sort_values(by=[col_timestamp], kind="mergesort")
+
+    # Ignoring users who left the meeting before it ended:
+    if ignore_inactive_users:
+        with profile_stage(profiler, "drop_inactive_users", rows=len(df)) as record:
+            df = drop_inactive_users(df, sort_actions=False)
+            record['rows_kept'] = len(df)
+
+    df = df[[col_name, col_action, col_timestamp]]
+
+    return df
+
+
+def get_user_remap(users: [str], min_similarity: float) -> dict:
+    """
+    Map usernames to the most similar (and longer) usernames, to ensure that users who sign in through different
+    Teams accounts that possibly have different names, are identified as being the same user.
+
+    Parameters
+    ----------
+    users: [str]
+        Distinct usernames.
+    min_similarity: float
+        Minimum similarity between usernames to consider that they are the same user.
+
+    Returns
+    -------
+    user_remap: dict
+        Username of each user.
+    """
+    # Usernames already seen are identified by the persistent alias store (see `aliases.AliasStore`), if enabled:
+    if (get_settings()['system'].get('aliases') or {}).get('enabled'):
+        return get_alias_store().get_user_remap(users, min_similarity=min_similarity)
+
+    all_users = sorted(users, key=len, reverse=True)
+    users_index = StringIndex(fuzzy_method=FUZZY_METHOD)
+    user_remap = {}
+
+    for user in all_users:
+        match, similarity = users_index.find(user, min_similarity=min_similarity)
+        user_remap[user] = match if match and similarity >= min_similarity else user
+        users_index.add(user)
+
+    return user_remap
+
+
+def get_event_timestamps(dates: pd.Series, time: str) -> pd.Series:
+    """
+    Get the event timestamps of each event date at a given time, parsing each distinct date only once.
+
+    Parameters
+    ----------
+    dates: pd.Series
+        Event dates.
+    time: str
+        Event time (`HH:mm`).
+
+    Returns
+    -------
+    timestamps: pd.Series
+        Event timestamps, aligned with `dates`.
+    """
+    unique_dates = pd.unique(dates)
+    unique_timestamps = pd.to_datetime(
+        [f"{date} {time}" for date in unique_dates], infer_datetime_format=True, errors="coerce"
+    )
+    timestamps = pd.Series(unique_timestamps, index=unique_dates).reindex(dates.to_numpy()).to_numpy()
+    timestamps = pd.Series(timestamps, index=dates.index)
+
+    return timestamps
+
+
+def get_event_time_slots(dates: pd.Series, start_time: str, end_time: str) -> (pd.Series, pd.Series):
+    event_start_times = get_event_timestamps(dates, start_time)
+    event_end_times = get_event_timestamps(dates, end_time)
+
+    return event_start_times, event_end_times
+
+
+def encode_user_actions(actions: pd.Series) -> (np.ndarray, np.ndarray):
+    """
+    Encode users actions as small integers (see `USER_ACTIONS`).
+
+    Parameters
+    ----------
+    actions: pd.Series
+        Translated users actions.
+
+    Returns
+    -------
+    codes: np.ndarray
+        Code of each action (index into `table`).
+    table: np.ndarray
+        Actions table: `USER_ACTIONS`, followed by any action not translated.
+    """
+    extra_actions = [action for action in pd.unique(actions) if pd.notnull(action) and action not in USER_ACTIONS]
+    table = np.array(USER_ACTIONS + tuple(extra_actions), dtype=object)
+    codes = pd.Categorical(actions, categories=table).codes
+
+    return codes, table
+
+
+def encode_timestamps(timestamps: pd.Series) -> np.ndarray:
+    return timestamps.to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def decode_timestamps(timestamps: np.ndarray) -> np.ndarray:
+    return timestamps.view("datetime64[ns]")
+
+
+def user_did_not_participate(
+        last_actions: np.ndarray,
+        last_timestamps: np.ndarray,
+        event_start_times: np.ndarray,
+        event_end_times: np.ndarray
+) -> np.ndarray:
+    # Actions encoded by `encode_user_actions` and timestamps by `encode_timestamps` (missing event times never match):
+    left_before = (last_actions == LEFT) & (last_timestamps < event_start_times)
+    join_after = (last_actions == JOINED) & (event_end_times != NAT) & (last_timestamps > event_end_times)
+    users_off_event = left_before | join_after
+
+    return users_off_event
+
+
+def coerce_time_slot(timestamps: np.ndarray, event_start_times: np.ndarray, event_end_times: np.ndarray) -> np.ndarray:
+    before_start = timestamps < event_start_times
+    after_end = ~before_start & (event_end_times != NAT) & (timestamps > event_end_times)
+    new_timestamps = np.where(before_start, event_start_times, np.where(after_end, event_end_times, timestamps))
+
+    return new_timestamps
+
+
+def ignore_time_slot(timestamps: np.ndarray, event_start_times: np.ndarray, event_end_times: np.ndarray) -> np.ndarray:
+    in_time_slot = (event_start_times != NAT) & (event_start_times <= timestamps) & (timestamps <= event_end_times)
+    new_timestamps = np.where(in_time_slot, timestamps, NAT)
+
+    return new_timestamps
+
+
+def timedelta_seconds(timedeltas: np.ndarray) -> np.ndarray:
+    """
+    Vectorized equivalent of `datetime.timedelta.seconds` for nanosecond-based timedeltas.
+
+    Parameters
+    ----------
+    timedeltas: np.ndarray
+        Timedeltas as 64-bit integer nanoseconds.
+
+    Returns
+    -------
+    seconds: np.ndarray
+        Seconds component of the timedeltas, in range [0,86400), ignoring days (just like `timedelta.seconds`).
+    """
+    seconds = (timedeltas // 10 ** 9) % 86400
+
+    return seconds
+
+
+def pair_sessions(group_ids: np.ndarray, is_left: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+    """
+    Pair "Joined" and "Left" actions into sessions in a single vectorized pass.
+
+    Actions are paired within each (user, date) group following the rows order: a session is opened by the first
+    action after a closed session and closed by the next "Left" action.
+
+    Parameters
+    ----------
+    group_ids: np.ndarray
+        (User, date) group of each action, as integers.
+    is_left: np.ndarray
+        Whether each action is "Left".
+
+    Returns
+    -------
+    order: np.ndarray
+        Rows sorted by group, keeping the original rows order within each group (the other arrays follow it).
+    groups: np.ndarray
+        Group of each sorted row, as consecutive integers.
+    closes_session: np.ndarray
+        Whether each sorted row closes a session.
+    session_starts: np.ndarray
+        Sorted row that opened the session of each sorted row.
+    """
+    # Sorting rows by (user, date) group, keeping the original rows order within each group:
+    order = np.argsort(group_ids, kind="stable")
+    groups = pd.factorize(group_ids[order])[0]
+    is_left = is_left[order]
+    group_start = np.r_[True, groups[1:] != groups[:-1]]
+
+    # A "Left" action closes the current session if it is open, otherwise it opens a new (empty) session. Since any
+    # other action keeps an open session open, consecutive "Left" actions alternate between closing and opening:
+    positions = np.arange(len(order))
+    left_run_start = is_left & (group_start | ~np.r_[False, is_left[:-1]])
+    left_run_first = np.maximum.accumulate(np.where(left_run_start, positions, 0))
+    left_run_offset = positions - left_run_first
+    session_open_before_run = ~group_start[left_run_first]
+    closes_session = is_left & np.where(session_open_before_run, left_run_offset % 2 == 0, left_run_offset % 2 == 1)
+    opens_session = np.where(is_left, ~closes_session, group_start | np.r_[False, closes_session[:-1]])
+
+    # Each group starts with a session opener, so looking back for the last opener never crosses groups:
+    session_starts = np.maximum.accumulate(np.where(opens_session, positions, 0))
+
+    return order, groups, closes_session, session_starts
+
+
+def calculate_uptime(
+        group_ids: np.ndarray,
+        is_left: np.ndarray,
+        timestamps: np.ndarray,
+        end_timestamps: np.ndarray
+) -> np.ndarray:
+    """
+    Calculate the users' uptime (in minutes) per event date, pairing "Joined" and "Left" actions in a single
+    vectorized pass (see `pair_sessions`).
+
+    A session still open after the last action lasts until the last action, and users whose last action is not "Left"
+    are considered online until the event end. The uptime is rounded up to the next minute.
+
+    Parameters
+    ----------
+    group_ids: np.ndarray
+        (User, date) group of each action, as integers.
+    is_left: np.ndarray
+        Whether each action is "Left".
+    timestamps: np.ndarray
+        Timestamp of each action (see `encode_timestamps`).
+    end_timestamps: np.ndarray
+        Event end timestamp of the date of each action (see `encode_timestamps`).
+
+    Returns
+    -------
+    uptime: np.ndarray
+        Uptime (in minutes) of the (user, date) group of each action.
+    """
+    if not len(group_ids):
+        return np.zeros(0, dtype="int64")
+
+    order, group_ids, closes_session, session_starts = pair_sessions(group_ids, is_left)
+    is_left = is_left[order]
+    timestamps = timestamps[order]
+    end_timestamps = end_timestamps[order]
+    group_end = np.r_[group_ids[1:] != group_ids[:-1], True]
+
+    elapsed = timedelta_seconds(timestamps - timestamps[session_starts])
+    duration_sec = np.where(closes_session, elapsed, 0)
+
+    # Sessions still open after the group's last action:
+    duration_sec += np.where(group_end & ~closes_session, elapsed, 0)
+
+    # Users whose last action is not "Left" remain online until the event end:
+    duration_sec += np.where(group_end & ~is_left, timedelta_seconds(end_timestamps - timestamps), 0)
+
+    group_duration_sec = np.bincount(group_ids, weights=duration_sec)
+    group_duration = np.ceil(group_duration_sec / 60).astype("int64")
+
+    uptime = np.empty(len(order), dtype="int64")
+    uptime[order] = group_duration[group_ids]
+
+    return uptime
+
+
+def get_sessions(
+        group_ids: np.ndarray,
+        is_left: np.ndarray,
+        timestamps: np.ndarray,
+        end_timestamps: np.ndarray
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Get the users' sessions (online intervals) per event date, pairing actions just like `calculate_uptime`.
+
+    Parameters
+    ----------
+    group_ids: np.ndarray
+        (User, date) group of each action, as integers.
+    is_left: np.ndarray
+        Whether each action is "Left".
+    timestamps: np.ndarray
+        Timestamp of each action (see `encode_timestamps`).
+    end_timestamps: np.ndarray
+        Event end timestamp of the date of each action (see `encode_timestamps`).
+
+    Returns
+    -------
+    groups: np.ndarray
+        (User, date) group of each session (as in `group_ids`).
+    starts: np.ndarray
+        Start timestamp of each session.
+    ends: np.ndarray
+        End timestamp of each session (excluded). Empty sessions are not returned.
+    """
+    if not len(group_ids):
+        return np.zeros(0, dtype="int64"), np.zeros(0, dtype="int64"), np.zeros(0, dtype="int64")
+
+    order, groups, closes_session, session_starts = pair_sessions(group_ids, is_left)
+    group_ids = group_ids[order]
+    is_left = is_left[order]
+    timestamps = timestamps[order]
+    end_timestamps = end_timestamps[order]
+    group_end = np.r_[groups[1:] != groups[:-1], True]
+
+    # Closed sessions, sessions still open after the group's last action, and users whose last action is not "Left"
+    # (who remain online until the event end):
+    closed = closes_session | group_end
+    online = group_end & ~is_left
+    groups = np.r_[group_ids[closed], group_ids[online]]
+    starts = np.r_[timestamps[session_starts[closed]], timestamps[online]]
+    ends = np.r_[timestamps[closed], end_timestamps[online]]
+    non_empty = ends > starts
+
+    return groups[non_empty], starts[non_empty], ends[non_empty]
+
+
+def get_users_uptime(
+        df: pd.DataFrame,
+        event_start_time: str,
+        event_end_time: str,
+        user_remap: dict = None,
+        profiler: StageProfiler = None
+) -> pd.DataFrame:
+    """
+    Calculate the users' uptime per event date from the users actions of one or more meetings.
+
+    Internally, usernames are encoded as codes into a usernames table (so that they are formatted and validated only
+    once), actions as small integers (see `encode_user_actions`) and timestamps and dates as 64-bit integers; they are
+    decoded only when the result is returned.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Users actions (see `prepare_attendance_list`), following the meetings order.
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    user_remap: dict
+        Username of each (formatted) username. If not defined and usernames are validated (see settings), it is
+        computed from the users actions.
+    profiler: StageProfiler
+        Stage-level profiler (optional).
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Users actions (name, action, timestamp and date) kept for calculating the uptime, and the uptime (in minutes)
+        of the user on the action's date.
+    """
     settings = get_settings()
     system_settings = settings['system']
     format_names = system_settings['format_user_names']
@@ -130,153 +616,956 @@ def get_attendance_list(
     check_user_name_similarity = event_settings['check_user_name_similarity']
     check_time_slot = event_settings['check_time_slot']
 
+    attendance_list_settings = settings['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_action = attendance_list_settings['user_action']
+    col_timestamp = attendance_list_settings['timestamp']
+    col_date = attendance_list_settings['date']
+    col_duration = attendance_list_settings['duration']
+
+    # Rows missing any user action value are not used (see `pd.DataFrame.dropna`):
+    df = df.dropna(subset=[col_name, col_action, col_timestamp])
+
+    # Encoding users actions (tables follow the order of appearance):
+    name_codes, names = pd.factorize(df[col_name])
+    names = np.asarray(names, dtype=object)
+    action_codes, actions = encode_user_actions(df[col_action])
+    timestamps = encode_timestamps(df[col_timestamp])
+    date_codes, days = pd.factorize(timestamps // DAY)
+    dates = pd.Series(pd.to_datetime(np.asarray(days) * DAY).date)
+
+    if format_names:
+        with profile_stage(profiler, "format_user_names", rows=len(df), users=len(names)):
+            names = np.array([format_user_name(name) for name in names], dtype=object)
+
+    # Validating usernames, to ensure that users who sign in through different Teams accounts that possibly have
+    # different names, are identified as being the same user:
+    if user_remap is not None:
+        names = np.array([user_remap.get(name, name) for name in names], dtype=object)
+    elif check_user_name:
+        with profile_stage(profiler, "get_user_remap", rows=len(df)) as record:
+            users = list(dict.fromkeys(names))
+            user_remap = get_user_remap(users, min_similarity=check_user_name_similarity)
+            names = np.array([user_remap[name] for name in names], dtype=object)
+            record['users'] = len(users)
+            record['users_kept'] = len(set(user_remap.values()))
+
+    # Usernames that became the same username share the same code:
+    table_codes, names = pd.factorize(names)
+    name_codes = table_codes[name_codes]
+    names = np.asarray(names, dtype=object)
+    group_ids = pd.factorize(date_codes.astype("int64") * len(names) + name_codes)[0]
+
+    # Validating users actions regarding the events' time slot. If the user left before the event started,
+    # ignore their actions; otherwise, adjust the input/output timestamps to the event's previous defined time slot:
+    if check_time_slot:
+        with profile_stage(profiler, "check_time_slot", rows=len(df)):
+            event_start_times, event_end_times = get_event_time_slots(dates, event_start_time, event_end_time)
+            event_start_times = encode_timestamps(event_start_times)[date_codes]
+            event_end_times = encode_timestamps(event_end_times)[date_codes]
+
+            # Last action of each (date, user) group (group ids are consecutive, in order of appearance):
+            _, last_rows = np.unique(group_ids[::-1], return_index=True)
+            last_rows = (len(group_ids) - 1 - last_rows)[group_ids]
+            users_off_event = user_did_not_participate(
+                last_actions=action_codes[last_rows],
+                last_timestamps=timestamps[last_rows],
+                event_start_times=event_start_times,
+                event_end_times=event_end_times
+            )
+
+            # Checking if the last user action is in the event time slot, otherwise, ignore it:
+            timestamps = np.where(
+                users_off_event,
+                ignore_time_slot(timestamps, event_start_times, event_end_times),
+                coerce_time_slot(timestamps, event_start_times, event_end_times)
+            )
+
+    # Dropping ignored actions and duplicate actions, keeping the first occurrence:
+    with profile_stage(profiler, "drop_duplicates", rows=len(df)) as record:
+        keep = (timestamps != NAT) & df.notnull().all(axis=1).to_numpy()
+        rows = np.flatnonzero(keep)
+        duplicates = pd.DataFrame({'name': name_codes[rows], 'timestamp': timestamps[rows]}).duplicated(keep="first")
+        keep[rows[duplicates.to_numpy()]] = False
+        rows = np.flatnonzero(keep)
+        record['rows_kept'] = len(rows)
+
+    with profile_stage(profiler, "calculate_uptime", rows=len(rows)) as record:
+        end_timestamps = encode_timestamps(get_event_timestamps(dates, event_end_time))[date_codes[rows]]
+        uptime = calculate_uptime(
+            group_ids=group_ids[rows],
+            is_left=action_codes[rows] == LEFT,
+            timestamps=timestamps[rows],
+            end_timestamps=end_timestamps
+        )
+        record['users'] = len(np.unique(name_codes[rows]))
+
+    # Decoding users actions:
+    df = df.iloc[rows].copy()
+    df[col_name] = names[name_codes[rows]]
+    df[col_action] = actions[action_codes[rows]]
+    df[col_timestamp] = decode_timestamps(timestamps[rows])
+    df[col_date] = dates.to_numpy()[date_codes[rows]]
+    df[col_duration] = uptime
+
+    return df
+
+
+def summarize_attendance_list(
+        df: pd.DataFrame,
+        calculate_overall_uptime: bool = False,
+        profiler: StageProfiler = None
+) -> pd.DataFrame:
+    """
+    Summarize the users' uptime into the attendance list.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Users actions and uptime (see `get_users_uptime`).
+    calculate_overall_uptime: bool
+        Calculate overall uptime per user (useful for multiple events).
+    profiler: StageProfiler
+        Stage-level profiler (optional).
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Attendance list: uptime per user and date, sorted by date and uptime; or overall attendance and uptime per
+        user, sorted by attendance and uptime.
+    """
+    attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_date = attendance_list_settings['date']
+    col_duration = attendance_list_settings['duration']
+    col_attendance = attendance_list_settings['attendance']
+
+    with profile_stage(profiler, "summarize", rows=len(df)) as record:
+        if calculate_overall_uptime:
+            user_durations = df.groupby(col_name, sort=False)[col_duration]
+            df[col_attendance] = user_durations.transform("count")
+            df[col_duration] = user_durations.transform("sum")
+
+            df = df[[col_name, col_attendance, col_duration]].drop_duplicates()
+            df[col_attendance] = df[col_attendance].astype(df[col_duration].iloc[0].dtype)
+            df = df.sort_values(by=[col_attendance, col_duration], ascending=False).reset_index(drop=True)
+        else:
+            df = df[[col_name, col_date, col_duration]].drop_duplicates()
+            df = df.sort_values(by=[col_date, col_duration], ascending=False).reset_index(drop=True)
+
+        record['users'] = df[col_name].nunique()
+
+    return df
+
+
+def get_attendance_list(
+        df_list: [pd.DataFrame],
+        event_start_time: str = None,
+        event_end_time: str = None,
+        ignore_inactive_users: bool = True,
+        calculate_overall_uptime: bool = False,
+        profiler: StageProfiler = None
+) -> pd.DataFrame:
+    logging.info("Fetching the attendance list...")
+    event_settings = get_settings()['spreadsheets']['event']
+
     if not event_start_time:
         event_start_time = event_settings['start_time']
 
     if not event_end_time:
         event_end_time = event_settings['end_time']
 
+    attendance_list = []
+
+    # Iterating over list of dataframes:
+    for df in df_list:
+        attendance_list.append(
+            prepare_attendance_list(df, ignore_inactive_users=ignore_inactive_users, profiler=profiler)
+        )
+
+    df = pd.concat(attendance_list)
+    df = get_users_uptime(df, event_start_time=event_start_time, event_end_time=event_end_time, profiler=profiler)
+    df = summarize_attendance_list(df, calculate_overall_uptime=calculate_overall_uptime, profiler=profiler)
+
+    return df
+
+
+def merge_sessions(
+        groups: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Merge the overlapping (or adjacent) sessions of each group, e.g. of a user who attended overlapping meetings, so
+    that users are counted only once at any time.
+
+    Parameters
+    ----------
+    groups: np.ndarray
+        Group of each session.
+    starts: np.ndarray
+        Start timestamp of each session.
+    ends: np.ndarray
+        End timestamp of each session (excluded).
+
+    Returns
+    -------
+    groups: np.ndarray
+        Group of each merged session, sorted by group and start timestamp.
+    starts: np.ndarray
+        Start timestamp of each merged session.
+    ends: np.ndarray
+        End timestamp of each merged session (excluded).
+    """
+    if not len(groups):
+        return groups, starts, ends
+
+    order = np.lexsort((starts, groups))
+    groups, starts, ends = groups[order], starts[order], ends[order]
+
+    # A session starts a new merged session if it starts after every previous session of its group has ended:
+    previous_ends = np.r_[NAT, pd.Series(ends).groupby(groups).cummax().to_numpy()[:-1]]
+    first_sessions = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]] | (starts > previous_ends))
+
+    return groups[first_sessions], starts[first_sessions], np.maximum.reduceat(ends, first_sessions)
+
+
+def get_headcount(
+        starts: np.ndarray,
+        ends: np.ndarray,
+        timestamps: np.ndarray,
+        window: int = MINUTE
+) -> (np.ndarray, np.ndarray):
+    """
+    Count the concurrent sessions at given timestamps with a sweep line over the sorted sessions starts and ends
+    (O(N log N) for N sessions), instead of checking every session at every timestamp.
+
+    Parameters
+    ----------
+    starts: np.ndarray
+        Start timestamp of each session.
+    ends: np.ndarray
+        End timestamp of each session (excluded).
+    timestamps: np.ndarray
+        Sorted timestamps (see `encode_timestamps`).
+    window: int
+        Window after each timestamp (in nanoseconds) to find the peak of concurrent sessions.
+
+    Returns
+    -------
+    headcount: np.ndarray
+        Concurrent sessions at each timestamp.
+    peak: np.ndarray
+        Maximum concurrent sessions within the window after each timestamp.
+    """
+    # Sessions ends are swept before starts at the same time, since sessions do not include their end:
+    times = np.r_[starts, ends]
+    deltas = np.r_[np.ones(len(starts), dtype="int64"), -np.ones(len(ends), dtype="int64")]
+    order = np.lexsort((deltas, times))
+    times = times[order]
+    counts = np.r_[np.cumsum(deltas[order]), 0]
+
+    positions = np.searchsorted(times, timestamps, side="right")
+    window_ends = np.searchsorted(times, timestamps + window, side="left")
+    headcount = np.where(positions > 0, counts[positions - 1], 0)
+
+    # Maximum count after the sweep events within each window (if any):
+    window_peaks = np.maximum.reduceat(counts, np.c_[positions, window_ends].ravel())[::2]
+    peak = np.where(window_ends > positions, np.maximum(headcount, window_peaks), headcount)
+
+    return headcount, peak
+
+
+def get_attendance_timeline(
+        df_list: [pd.DataFrame],
+        event_start_time: str = None,
+        event_end_time: str = None,
+        ignore_inactive_users: bool = True,
+        min_presence: float = None,
+        profiler: StageProfiler = None
+) -> (pd.DataFrame, pd.DataFrame):
+    """
+    Get the attendance timeline of every event date at once: the headcount per minute of the event time slot and the
+    presence of each user, built from the users' sessions (paired "Joined" and "Left" actions, see `get_sessions`).
+
+    Parameters
+    ----------
+    df_list: [pd.DataFrame]
+        Attendance lists of the meetings.
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    ignore_inactive_users: bool
+        Ignore users not present at the time the attendance list was generated.
+    min_presence: float
+        Minimum fraction of the event time slot attended to consider that a user was present, in range [0,1]. If not
+        defined, uses the application settings.
+    profiler: StageProfiler
+        Stage-level profiler (optional).
+
+    Returns
+    -------
+    df_timeline: pd.DataFrame
+        Attendees online at the start of each minute of the event time slot, and peak of concurrent attendees within
+        the minute, per date.
+    df_presence: pd.DataFrame
+        Uptime, presence (percentage of the event time slot attended) and whether each user was present, per user
+        and date, sorted by date and presence.
+    """
+    logging.info("Fetching the attendance timeline...")
+    settings = get_settings()
+    event_settings = settings['spreadsheets']['event']
+    timeline_settings = settings['spreadsheets']['operations'].get('attendance_timeline') or {}
+    event_start_time = event_start_time or event_settings['start_time']
+    event_end_time = event_end_time or event_settings['end_time']
+    min_presence = timeline_settings.get('min_presence', 0.75) if min_presence is None else min_presence
+
+    assert 0 <= min_presence <= 1, "the minimum presence must be in range [0,1]."
+
     attendance_list_settings = settings['spreadsheets']['attendance_list']
     col_name = attendance_list_settings['user_name']
     col_action = attendance_list_settings['user_action']
     col_timestamp = attendance_list_settings['timestamp']
     col_date = attendance_list_settings['date']
     col_duration = attendance_list_settings['duration']
+    col_attendees = attendance_list_settings['attendees']
+    col_peak_attendees = attendance_list_settings['peak_attendees']
+    col_presence = attendance_list_settings['presence']
+    col_present = attendance_list_settings['present']
+
+    df = pd.concat([
+        prepare_attendance_list(df, ignore_inactive_users=ignore_inactive_users, profiler=profiler) for df in df_list
+    ])
+    df = get_users_uptime(df, event_start_time=event_start_time, event_end_time=event_end_time, profiler=profiler)
+
+    with profile_stage(profiler, "attendance_timeline", rows=len(df)) as record:
+        # Users actions are encoded once for every date (groups follow the order of appearance):
+        group_ids = df.groupby([col_name, col_date], sort=False).ngroup().to_numpy()
+        df_presence = df[[col_name, col_date, col_duration]].drop_duplicates(subset=[col_name, col_date])
+        date_codes, dates = pd.factorize(df[col_date], sort=True)
+        slot_starts = encode_timestamps(get_event_timestamps(pd.Series(dates, dtype=object), event_start_time))
+        slot_ends = encode_timestamps(get_event_timestamps(pd.Series(dates, dtype=object), event_end_time))
+        slot_lengths = np.maximum(slot_ends - slot_starts, 0)
+
+        groups, starts, ends = merge_sessions(*get_sessions(
+            group_ids=group_ids,
+            is_left=(df[col_action] == USER_ACTIONS[LEFT]).to_numpy(),
+            timestamps=encode_timestamps(df[col_timestamp]),
+            end_timestamps=slot_ends[date_codes]
+        ))
+
+        # Presence: time attended within the event time slot of each date:
+        group_dates = np.zeros(len(df_presence), dtype="int64")
+        group_dates[group_ids] = date_codes
+        session_dates = group_dates[groups]
+        attended = np.minimum(ends, slot_ends[session_dates]) - np.maximum(starts, slot_starts[session_dates])
+        attended = np.bincount(groups, weights=np.maximum(attended, 0), minlength=len(df_presence))
+        presence = np.divide(
+            attended, slot_lengths[group_dates],
+            out=np.zeros(len(df_presence)), where=slot_lengths[group_dates] > 0
+        )
+
+        # Timeline: one timestamp per minute of the event time slot of each date (sessions never cross dates):
+        minutes = slot_lengths // MINUTE
+        timeline_dates = np.repeat(np.arange(len(dates)), minutes)
+        offsets = np.arange(len(timeline_dates)) - np.repeat(np.cumsum(minutes) - minutes, minutes)
+        timeline = slot_starts[timeline_dates] + offsets * MINUTE
+        attendees, peak_attendees = get_headcount(starts, ends, timeline)
+        record['dates'] = len(dates)
+        record['sessions'] = len(starts)
+
+    df_timeline = pd.DataFrame({
+        col_date: np.asarray(dates, dtype=object)[timeline_dates],
+        col_timestamp: decode_timestamps(timeline),
+        col_attendees: attendees,
+        col_peak_attendees: peak_attendees
+    })
+    df_presence[col_presence] = np.round(presence * 100, 1)
+    df_presence[col_present] = presence >= min_presence
+    df_presence = df_presence.sort_values(by=[col_date, col_presence], ascending=False, kind="stable")
+    df_presence = df_presence.reset_index(drop=True)
+
+    return df_timeline, df_presence
+
+
+def reduce_attendance_list(df: pd.DataFrame, calculate_overall_uptime: bool = False) -> pd.DataFrame:
+    """
+    Merge partial attendance lists (e.g. from `AttendanceAggregator` or `get_partial_attendance_list`) into the
+    attendance list, just like `summarize_attendance_list`.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Uptime per user and date, along with the position of its first action (among all users actions, so that users
+        and dates follow the same order as in `get_attendance_list`) and its number of actions (`position` and `rows`
+        columns).
+    calculate_overall_uptime: bool
+        Calculate overall uptime per user.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Attendance list.
+    """
+    attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_date = attendance_list_settings['date']
+    col_duration = attendance_list_settings['duration']
     col_attendance = attendance_list_settings['attendance']
-    attendance_list = []
 
-    # Iterating over list of dataframes:
-    for df in df_list:
-        df = translate_dataframe(df)
-        df[col_name] = df[col_name].str.upper()
+    df = df.sort_values(by="position", kind="stable")
+    df[col_duration] = df[col_duration].astype("int64")
 
-        if not df[col_timestamp].isnull().any():
-            df[col_timestamp] = pd.to_datetime(df[col_timestamp], infer_datetime_format=True, errors="coerce")
-        else:
-            df[col_timestamp] = now()
+    # Overall uptime and attendance are summed over users actions (see `summarize_attendance_list`):
+    if calculate_overall_uptime:
+        df[col_duration] *= df["rows"]
+        df = df.groupby(col_name, sort=False).agg(**{
+            col_attendance: ("rows", "sum"),
+            col_duration: (col_duration, "sum")
+        }).reset_index()
+        df[col_attendance] = df[col_attendance].astype(df[col_duration].dtype)
+        df = df.sort_values(by=[col_attendance, col_duration], ascending=False).reset_index(drop=True)
+    else:
+        df = df[[col_name, col_date, col_duration]]
+        df = df.sort_values(by=[col_date, col_duration], ascending=False).reset_index(drop=True)
 
-        df = df.dropna(how="any").sort_values(by=[col_timestamp])
-        users = df[col_name].unique().tolist()
-        active_users = []
+    return df
 
-        # Ignoring users who left the meeting before it ended:
-        if ignore_inactive_users:
-            for user in users:
-                user_actions = df[df[col_name] == user][col_action].tolist()
-                last_user_action = user_actions[-1]
 
-                if last_user_action.startswith("Joined"):
-                    active_users.append(user)
+class AttendanceAggregator:
+    """
+    Incremental attendance list, aggregating users actions (name, action, timestamp and date) by (user, date) as they
+    arrive, chunk by chunk, so that memory grows with the number of (user, date) groups instead of the number of
+    actions: each group only keeps its last action, its open session and its uptime so far (as arrays indexed by group,
+    updated by vectorized operations on each chunk).
+
+    Actions must arrive in the same order `get_attendance_list` processes them (meetings in order, with actions
+    sorted by timestamp), with formatted and remapped usernames. Since the time slot validation of each (user, date)
+    depends on its last action, both outcomes (adjusted or ignored timestamps) are tracked until the end.
+
+    Duplicate actions (same user and timestamp) of a meeting are consecutive (actions are sorted by timestamp, even
+    when adjusted to the time slot), so they are detected against the last action kept in each group. Actions repeated
+    by different meetings of the same date (e.g. a meeting exported twice) are not, so the timestamps kept by the
+    groups of `shared_dates` are also tracked (only these groups keep memory proportional to their actions).
+
+    Parameters
+    ----------
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    check_time_slot: bool
+        Validate users actions regarding the events' time slot.
+    shared_dates: set
+        Event dates of more than one meeting.
+    """
+    COERCED, IGNORED = 0, 1
+
+    # State of each group (and its default value), for each variant of its timestamps (adjusted or ignored):
+    SESSIONS_STATE = {
+        'position': -1,  # Position of the first action kept.
+        'rows': 0,  # Number of actions kept.
+        'duration': 0,  # Duration of the closed sessions (in seconds).
+        'open': False,  # Whether a session is open.
+        'open_timestamp': NAT,  # Timestamp of the action that opened the session.
+        'last_timestamp': NAT,  # Timestamp of the last action kept.
+        'last_left': False  # Whether the last action kept is "Left".
+    }
+
+    def __init__(
+            self,
+            event_start_time: str,
+            event_end_time: str,
+            check_time_slot: bool = True,
+            shared_dates: set = None
+    ):
+        self.event_start_time = event_start_time
+        self.event_end_time = event_end_time
+        self.check_time_slot = check_time_slot
+        self.shared_dates = set(shared_dates or ())
+        self.groups = {}
+        self.keys = []
+        self.time_slots = {}
+        self.position = 0
+
+        self.start_times = np.zeros(0, dtype="int64")
+        self.end_times = np.zeros(0, dtype="int64")
+        self.last_actions = np.zeros(0, dtype=object)
+        self.last_timestamps = np.zeros(0, dtype="int64")
+        self.shared = np.zeros(0, dtype=bool)
+        self.sessions = [
+            {key: np.full(0, value) for key, value in self.SESSIONS_STATE.items()}
+            for _ in range(2 if check_time_slot else 1)
+        ]
+        # (Group, timestamp) of the actions kept by the groups of shared dates, for each variant of their timestamps:
+        self.kept_actions = [set() for _ in self.sessions]
+
+    def _get_time_slot(self, date: object) -> (int, int):
+        if date not in self.time_slots:
+            dates = pd.Series([date])
+            time_slot = []
+
+            for time in (self.event_start_time, self.event_end_time):
+                timestamp = get_event_timestamps(dates, time).iloc[0]
+                time_slot.append(NAT if pd.isnull(timestamp) else timestamp.value)
+
+            self.time_slots[date] = tuple(time_slot)
+
+        return self.time_slots[date]
+
+    def _get_group_ids(self, names: np.ndarray, dates: np.ndarray) -> np.ndarray:
+        # Only the distinct (user, date) pairs of the chunk are looked up (and new groups added):
+        name_codes, unique_names = pd.factorize(names)
+        date_codes, unique_dates = pd.factorize(dates)
+        pair_codes, unique_pairs = pd.factorize(name_codes.astype("int64") * len(unique_dates) + date_codes)
+        unique_names, unique_dates = np.asarray(unique_names, dtype=object), np.asarray(unique_dates, dtype=object)
+        new_keys = []
+        group_ids = np.empty(len(unique_pairs), dtype="int64")
+
+        for i, pair in enumerate(unique_pairs.tolist()):
+            key = (unique_names[pair // len(unique_dates)], unique_dates[pair % len(unique_dates)])
+            group_id = self.groups.get(key)
+
+            if group_id is None:
+                group_id = self.groups[key] = len(self.keys)
+                self.keys.append(key)
+                new_keys.append(key)
+
+            group_ids[i] = group_id
+
+        if new_keys:
+            time_slots = np.array([self._get_time_slot(date) for _, date in new_keys], dtype="int64")
+            self.start_times = np.r_[self.start_times, time_slots[:, 0]]
+            self.end_times = np.r_[self.end_times, time_slots[:, 1]]
+            self.last_actions = np.r_[self.last_actions, np.full(len(new_keys), None, dtype=object)]
+            self.last_timestamps = np.r_[self.last_timestamps, np.full(len(new_keys), NAT)]
+            self.shared = np.r_[self.shared, [date in self.shared_dates for _, date in new_keys]].astype(bool)
+
+            for sessions in self.sessions:
+                for key, value in self.SESSIONS_STATE.items():
+                    sessions[key] = np.r_[sessions[key], np.full(len(new_keys), value)]
+
+        return group_ids[pair_codes]
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Aggregate a chunk of users actions.
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Users actions, with formatted and remapped usernames, parsed timestamps and event dates.
+        """
+        if df.empty:
+            return
+
+        attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+        actions = df[attendance_list_settings['user_action']].to_numpy(dtype=object)
+        timestamps = df[attendance_list_settings['timestamp']].to_numpy(dtype="datetime64[ns]").view("int64")
+        group_ids = self._get_group_ids(
+            df[attendance_list_settings['user_name']].to_numpy(dtype=object),
+            df[attendance_list_settings['date']].to_numpy(dtype=object)
+        )
+        positions = self.position + np.arange(len(df))
+        self.position += len(df)
+
+        # Last action of each group:
+        last_groups, last_rows = np.unique(group_ids[::-1], return_index=True)
+        last_rows = len(group_ids) - 1 - last_rows
+        self.last_actions[last_groups] = actions[last_rows]
+        self.last_timestamps[last_groups] = timestamps[last_rows]
+
+        is_left = actions == "Left"
+
+        if self.check_time_slot:
+            start_times, end_times = self.start_times[group_ids], self.end_times[group_ids]
+            variants = (
+                coerce_time_slot(timestamps, start_times, end_times),
+                ignore_time_slot(timestamps, start_times, end_times)
+            )
         else:
-            active_users = users
+            variants = (timestamps,)
+
+        for sessions, kept_actions, variant_timestamps in zip(self.sessions, self.kept_actions, variants):
+            self._add_actions(sessions, kept_actions, self.shared, group_ids, is_left, variant_timestamps, positions)
+
+    @staticmethod
+    def _add_actions(
+            sessions: dict,
+            kept_actions: set,
+            shared: np.ndarray,
+            group_ids: np.ndarray,
+            is_left: np.ndarray,
+            timestamps: np.ndarray,
+            positions: np.ndarray
+    ) -> None:
+        # Ignoring actions out of the time slot, then sorting actions by group (keeping their order):
+        rows = np.flatnonzero(timestamps != NAT)
+        rows = rows[np.argsort(group_ids[rows], kind="stable")]
+        group_ids, is_left, timestamps, positions = group_ids[rows], is_left[rows], timestamps[rows], positions[rows]
+
+        # Ignoring duplicate actions (same timestamp as the previous action of the group or, for groups of shared
+        # dates, as any action kept by the group):
+        group_start = np.r_[True, group_ids[1:] != group_ids[:-1]]
+        previous_timestamps = np.where(group_start, sessions['last_timestamp'][group_ids], np.r_[NAT, timestamps[:-1]])
+        is_unique = timestamps != previous_timestamps
+        shared_rows = np.flatnonzero(shared[group_ids])
+        shared_keys = zip(group_ids[shared_rows].tolist(), timestamps[shared_rows].tolist())
+
+        for row, key in zip(shared_rows.tolist(), shared_keys):
+            is_unique[row] = key not in kept_actions
+            kept_actions.add(key)
+
+        rows = np.flatnonzero(is_unique)
+        group_ids, is_left, timestamps, positions = group_ids[rows], is_left[rows], timestamps[rows], positions[rows]
+
+        if not len(group_ids):
+            return
+
+        groups, first_rows, counts = np.unique(group_ids, return_index=True, return_counts=True)
+        sessions['rows'][groups] += counts
+        new_groups = sessions['position'][groups] < 0
+        sessions['position'][groups[new_groups]] = positions[first_rows[new_groups]]
+
+        # Sessions still open from previous chunks are reopened by their opening action:
+        open_groups = groups[sessions['open'][groups]]
+        group_ids = np.r_[open_groups, group_ids]
+        is_left = np.r_[np.zeros(len(open_groups), dtype=bool), is_left]
+        timestamps = np.r_[sessions['open_timestamp'][open_groups], timestamps]
+
+        order, _, closes_session, session_starts = pair_sessions(group_ids, is_left)
+        group_ids, is_left, timestamps = group_ids[order], is_left[order], timestamps[order]
+        elapsed = timedelta_seconds(timestamps - timestamps[session_starts])
+        np.add.at(sessions['duration'], group_ids[closes_session], elapsed[closes_session])
+
+        last_rows = np.flatnonzero(np.r_[group_ids[1:] != group_ids[:-1], True])
+        groups = group_ids[last_rows]
+        sessions['open'][groups] = ~closes_session[last_rows]
+        sessions['open_timestamp'][groups] = np.where(
+            closes_session[last_rows], NAT, timestamps[session_starts[last_rows]]
+        )
+        sessions['last_timestamp'][groups] = timestamps[last_rows]
+        sessions['last_left'][groups] = is_left[last_rows]
+
+    def result(self, calculate_overall_uptime: bool = False) -> pd.DataFrame:
+        """
+        Get the attendance list, just like `get_attendance_list`.
+
+        Parameters
+        ----------
+        calculate_overall_uptime: bool
+            Calculate overall uptime per user.
+
+        Returns
+        -------
+        df: pd.DataFrame
+            Attendance list.
+        """
+        attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+        col_name = attendance_list_settings['user_name']
+        col_date = attendance_list_settings['date']
+        col_duration = attendance_list_settings['duration']
+        sessions = self.sessions[self.COERCED]
+
+        # Checking if the last user action is in the event time slot (see `user_did_not_participate`):
+        if self.check_time_slot:
+            left_before = (self.last_actions == "Left") & (self.start_times != NAT) & \
+                (self.last_timestamps < self.start_times)
+            join_after = (self.last_actions == "Joined") & (self.end_times != NAT) & \
+                (self.last_timestamps > self.end_times)
+            ignored = left_before | join_after
+            sessions = {
+                key: np.where(ignored, self.sessions[self.IGNORED][key], values) for key, values in sessions.items()
+            }
+
+        duration_sec = sessions['duration'].copy()
+        duration_sec += np.where(
+            sessions['open'], timedelta_seconds(sessions['last_timestamp'] - sessions['open_timestamp']), 0
+        )
+        duration_sec += np.where(
+            sessions['last_left'], 0, timedelta_seconds(self.end_times - sessions['last_timestamp'])
+        )
+        groups = np.flatnonzero(sessions['rows'] > 0)
+        keys = [self.keys[group] for group in groups.tolist()]
 
-        df = df[df[col_name].isin(active_users)]
-        attendance_list.append(df[[col_name, col_action, col_timestamp]])
+        df = pd.DataFrame({
+            'position': sessions['position'][groups],
+            col_name: pd.Series([name for name, _ in keys], dtype=object),
+            col_date: pd.Series([date for _, date in keys], dtype=object),
+            col_duration: np.ceil(duration_sec[groups] / 60).astype("int64"),
+            'rows': sessions['rows'][groups]
+        })
+
+        return reduce_attendance_list(df, calculate_overall_uptime=calculate_overall_uptime)
 
-    df = pd.concat(attendance_list)
 
-    if not df[col_timestamp].isnull().any():
-        df[col_date] = df[col_timestamp].dt.date
+def get_attendance_list_streaming(
+        path: Union[str, list],
+        event_start_time: str = None,
+        event_end_time: str = None,
+        ignore_inactive_users: bool = True,
+        calculate_overall_uptime: bool = False,
+        chunksize: int = 100000
+) -> pd.DataFrame:
+    """
+    Get the attendance list just like `get_attendance_list`, but reading CSV files in chunks and aggregating users
+    actions incrementally (see `AttendanceAggregator`), so that memory is bounded by the chunk size and the number of
+    users, instead of all files together. Files are read twice: first to collect the event dates and active users of
+    each meeting and the usernames to be validated, then to aggregate users actions.
+
+    Actions are sorted by timestamp within each chunk, so the chunks of each file are expected to follow the
+    timestamps order (as Microsoft Teams exports do).
+
+    Parameters
+    ----------
+    path: Union[str, list]
+        CSV filepath, directory path or list of files uploaded through 'streamlit' UI (see `load_csv`).
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    ignore_inactive_users: bool
+        Ignore users not present at the time the attendance list was generated.
+    calculate_overall_uptime: bool
+        Calculate overall uptime per user.
+    chunksize: int
+        Number of rows per chunk.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Attendance list.
+    """
+    logging.info("Fetching the attendance list (streaming)...")
+    settings = get_settings()
+    format_names = settings['system']['format_user_names']
+    event_settings = settings['spreadsheets']['event']
+    check_user_name = event_settings['check_user_name']
+    check_user_name_similarity = event_settings['check_user_name_similarity']
+    attendance_list_settings = settings['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_action = attendance_list_settings['user_action']
+    col_timestamp = attendance_list_settings['timestamp']
+    col_date = attendance_list_settings['date']
 
-    df[col_duration] = 0
+    def format_names_column(names: pd.Series) -> pd.Series:
+        return format_user_names(names) if format_names else names
 
-    if format_names:
-        df[col_name] = df[col_name].apply(format_user_name)
+    active_users, users, dates_count = {}, {}, {}
+    user_remap = None
+
+    # Collecting the event dates of each meeting, the active users of each meeting (from the last action of each user)
+    # and the usernames to be validated, following their order of appearance (just like `get_attendance_list`):
+    for name, chunks in iter_csv(path, chunksize=chunksize):
+        file_users, last_actions, file_dates = {}, {}, set()
+
+        for df in chunks:
+            if df.empty:
+                continue
+
+            df = prepare_attendance_list(df, ignore_inactive_users=False)
+            file_dates.update(df[col_timestamp].dt.date.unique().tolist())
+
+            if check_user_name:
+                file_users.update(dict.fromkeys(df[col_name].unique().tolist()))
+
+            if ignore_inactive_users:
+                last_actions.update(df.groupby(col_name, sort=False)[col_action].last().to_dict())
+
+        for date in file_dates:
+            dates_count[date] = dates_count.get(date, 0) + 1
+
+        if ignore_inactive_users:
+            active_users[name] = {user for user, action in last_actions.items() if action.startswith("Joined")}
+            file_users = {user: None for user in file_users if user in active_users[name]}
+
+        users.update(dict.fromkeys(format_names_column(pd.Series(list(file_users), dtype=object)).tolist()))
 
-    # Validating usernames, to ensure that users who sign in through different Teams accounts that possibly have
-    # different names, are identified as being the same user:
     if check_user_name:
-        all_users = sorted(df[col_name].unique().tolist(), key=len, reverse=True)
-        user_remap = {all_users[0]: all_users[0]}
+        user_remap = get_user_remap(list(users), min_similarity=check_user_name_similarity)
 
-        for user in all_users[1:]:
-            names_list = list(user_remap.keys())
-            match, similarity = find_string(user, names_list, fuzzy_method="partial_token_sort_ratio")
-            user_remap[user] = match if similarity >= check_user_name_similarity else user
+    aggregator = AttendanceAggregator(
+        event_start_time=event_start_time or event_settings['start_time'],
+        event_end_time=event_end_time or event_settings['end_time'],
+        check_time_slot=event_settings['check_time_slot'],
+        shared_dates={date for date, count in dates_count.items() if count > 1}
+    )
 
-        df[col_name] = df[col_name].map(user_remap)
+    for name, chunks in iter_csv(path, chunksize=chunksize):
+        for df in chunks:
+            if df.empty:
+                continue
 
-    # Validating users actions regarding the events' time slot. If the user left before the event started,
-    # ignore their actions; otherwise, adjust the input/output timestamps to the event's previous defined time slot:
-    if check_time_slot:
-        dates = df[col_date].unique().tolist()
-
-        for date in dates:
-            df_date = df[df[col_date] == date]
-            users = df_date[col_name].unique().tolist()
-
-            for user in users:
-                df_user = df_date[df_date[col_name] == user]
-                user_actions, timestamps = df_user[col_action], df_user[col_timestamp]
-
-                user_off_event = user_did_not_participate(
-                    user_actions=user_actions,
-                    timestamps=timestamps,
-                    start_time=event_start_time,
-                    end_time=event_end_time
-                )
-
-                # Checking if the last user action is in the event time slot, otherwise, ignore it:
-                if user_off_event:
-                    df.loc[(df[col_date] == date) & (df[col_name] == user), col_timestamp] = \
-                        df.loc[(df[col_date] == date) & (df[col_name] == user), col_timestamp].apply(
-                            lambda t: ignore_time_slot(t, event_start_time, event_end_time)
-                        )
-                else:
-                    df.loc[(df[col_date] == date) & (df[col_name] == user), col_timestamp] = \
-                        df.loc[(df[col_date] == date) & (df[col_name] == user), col_timestamp].apply(
-                            lambda t: coerce_time_slot(t, event_start_time, event_end_time)
-                        )
-
-    # Dropping duplicate rows, keeping the first occurrence:
-    df = df.dropna().drop_duplicates(subset=[col_name, col_timestamp], keep="first")
-
-    all_users = df[col_name].unique().tolist()
+            df = prepare_attendance_list(df, ignore_inactive_users=False)
 
-    for user in all_users:
-        df_user = df[df[col_name] == user]
-        user_dates = df_user[col_date].unique().tolist()
+            if ignore_inactive_users:
+                df = df[df[col_name].isin(active_users.get(name, ()))]
 
-        for date in user_dates:
-            end_time = pd.to_datetime(f"{date} {event_end_time}", infer_datetime_format=True, errors="coerce")
-            df_user_actions = df_user[df_user[col_date] == date]
+            df[col_name] = format_names_column(df[col_name])
 
-            duration_sec = 0
-            last_action, last_action_timestamp = None, None
-            cur_action, cur_action_timestamp = None, None
+            if user_remap is not None:
+                df[col_name] = df[col_name].map(user_remap)
 
-            for i, row in df_user_actions.iterrows():
-                cur_action, cur_action_timestamp = row[col_action], row[col_timestamp]
+            df[col_date] = df[col_timestamp].dt.date
+            aggregator.update(df)
 
-                if not last_action:
-                    last_action, last_action_timestamp = cur_action, cur_action_timestamp
-                    continue
+    df = aggregator.result(calculate_overall_uptime=calculate_overall_uptime)
 
-                if cur_action == "Left":
-                    duration_sec += (cur_action_timestamp - last_action_timestamp).seconds
-                    last_action = None
+    return df
 
-            if last_action:
-                duration_sec += (cur_action_timestamp - last_action_timestamp).seconds
 
-            if cur_action != "Left":
-                remaining_duration = (end_time - cur_action_timestamp).seconds
-                duration_sec += remaining_duration
+def get_partial_attendance_list(
+        df: pd.DataFrame,
+        event_start_time: str,
+        event_end_time: str,
+        user_remap: dict
+) -> pd.DataFrame:
+    """
+    Calculate the partial attendance list of a partition of the users actions (map step of
+    `get_attendance_list_partitioned`), where all actions of each (user, date) are in the same partition.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Users actions (see `prepare_attendance_list`), with the position of each action among all users actions
+        (`position` column).
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    user_remap: dict
+        Username of each (formatted) username (see `get_users_uptime`).
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Uptime per user and date, along with the position of its first action and its number of actions (see
+        `reduce_attendance_list`).
+    """
+    attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_date = attendance_list_settings['date']
+    col_duration = attendance_list_settings['duration']
 
-            duration = duration_sec / 60
-            df.loc[(df[col_name] == user) & (df[col_date] == date), col_duration] = math.ceil(duration)
+    df = get_users_uptime(df, event_start_time=event_start_time, event_end_time=event_end_time, user_remap=user_remap)
+    df = df.groupby([col_name, col_date], sort=False).agg(**{
+        'position': ("position", "first"),
+        col_duration: (col_duration, "first"),
+        'rows': (col_duration, "size")
+    }).reset_index()
 
-    if calculate_overall_uptime:
-        for user in all_users:
-            df.loc[(df[col_name] == user), col_duration] = math.ceil(df[df[col_name] == user][col_duration].sum())
-            df.loc[(df[col_name] == user), col_attendance] = df[df[col_name] == user][col_duration].count()
+    return df
 
-        df = df[[col_name, col_attendance, col_duration]].drop_duplicates()
-        df[col_attendance] = df[col_attendance].astype(df[col_duration].iloc[0].dtype)
-        df = df.sort_values(by=[col_attendance, col_duration], ascending=False).reset_index(drop=True)
-    else:
-        df = df[[col_name, col_date, col_duration]].drop_duplicates()
-        df = df.sort_values(by=[col_date, col_duration], ascending=False).reset_index(drop=True)
+
+def get_attendance_list_partitioned(
+        df_list: [pd.DataFrame],
+        event_start_time: str = None,
+        event_end_time: str = None,
+        ignore_inactive_users: bool = True,
+        calculate_overall_uptime: bool = False,
+        partition_by: str = "date",
+        max_workers: int = None,
+        profiler: StageProfiler = None
+) -> pd.DataFrame:
+    """
+    Get the attendance list just like `get_attendance_list`, but partitioning the users actions by event date (or by
+    user) and calculating the partial attendance list of each partition in a separate process (map), then merging
+    them (reduce, see `reduce_attendance_list`), so that reports of many event dates use all CPUs.
+
+    Usernames are formatted and validated once, over all users actions, before partitioning; time slot validation,
+    duplicate actions and uptime only depend on the actions of each (user, date), which are never split.
+
+    Parameters
+    ----------
+    df_list: [pd.DataFrame]
+        Content of each file (see `utils.load_csv`).
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    ignore_inactive_users: bool
+        Ignore users not present at the time the attendance list was generated.
+    calculate_overall_uptime: bool
+        Calculate overall uptime per user.
+    partition_by: str
+        Partitioning of the users actions: "date" (event dates spread over the partitions) or "user" (users spread
+        over the partitions, e.g. for reports of few, very large events).
+    max_workers: int
+        Maximum number of processes, which is also the number of partitions (default: number of CPUs).
+    profiler: StageProfiler
+        Stage-level profiler (optional).
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Attendance list.
+    """
+    assert partition_by in PARTITIONS, f"partition '{partition_by}' not supported ({', '.join(PARTITIONS)})."
+
+    logging.info("Fetching the attendance list (partitioned)...")
+    settings = get_settings()
+    format_names = settings['system']['format_user_names']
+    event_settings = settings['spreadsheets']['event']
+    check_user_name = event_settings['check_user_name']
+    check_user_name_similarity = event_settings['check_user_name_similarity']
+    attendance_list_settings = settings['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_action = attendance_list_settings['user_action']
+    col_timestamp = attendance_list_settings['timestamp']
+    event_start_time = event_start_time or event_settings['start_time']
+    event_end_time = event_end_time or event_settings['end_time']
+    max_workers = max_workers or os.cpu_count()
+
+    attendance_list = [
+        prepare_attendance_list(df, ignore_inactive_users=ignore_inactive_users, profiler=profiler) for df in df_list
+    ]
+    df = pd.concat(attendance_list, ignore_index=True).dropna(subset=[col_name, col_action, col_timestamp])
+    df["position"] = np.arange(len(df))
+
+    # Validating usernames over all users actions (following their order of appearance, see `get_users_uptime`):
+    names = pd.unique(df[col_name])
+    formatted_names = [format_user_name(name) for name in names] if format_names else list(names)
+    user_remap = {}
+
+    if check_user_name:
+        with profile_stage(profiler, "get_user_remap", rows=len(df)) as record:
+            users = list(dict.fromkeys(formatted_names))
+            user_remap = get_user_remap(users, min_similarity=check_user_name_similarity)
+            record['users'] = len(users)
+            record['users_kept'] = len(set(user_remap.values()))
+
+    with profile_stage(profiler, "partition", rows=len(df)) as record:
+        if partition_by == "date":
+            keys = df[col_timestamp].dt.normalize()
+        else:
+            users = {name: user_remap.get(formatted_name, formatted_name)
+                     for name, formatted_name in zip(names, formatted_names)}
+            keys = df[col_name].map(users)
+
+        # Keys are spread over the partitions in order of appearance, keeping the actions order in each partition:
+        key_codes, unique_keys = pd.factorize(keys)
+        num_partitions = max(min(max_workers, len(unique_keys)), 1)
+        partition_codes = key_codes % num_partitions
+        partitions = [df[partition_codes == i] for i in range(num_partitions)]
+        record['partitions'] = num_partitions
+        record[f"{partition_by}s"] = len(unique_keys)
+
+    with profile_stage(profiler, "map_partitions", rows=len(df), partitions=num_partitions):
+        if num_partitions > 1:
+            with ProcessPoolExecutor(
+                    max_workers=num_partitions, initializer=set_settings_filepath, initargs=(get_settings_filepath(),)
+            ) as pool:
+                partials = list(pool.map(
+                    get_partial_attendance_list, partitions, repeat(event_start_time), repeat(event_end_time),
+                    repeat(user_remap)
+                ))
+        else:
+            partials = [get_partial_attendance_list(partitions[0], event_start_time, event_end_time, user_remap)]
+
+    with profile_stage(profiler, "reduce_partitions", rows=sum(len(df) for df in partials)) as record:
+        df = reduce_attendance_list(pd.concat(partials), calculate_overall_uptime=calculate_overall_uptime)
+        record['users'] = df[col_name].nunique()
 
     return df
 
@@ -290,30 +1579,166 @@ def extract_users_list(df: pd.DataFrame, sort_names: bool = True) -> [str]:
     return users_list
 
 
+class AliasTable:
+    """
+    Alias table (Vose's method) to sample indexes in constant time, with probabilities proportional to their weights.
+
+    Parameters
+    ----------
+    weights: [float]
+        Non-negative weight of each index (at least one of them positive).
+    """
+    def __init__(self, weights: [float]):
+        n = len(weights)
+        total = float(sum(weights))
+
+        assert 0 < n and 0 < total
+
+        scaled = [weight * n / total for weight in weights]
+        self.probabilities = [1.0] * n
+        self.aliases = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            i, j = small.pop(), large[-1]
+            self.probabilities[i], self.aliases[i] = scaled[i], j
+            scaled[j] -= 1.0 - scaled[i]
+
+            if scaled[j] < 1.0:
+                small.append(large.pop())
+
+    def __len__(self) -> int:
+        return len(self.probabilities)
+
+    def sample(self, rng: random.Random) -> int:
+        i = int(rng.random() * len(self.probabilities))
+
+        return i if rng.random() < self.probabilities[i] else self.aliases[i]
+
+
+def get_voucher_weights(df: pd.DataFrame, weight_by: str = "attendance") -> dict:
+    """
+    Get the weight of each user in the vouchers draw, from the overall attendance list.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Overall attendance list (see `get_attendance_list` with `calculate_overall_uptime`).
+    weight_by: str
+        Weight of each user: "attendance" or "uptime".
+
+    Returns
+    -------
+    weights: dict
+        Weight of each user.
+    """
+    assert weight_by in VOUCHER_WEIGHTS[1:], f"weight '{weight_by}' not supported ({', '.join(VOUCHER_WEIGHTS[1:])})."
+
+    attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+    col_name = attendance_list_settings['user_name']
+    col_weight = attendance_list_settings['attendance' if weight_by == "attendance" else 'duration']
+    weights = dict(zip(df[col_name].tolist(), df[col_weight].astype(float).tolist()))
+
+    return weights
+
+
+def draw_weighted(users_list: [str], weights: [float], number: int, rng: random.Random) -> [str]:
+    """
+    Draw users without replacement, with probabilities proportional to their weights: users already drawn are
+    redrawn, and the alias table is only rebuilt (without them) when they make most draws fail.
+
+    Parameters
+    ----------
+    users_list: [str]
+        Users (with positive weights).
+    weights: [float]
+        Weight of each user.
+    number: int
+        Number of users to be drawn (at most the number of users).
+    rng: random.Random
+        Random numbers generator.
+
+    Returns
+    -------
+    lucky_users: [str]
+        Users drawn, in the drawing order.
+    """
+    table = AliasTable(weights)
+    lucky_users, drawn, drawn_weight, total_weight = [], set(), 0.0, float(sum(weights))
+
+    while len(lucky_users) < number:
+        if drawn_weight > total_weight / 2:
+            remaining = [(user, weight) for user, weight in zip(users_list, weights) if user not in drawn]
+            users_list, weights = zip(*remaining)
+            table, drawn_weight, total_weight = AliasTable(weights), 0.0, float(sum(weights))
+
+        i = table.sample(rng)
+
+        if users_list[i] not in drawn:
+            lucky_users.append(users_list[i])
+            drawn.add(users_list[i])
+            drawn_weight += weights[i]
+
+    return lucky_users
+
+
 def giveaway_vouchers(
         users_list: [str],
         number: int = 3,
         block_duplicates: bool = True,
         block_lucky: bool = True,
-        ignore_users: [str] = None
+        ignore_users: [str] = None,
+        weights: dict = None,
+        seed: int = None
 ) -> pd.DataFrame:
+    """
+    Draw the vouchers winners among the attendance list users.
+
+    Parameters
+    ----------
+    users_list: [str]
+        Attendance list users (see `extract_users_list`).
+    number: int
+        Number of vouchers.
+    block_duplicates: bool
+        Prevent the same user from winning more than once.
+    block_lucky: bool
+        Ignore users who have already been drawn (see settings).
+    ignore_users: [str]
+        Users not to be included in the draw.
+    weights: dict
+        Weight of each user (see `get_voucher_weights`). Users without a positive weight are not included in the
+        draw. If not defined, all users have the same chance.
+    seed: int
+        Random numbers generator seed, so that the draw can be reproduced. If not defined, a random seed is used
+        (and logged, so that the draw can be audited).
+
+    Returns
+    -------
+    df: pd.DataFrame
+        Winners, in the drawing order (the seed is kept in `df.attrs['seed']`).
+    """
     assert 1 <= number
 
-    logging.info("Giving away vouchers to attendance list users...")
     settings = get_settings()
     attendance_list_settings = settings['spreadsheets']['attendance_list']
     name = attendance_list_settings['user_name']
-
-    if ignore_users:
-        users_list = [user for user in users_list if user not in ignore_users]
+    seed = random.SystemRandom().randrange(2 ** 32) if seed is None else seed
+    rng = random.Random(seed)
+    logging.info(f"Giving away vouchers to attendance list users (seed: {seed})...")
+    ignore_users = set(ignore_users or [])
 
     if block_lucky:
         lucky_users = settings['spreadsheets']['operations']['giveaway_voucher']['lucky_users']
-        lucky_users = sorted(set([format_user_name(n) for n in lucky_users])) if lucky_users else []
-        users_list = [user for user in users_list if user not in lucky_users]
+        ignore_users.update(format_user_names(pd.Series(lucky_users, dtype=object)) if lucky_users else [])
+
+    users_list = [user for user in dict.fromkeys(users_list) if user not in ignore_users]
+
+    if weights is not None:
+        users_list = [user for user in users_list if weights.get(user, 0.0) > 0.0]
 
     attendance_list_count = len(users_list)
-    lucky_users = []
 
     if block_duplicates and not number <= attendance_list_count:
         logging.warning(
@@ -321,16 +1746,21 @@ def giveaway_vouchers(
             f"(number <= {attendance_list_count})."
         )
 
-    for _ in range(number):
-        selected_user = random.choice(users_list)
-        lucky_users.append(selected_user)
-
-        if block_duplicates:
-            users_list.remove(selected_user)
-
-            if not users_list:
-                break
+    if not users_list:
+        lucky_users = []
+    elif weights is not None and block_duplicates:
+        lucky_users = draw_weighted(
+            users_list, [weights[user] for user in users_list], min(number, attendance_list_count), rng
+        )
+    elif weights is not None:
+        table = AliasTable([weights[user] for user in users_list])
+        lucky_users = [users_list[table.sample(rng)] for _ in range(number)]
+    elif block_duplicates:
+        lucky_users = rng.sample(users_list, min(number, attendance_list_count))
+    else:
+        lucky_users = rng.choices(users_list, k=number)
 
     df = pd.DataFrame(lucky_users, columns=[name])
+    df.attrs['seed'] = seed
 
     return df
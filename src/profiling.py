@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Iterator
+import pandas as pd
+import tracemalloc
+import logging
+import json
+import time
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class StageProfiler:
+    """
+    Collect stage-level timings of the attendance pipeline (see `operations.get_attendance_list` and
+    `utils.load_csv`), along with the number of rows and users processed by each stage and (optionally) the peak
+    memory allocated. Stages run several times (e.g. once per file) are aggregated. Nested stages are supported: the
+    peak memory of a stage includes the peaks of the stages run within it.
+
+    Parameters
+    ----------
+    memory: bool
+        Measure the peak memory allocated by each stage, through `tracemalloc` (slower).
+    callback: Callable[[dict], None]
+        Function called with the record of each stage run, as soon as it finishes (e.g. `log_stage`).
+    """
+    def __init__(self, memory: bool = False, callback: Callable[[dict], None] = None):
+        self.memory = memory
+        self.callback = callback
+        self.stages = {}
+        self._peaks = []  # Running peak memory of each stage in progress (outermost first).
+
+    @contextmanager
+    def stage(self, name: str, **info) -> Iterator[dict]:
+        """
+        Profile a stage.
+
+        Parameters
+        ----------
+        name: str
+            Stage name.
+        info: dict
+            Stage counts known beforehand (e.g. `rows`). Counts known afterwards (e.g. `users`) can be added to the
+            record yielded.
+
+        Returns
+        -------
+        record: Iterator[dict]
+            Stage record.
+        """
+        record = {'stage': name, **info}
+        start_tracing = self.memory and not tracemalloc.is_tracing()
+        memory_start = 0
+
+        if start_tracing:
+            tracemalloc.start()
+
+        if self.memory:
+            # The peak is reset for this stage, so the peak reached so far is folded into the enclosing stage first:
+            memory_start, peak = tracemalloc.get_traced_memory()
+
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+
+            tracemalloc.reset_peak()
+            self._peaks.append(memory_start)
+
+        start = time.perf_counter()
+
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+
+            if self.memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                record['peak_memory_mb'] = (peak - memory_start) / 1024 ** 2
+
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+
+            if start_tracing:
+                tracemalloc.stop()
+
+            self.add(record)
+
+            if self.callback is not None:
+                self.callback(record)
+
+    def add(self, record: dict) -> None:
+        """
+        Add a stage record, aggregating it with previous runs of the same stage: counts and timings are summed, peak
+        memory is the maximum.
+
+        Parameters
+        ----------
+        record: dict
+            Stage record.
+        """
+        stage = self.stages.get(record['stage'])
+
+        if stage is None:
+            self.stages[record['stage']] = {**record, 'calls': 1}
+            return
+
+        stage['calls'] += 1
+
+        for key, value in record.items():
+            if key == "stage":
+                continue
+            elif key == "peak_memory_mb":
+                stage[key] = max(stage.get(key, 0.0), value)
+            else:
+                stage[key] = stage.get(key, 0) + value
+
+    @property
+    def records(self) -> [dict]:
+        return list(self.stages.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        columns = ["stage", "calls", "seconds", "rows", "users", "peak_memory_mb"]
+        df = pd.DataFrame(self.records)
+        df = df.reindex(columns=columns + [column for column in df.columns if column not in columns])
+
+        # Keeping counts as integers, even if missing from some stages:
+        for column in df.columns[1:]:
+            if not column.endswith(("seconds", "_mb")):
+                df[column] = df[column].astype("Int64")
+
+        return df
+
+    def log(self, level: int = logging.INFO, **context) -> None:
+        """
+        Log the aggregated stage records as structured (JSON) messages.
+
+        Parameters
+        ----------
+        level: int
+            Log level.
+        context: dict
+            Values added to every message (e.g. the batch job name).
+        """
+        for record in self.records:
+            log_stage(record, level=level, **context)
+
+
+def log_stage(record: dict, level: int = logging.INFO, **context) -> None:
+    """
+    Log a stage record as a structured (JSON) message.
+
+    Parameters
+    ----------
+    record: dict
+        Stage record (see `StageProfiler`).
+    level: int
+        Log level.
+    context: dict
+        Values added to the message.
+    """
+    LOGGER.log(level, json.dumps({'event': "stage", **context, **record}, default=str))
+
+
+def profile_stage(profiler: StageProfiler, name: str, **info) -> ContextManager[dict]:
+    """
+    Profile a stage, if a profiler is defined.
+
+    Parameters
+    ----------
+    profiler: StageProfiler
+        Profiler (optional).
+    name: str
+        Stage name.
+    info: dict
+        Stage counts known beforehand (e.g. `rows`).
+
+    Returns
+    -------
+    record: ContextManager[dict]
+        Stage record (not stored if no profiler is defined).
+    """
+    if profiler is None:
+        return nullcontext({})
+
+    return profiler.stage(name, **info)
@@ -0,0 +1,460 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from datetime import date as dt_date
+from typing import Union
+import pandas as pd
+import numpy as np
+import hashlib
+import logging
+import sqlite3
+import io
+import os
+
+from src.utils import get_settings, freeze_to_builtins, list_csv_sources, read_csv
+from src import operations
+
+
+# Position of each action, following the files order:
+POSITION = "file_seq * 4294967296 + position"
+
+# Maximum number of values per query (bounded by SQLite's maximum number of query parameters):
+MAX_PARAMETERS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    hash TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    content BLOB
+);
+CREATE TABLE IF NOT EXISTS actions (
+    file_seq INTEGER NOT NULL REFERENCES files (seq),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    action TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    PRIMARY KEY (file_seq, position)
+);
+CREATE INDEX IF NOT EXISTS actions_date ON actions (date);
+CREATE TABLE IF NOT EXISTS uptime (
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (name, date)
+);
+CREATE TABLE IF NOT EXISTS user_remap (
+    name TEXT PRIMARY KEY,
+    user TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS config (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def get_file_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class AttendanceStore:
+    """
+    Persistent (SQLite-based) attendance store, keeping the users actions of every meeting file added and the users'
+    uptime per event date (see `operations.get_users_uptime`).
+
+    Files are identified by their content, so adding the same files again has no effect. Only the event dates of new
+    files are recalculated, along with the dates of users whose username changed, since usernames are validated
+    against every username in the store. The content of each file is kept as well, so that files are read again if
+    the timestamps settings change (see `reload`).
+
+    Parameters
+    ----------
+    filepath: str
+        SQLite database filepath.
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    ignore_inactive_users: bool
+        Ignore users not present at the time the attendance list was generated.
+    """
+    def __init__(
+            self,
+            filepath: str,
+            event_start_time: str = None,
+            event_end_time: str = None,
+            ignore_inactive_users: bool = True
+    ):
+        event_settings = get_settings()['spreadsheets']['event']
+        self.filepath = os.path.abspath(filepath)
+        self.event_start_time = event_start_time or event_settings['start_time']
+        self.event_end_time = event_end_time or event_settings['end_time']
+        self.ignore_inactive_users = ignore_inactive_users
+
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        self.connection = sqlite3.connect(self.filepath)
+        self.connection.executescript(SCHEMA)
+
+        # Stores created before files content was kept:
+        if "content" not in [row[1] for row in self.connection.execute("PRAGMA table_info(files)")]:
+            with self.connection:
+                self.connection.execute("ALTER TABLE files ADD COLUMN content BLOB")
+
+        # Timestamps settings changed, so every stored file must be parsed again (and every date recalculated);
+        # calculation settings changed, so every stored date must be recalculated:
+        settings = get_settings()
+        actions_config = repr(freeze_to_builtins(settings['system'].get('timestamps') or {}))
+        config = repr((
+            self.event_start_time,
+            self.event_end_time,
+            self.ignore_inactive_users,
+            settings['system']['format_user_names'],
+            freeze_to_builtins(event_settings)
+        ))
+
+        if self._get_config("actions") != actions_config:
+            self._set_config("actions", actions_config)
+            self._set_config("uptime", config)
+            self.reload()
+        elif self._get_config("uptime") != config:
+            self._set_config("uptime", config)
+            self.rebuild()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "AttendanceStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _get_config(self, key: str) -> str:
+        row = self.connection.execute("SELECT value FROM config WHERE key = ?", (key,)).fetchone()
+
+        return row[0] if row else None
+
+    def _set_config(self, key: str, value: str) -> None:
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value))
+
+    def _read_actions(self, content: bytes) -> (pd.DataFrame, np.ndarray):
+        csv_input_settings = get_settings()['system']['csv']['input']
+
+        df = read_csv(io.BytesIO(content), csv_input_settings['sep'], csv_input_settings['encoding'])
+        df = operations.prepare_attendance_list(df, ignore_inactive_users=False)
+        active = df.index.isin(operations.drop_inactive_users(df, sort_actions=False).index)
+
+        return df, active
+
+    def _insert_actions(self, file_seq: int, df: pd.DataFrame, active: np.ndarray) -> [str]:
+        attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+        col_name = attendance_list_settings['user_name']
+        col_action = attendance_list_settings['user_action']
+        col_timestamp = attendance_list_settings['timestamp']
+
+        timestamps = df[col_timestamp].to_numpy(dtype="datetime64[ns]").view("int64").tolist()
+        file_dates = [str(date) for date in df[col_timestamp].dt.date]
+
+        self.connection.executemany(
+            "INSERT INTO actions (file_seq, position, name, action, timestamp, date, active) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip([file_seq] * len(df), range(len(df)), df[col_name], df[col_action], timestamps, file_dates,
+                active.astype(int).tolist())
+        )
+
+        return file_dates
+
+    def add(self, path: Union[str, list]) -> [dt_date]:
+        """
+        Add meeting files to the store, recalculating the users' uptime of their event dates.
+
+        Parameters
+        ----------
+        path: Union[str, list]
+            CSV filepath, directory path or list of files uploaded through 'streamlit' UI (see `utils.load_csv`).
+
+        Returns
+        -------
+        dates: [dt_date]
+            Event dates recalculated.
+        """
+        dates = set()
+
+        for name, source in list_csv_sources(path):
+            try:
+                if isinstance(source, str):
+                    with open(source, mode="rb") as file:
+                        content = file.read()
+                else:
+                    content = source.getvalue()
+
+                file_hash = get_file_hash(content)
+
+                row = self.connection.execute("SELECT seq, content FROM files WHERE hash = ?", (file_hash,)).fetchone()
+
+                # Files stored without their content (see `reload`) are parsed again:
+                if row and row[1] is not None:
+                    continue
+
+                df, active = self._read_actions(content)
+            except Exception as e:
+                logging.error(f"Failed to read CSV file '{name}': {e}")
+                continue
+
+            with self.connection:
+                if row:
+                    file_seq = row[0]
+                    dates.update(date for date, in self.connection.execute(
+                        "SELECT DISTINCT date FROM actions WHERE file_seq = ?", (file_seq,)
+                    ))
+                    self.connection.execute("DELETE FROM actions WHERE file_seq = ?", (file_seq,))
+                    self.connection.execute("UPDATE files SET content = ? WHERE seq = ?", (content, file_seq))
+                else:
+                    file_seq = self.connection.execute(
+                        "INSERT INTO files (hash, name, content) VALUES (?, ?, ?)",
+                        (file_hash, os.path.basename(name), content)
+                    ).lastrowid
+
+                file_dates = self._insert_actions(file_seq, df, active)
+
+            logging.info(f"File '{name}' added to the attendance store.")
+            dates.update(file_dates)
+
+        self.update(sorted(dates))
+
+        return [dt_date.fromisoformat(date) for date in sorted(dates)]
+
+    def remove(self, hashes: [str]) -> [dt_date]:
+        """
+        Remove meeting files from the store (e.g. files changed or deleted since they were added), recalculating the
+        users' uptime of their event dates.
+
+        Parameters
+        ----------
+        hashes: [str]
+            Files content hashes (see `get_files`).
+
+        Returns
+        -------
+        dates: [dt_date]
+            Event dates recalculated.
+        """
+        dates = set()
+
+        for i in range(0, len(hashes), MAX_PARAMETERS):
+            file_hashes = list(hashes[i:i + MAX_PARAMETERS])
+            files_query = f"SELECT seq FROM files WHERE hash IN ({', '.join('?' * len(file_hashes))})"
+            dates.update(row[0] for row in self.connection.execute(
+                f"SELECT DISTINCT date FROM actions WHERE file_seq IN ({files_query})", file_hashes
+            ))
+
+            with self.connection:
+                self.connection.execute(f"DELETE FROM actions WHERE file_seq IN ({files_query})", file_hashes)
+                self.connection.execute(
+                    f"DELETE FROM files WHERE hash IN ({', '.join('?' * len(file_hashes))})", file_hashes
+                )
+
+        self.update(sorted(dates))
+
+        return [dt_date.fromisoformat(date) for date in sorted(dates)]
+
+    def get_files(self) -> dict:
+        """
+        Get the files in the store.
+
+        Returns
+        -------
+        files: dict
+            Name of each file, by content hash (SHA-256), following the order they were added.
+        """
+        return dict(self.connection.execute("SELECT hash, name FROM files ORDER BY seq"))
+
+    def reload(self) -> None:
+        """
+        Parse every stored file again (e.g. after the timestamps settings changed), then recalculate the users' uptime
+        of every event date. Files stored without their content keep their actions.
+        """
+        for file_seq, name in self.connection.execute("SELECT seq, name FROM files ORDER BY seq").fetchall():
+            content = self.connection.execute("SELECT content FROM files WHERE seq = ?", (file_seq,)).fetchone()[0]
+
+            if content is None:
+                logging.warning(f"File '{name}' cannot be read again (stored without its content), add it again.")
+                continue
+
+            try:
+                df, active = self._read_actions(content)
+            except Exception as e:
+                logging.error(f"Failed to read CSV file '{name}': {e}")
+                continue
+
+            with self.connection:
+                self.connection.execute("DELETE FROM actions WHERE file_seq = ?", (file_seq,))
+                self._insert_actions(file_seq, df, active)
+
+            logging.info(f"File '{name}' read again.")
+
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """
+        Recalculate the users' uptime of every event date.
+        """
+        dates = [row[0] for row in self.connection.execute("SELECT DISTINCT date FROM actions ORDER BY date")]
+
+        with self.connection:
+            self.connection.execute("DELETE FROM uptime")
+            self.connection.execute("DELETE FROM user_remap")
+
+        self.update(dates)
+
+    def get_user_remap(self) -> (dict, [str]):
+        """
+        Map the stored usernames (see `operations.get_user_remap`), following their order of appearance.
+
+        Returns
+        -------
+        user_remap: dict
+            Username of each formatted username.
+        changed_names: [str]
+            Stored usernames (as in the meeting files) whose username changed since the last calculation.
+        """
+        settings = get_settings()
+        event_settings = settings['spreadsheets']['event']
+        format_names = settings['system']['format_user_names']
+        names = [row[0] for row in self.connection.execute(
+            f"SELECT name FROM actions WHERE active >= ? GROUP BY name ORDER BY MIN({POSITION})",
+            (int(self.ignore_inactive_users),)
+        )]
+        formatted_names = {name: operations.format_user_name(name) if format_names else name for name in names}
+        users = list(dict.fromkeys(formatted_names.values()))
+
+        if event_settings['check_user_name']:
+            user_remap = operations.get_user_remap(users, min_similarity=event_settings['check_user_name_similarity'])
+        else:
+            user_remap = {user: user for user in users}
+
+        previous_user_remap = dict(self.connection.execute("SELECT name, user FROM user_remap"))
+        changed_users = {
+            user for user, previous_user in previous_user_remap.items() if user_remap.get(user, user) != previous_user
+        }
+        changed_names = [name for name, user in formatted_names.items() if user in changed_users]
+
+        with self.connection:
+            self.connection.execute("DELETE FROM user_remap")
+            self.connection.executemany("INSERT INTO user_remap (name, user) VALUES (?, ?)", user_remap.items())
+
+        return user_remap, changed_names
+
+    def update(self, dates: [str]) -> None:
+        """
+        Recalculate the users' uptime of some event dates, and of the dates of users whose username changed (e.g.
+        users identified as being the same user as a new user).
+
+        Parameters
+        ----------
+        dates: [str]
+            Event dates (ISO format).
+        """
+        user_remap, changed_names = self.get_user_remap()
+        dates = set(dates)
+
+        for i in range(0, len(changed_names), MAX_PARAMETERS):
+            names = changed_names[i:i + MAX_PARAMETERS]
+            dates.update(row[0] for row in self.connection.execute(
+                f"SELECT DISTINCT date FROM actions WHERE name IN ({', '.join('?' * len(names))})", names
+            ))
+
+        dates = sorted(dates)
+
+        for i in range(0, len(dates), MAX_PARAMETERS):
+            self._update_dates(dates[i:i + MAX_PARAMETERS], user_remap)
+
+    def _update_dates(self, dates: [str], user_remap: dict) -> None:
+        attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+        col_name = attendance_list_settings['user_name']
+        col_action = attendance_list_settings['user_action']
+        col_timestamp = attendance_list_settings['timestamp']
+        col_date = attendance_list_settings['date']
+        col_duration = attendance_list_settings['duration']
+        placeholders = ", ".join("?" * len(dates))
+
+        # Loading actions following the files order (users who left a meeting before it ended were flagged as
+        # inactive when the file was added):
+        df = pd.read_sql_query(
+            f"SELECT {POSITION} AS position, name, action, timestamp FROM actions "
+            f"WHERE date IN ({placeholders}) AND active >= ? ORDER BY file_seq, position",
+            self.connection,
+            params=list(dates) + [int(self.ignore_inactive_users)]
+        )
+        df[col_timestamp] = pd.to_datetime(df.pop("timestamp"))
+        df = df.rename(columns={'name': col_name, 'action': col_action})
+
+        if not df.empty:
+            df = operations.get_users_uptime(
+                df,
+                event_start_time=self.event_start_time,
+                event_end_time=self.event_end_time,
+                user_remap=user_remap
+            )
+
+        df = df.groupby([col_name, col_date], sort=False).agg(
+            duration=(col_duration, "first"),
+            rows=(col_duration, "size"),
+            position=("position", "min")
+        ).reset_index() if not df.empty else None
+
+        with self.connection:
+            self.connection.execute(f"DELETE FROM uptime WHERE date IN ({placeholders})", dates)
+
+            if df is not None:
+                self.connection.executemany(
+                    "INSERT INTO uptime (name, date, duration, rows, position) VALUES (?, ?, ?, ?, ?)",
+                    zip(df[col_name], df[col_date].astype(str), df['duration'].tolist(), df['rows'].tolist(),
+                        df['position'].tolist())
+                )
+
+    def get_attendance_list(self, calculate_overall_uptime: bool = False) -> pd.DataFrame:
+        """
+        Get the attendance list from the stored users' uptime, just like `operations.get_attendance_list`.
+
+        Parameters
+        ----------
+        calculate_overall_uptime: bool
+            Calculate overall uptime per user.
+
+        Returns
+        -------
+        df: pd.DataFrame
+            Attendance list.
+        """
+        attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+        col_name = attendance_list_settings['user_name']
+        col_date = attendance_list_settings['date']
+        col_duration = attendance_list_settings['duration']
+        col_attendance = attendance_list_settings['attendance']
+
+        if calculate_overall_uptime:
+            df = pd.read_sql_query(
+                "SELECT name, SUM(rows) AS attendance, SUM(duration * rows) AS duration FROM uptime GROUP BY name "
+                "ORDER BY attendance DESC, duration DESC, MIN(position)",
+                self.connection
+            )
+            df.columns = [col_name, col_attendance, col_duration]
+        else:
+            df = pd.read_sql_query(
+                "SELECT name, date, duration FROM uptime ORDER BY date DESC, duration DESC, position",
+                self.connection
+            )
+            df.columns = [col_name, col_date, col_duration]
+            df[col_date] = df[col_date].map(dt_date.fromisoformat)
+
+        return df
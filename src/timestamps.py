@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+from typing import Hashable, Optional
+import pandas as pd
+import numpy as np
+import threading
+import logging
+
+from src.utils import get_settings
+
+
+# Date formats found in Microsoft Teams exports, by day-first (`True`), month-first (`False`) or unambiguous (`None`):
+DATE_FORMATS = (
+    ("%m/%d/%y", False),
+    ("%m/%d/%Y", False),
+    ("%d/%m/%y", True),
+    ("%d/%m/%Y", True),
+    ("%Y-%m-%d", None),
+)
+TIME_FORMATS = ("%I:%M:%S %p", "%I:%M %p", "%H:%M:%S", "%H:%M")
+SEPARATORS = (", ", " ")
+
+# Candidate timestamp formats (format and day-first flag):
+TIMESTAMP_FORMATS = tuple(
+    (f"{date_format}{separator}{time_format}", dayfirst)
+    for date_format, dayfirst in DATE_FORMATS
+    for separator in SEPARATORS
+    for time_format in TIME_FORMATS
+)
+
+_DAYFIRST = dict(TIMESTAMP_FORMATS)
+_FORMATS = {}
+_FORMATS_LOCK = threading.Lock()
+
+
+def get_sample(timestamps: pd.Series, sample_size: int = 100) -> pd.Series:
+    """
+    Get a sample of distinct timestamps, evenly spaced over the column (so that every meeting date is likely included,
+    since actions are exported in order).
+
+    Parameters
+    ----------
+    timestamps: pd.Series
+        Unparsed timestamps.
+    sample_size: int
+        Maximum number of timestamps sampled.
+
+    Returns
+    -------
+    sample: pd.Series
+        Distinct timestamps.
+    """
+    timestamps = timestamps.dropna()
+    positions = np.unique(np.linspace(0, len(timestamps) - 1, num=min(len(timestamps), sample_size)).astype(int))
+    sample = pd.Series(pd.unique(timestamps.iloc[positions]))
+
+    return sample
+
+
+def parses_all(sample: pd.Series, timestamp_format: str) -> bool:
+    return bool(pd.to_datetime(sample, format=timestamp_format, errors="coerce").notnull().all())
+
+
+def is_ambiguous(sample: pd.Series, timestamp_format: str) -> bool:
+    """
+    Check whether a sample of timestamps parsed by a day-first (or month-first) format would also be parsed by its
+    month-first (or day-first) counterpart, i.e. whether the sample does not tell days and months apart.
+
+    Parameters
+    ----------
+    sample: pd.Series
+        Unparsed timestamps.
+    timestamp_format: str
+        Timestamps format that parses the sample.
+
+    Returns
+    -------
+    ambiguous: bool
+        Whether the sample is ambiguous.
+    """
+    if _DAYFIRST.get(timestamp_format) is None:
+        return False
+
+    # Swapping the day and month directives (time formats use `%M` for minutes):
+    swapped_format = "%d".join(part.replace("%d", "%m") for part in timestamp_format.split("%m"))
+
+    return parses_all(sample, swapped_format)
+
+
+def detect_timestamp_format(timestamps: pd.Series, dayfirst: bool = None, sample_size: int = 100) -> Optional[str]:
+    """
+    Detect the format of the timestamps of a single file, by sampling them and trying the formats found in Microsoft
+    Teams exports (see `TIMESTAMP_FORMATS`).
+
+    If the sample is ambiguous (e.g. `05/09/22 16:29:58`, since no day is greater than 12), `dayfirst` decides; if it
+    is not defined, 12-hour clock timestamps are considered month-first (as in English exports) and 24-hour clock
+    timestamps day-first (as in Portuguese exports).
+
+    Parameters
+    ----------
+    timestamps: pd.Series
+        Unparsed timestamps.
+    dayfirst: bool
+        Whether ambiguous dates are day-first (optional).
+    sample_size: int
+        Maximum number of timestamps sampled.
+
+    Returns
+    -------
+    timestamp_format: Optional[str]
+        Timestamps format, or `None` if no format matches the whole sample.
+    """
+    sample = get_sample(timestamps, sample_size=sample_size)
+
+    if sample.empty:
+        return None
+
+    candidates = [(fmt, fmt_dayfirst) for fmt, fmt_dayfirst in TIMESTAMP_FORMATS if parses_all(sample, fmt)]
+
+    for timestamp_format, format_dayfirst in candidates:
+        preferred_dayfirst = dayfirst if dayfirst is not None else "%p" not in timestamp_format
+
+        if format_dayfirst is None or format_dayfirst == preferred_dayfirst or len(candidates) == 1:
+            return timestamp_format
+
+    return candidates[0][0] if candidates else None
+
+
+def parse_timestamps(timestamps: pd.Series, signature: Hashable = None) -> pd.Series:
+    """
+    Parse the timestamps of a single file with an explicit format (see `detect_timestamp_format`), instead of
+    inferring it element by element. The format detected is cached per file header signature, so that later files
+    with the same header skip the detection (as long as the cached format still parses their sample).
+
+    Only formats detected from unambiguous samples (see `is_ambiguous`) are cached, and ambiguous samples are always
+    detected again, so that the dates of a file never depend on the files parsed before it.
+
+    Parameters
+    ----------
+    timestamps: pd.Series
+        Timestamps (already parsed timestamps are returned unchanged).
+    signature: Hashable
+        File header signature (e.g. the original header columns). If not defined, the format is not cached.
+
+    Returns
+    -------
+    timestamps: pd.Series
+        Parsed timestamps. Timestamps that do not match the format are missing (`NaT`).
+    """
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        return timestamps
+
+    timestamps_settings = get_settings()['system'].get('timestamps') or {}
+    dayfirst = timestamps_settings.get('dayfirst')
+    sample_size = timestamps_settings.get('sample_size') or 100
+    key = (signature, dayfirst)
+
+    sample = get_sample(timestamps, sample_size=sample_size)
+
+    with _FORMATS_LOCK:
+        timestamp_format = _FORMATS.get(key) if signature is not None else None
+
+    if timestamp_format is None or not parses_all(sample, timestamp_format) or is_ambiguous(sample, timestamp_format):
+        timestamp_format = detect_timestamp_format(timestamps, dayfirst=dayfirst, sample_size=sample_size)
+
+        if signature is not None and timestamp_format is not None and not is_ambiguous(sample, timestamp_format):
+            with _FORMATS_LOCK:
+                _FORMATS[key] = timestamp_format
+
+    if timestamp_format is None:
+        logging.warning("Timestamps format not detected, inferring it (slower and possibly ambiguous).")
+        return pd.to_datetime(timestamps, infer_datetime_format=True, errors="coerce")
+
+    return pd.to_datetime(timestamps, format=timestamp_format, errors="coerce")
+
+
+def clear_timestamp_formats() -> None:
+    with _FORMATS_LOCK:
+        _FORMATS.clear()
@@ -5,40 +5,206 @@
 # "People matter, results count"
 
 from streamlit.runtime.uploaded_file_manager import UploadedFile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from types import MappingProxyType
 from datetime import datetime
-from typing import Union
-import streamlit as st
+from typing import Union, Mapping, Iterator, Callable, BinaryIO
+from itertools import repeat
 import pandas as pd
+import numpy as np
 import coloredlogs
+import threading
+import codecs
+import csv
+import hashlib
+import time
 import logging
 import pytz
 import yaml
 import sys
+import io
 import os
 
+from src.cache import LRUCache, hash_content, read_cached_frame, write_cached_frame
+from src.profiling import StageProfiler, profile_stage
+
+try:
+    import pyarrow
+    import pyarrow.csv
+except ImportError:
+    pyarrow = None
 
 LOG_LEVELS = ("NOTSET", "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+EXECUTORS = ("thread", "process")
+CSV_ENGINES = ("pyarrow", "c")
+CSV_DELIMITERS = "\t,;|"
+SNIFF_SIZE = 8192  # Bytes read to sniff the encoding and dialect of CSV files.
+
+# Byte order marks (UTF-32 ones first, since the UTF-32 LE one starts with the UTF-16 LE one):
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16")
+)
 
 LOGGER = logging.getLogger(__name__)
 
 
-def get_settings() -> dict:
+DEFAULT_SETTINGS_FILEPATH = \
+    os.path.join(*[os.path.abspath(os.path.join(os.path.realpath(__file__), os.pardir)), "assets", "settings.yml"])
+SETTINGS_FILEPATH = DEFAULT_SETTINGS_FILEPATH
+
+_SETTINGS_CACHE = {}
+_SETTINGS_LOCK = threading.Lock()
+
+_BYTES_CACHE = LRUCache(max_entries=8)
+
+
+def set_settings_filepath(filepath: str = None) -> None:
+    """
+    Override the application settings file used by default (e.g. by tests and batch jobs).
+
+    Parameters
+    ----------
+    filepath: str
+        YAML-based settings filepath. If not defined, restores the default settings file.
+    """
+    global SETTINGS_FILEPATH
+
+    SETTINGS_FILEPATH = os.path.abspath(filepath) if filepath else DEFAULT_SETTINGS_FILEPATH
+
+
+def get_settings_filepath() -> str:
+    """
+    Get the application settings file in use (e.g. to be set on worker processes, see `set_settings_filepath`).
+
+    Returns
+    -------
+    filepath: str
+        YAML-based settings filepath.
+    """
+    return SETTINGS_FILEPATH
+
+
+def freeze(content: object) -> object:
+    """
+    Build a read-only view of YAML-based content, converting mappings into `MappingProxyType` and lists into tuples.
+
+    Parameters
+    ----------
+    content: object
+        Content from YAML-based file.
+
+    Returns
+    -------
+    frozen_content: object
+        Read-only content.
+    """
+    if isinstance(content, dict):
+        frozen_content = MappingProxyType({key: freeze(value) for key, value in content.items()})
+    elif isinstance(content, list):
+        frozen_content = tuple(freeze(value) for value in content)
+    else:
+        frozen_content = content
+
+    return frozen_content
+
+
+def freeze_to_builtins(content: object) -> object:
+    """
+    Convert read-only content (see `freeze`) into built-in types that can be pickled and hashed (through `repr`).
+
+    Parameters
+    ----------
+    content: object
+        Read-only content.
+
+    Returns
+    -------
+    builtin_content: object
+        Content as nested tuples of (key, value) pairs and tuples.
+    """
+    if isinstance(content, Mapping):
+        builtin_content = tuple((key, freeze_to_builtins(value)) for key, value in content.items())
+    elif isinstance(content, tuple):
+        builtin_content = tuple(freeze_to_builtins(value) for value in content)
+    else:
+        builtin_content = content
+
+    return builtin_content
+
+
+def _load_settings(filepath: str = None) -> (Mapping, str):
+    filepath = os.path.abspath(filepath) if filepath else SETTINGS_FILEPATH
+    stat = os.stat(filepath)
+    file_signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _SETTINGS_LOCK:
+        cached = _SETTINGS_CACHE.get(filepath)
+
+        if cached and cached['signature'] == file_signature:
+            return cached['settings'], cached['hash']
+
+        with open(filepath, mode="rb") as file:
+            content = file.read()
+
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        # Reloading settings only if the file content has changed:
+        if cached and cached['hash'] == content_hash:
+            settings = cached['settings']
+        else:
+            settings = freeze(yaml.safe_load(content.decode("utf-8")))
+            LOGGER.debug(f"Settings loaded from '{filepath}'.")
+
+        _SETTINGS_CACHE[filepath] = {'signature': file_signature, 'hash': content_hash, 'settings': settings}
+
+    return settings, content_hash
+
+
+def get_settings(filepath: str = None) -> Mapping:
     """
     Import application settings from YAML-based file.
 
+    Settings are cached process-wide and reloaded only when the file changes (modification time, size and content
+    hash), so they are read-only.
+
+    Parameters
+    ----------
+    filepath: str
+        YAML-based settings filepath. If not defined, uses the default settings file (see `set_settings_filepath`).
+
     Returns
     -------
-    settings: dict
-        Application settings.
+    settings: Mapping
+        Application settings (read-only).
     """
-    # Loading YAML-based settings file:
-    this_dir_path = os.path.abspath(os.path.join(os.path.realpath(__file__), os.pardir))
-    settings_filepath = os.path.join(*[this_dir_path, "assets", "settings.yml"])
-    settings = read_yaml(settings_filepath)
+    settings, _ = _load_settings(filepath)
 
     return settings
 
 
+def get_settings_hash(filepath: str = None) -> str:
+    """
+    Get the content hash of the application settings file.
+
+    Parameters
+    ----------
+    filepath: str
+        YAML-based settings filepath. If not defined, uses the default settings file (see `set_settings_filepath`).
+
+    Returns
+    -------
+    settings_hash: str
+        SHA-256 hash of the settings file content.
+    """
+    _, settings_hash = _load_settings(filepath)
+
+    return settings_hash
+
+
 def read_yaml(filepath: str) -> dict:
     """
     Read YAML-based file content.
@@ -59,63 +225,492 @@ def read_yaml(filepath: str) -> dict:
     return content
 
 
-def load_csv(path: Union[str, UploadedFile], **kwargs) -> [pd.DataFrame]:
-    csv_input_settings = get_settings()['system']['csv']['input']
-    sep, encoding = csv_input_settings['sep'], csv_input_settings['encoding']
-    df_list = []
+def list_csv_sources(path: Union[str, UploadedFile, list]) -> [(str, Union[str, UploadedFile])]:
+    """
+    List CSV files to be loaded.
+
+    Parameters
+    ----------
+    path: Union[str, UploadedFile, list]
+        CSV filepath, directory path (files are listed sorted by name) or list of files uploaded through 'streamlit' UI
+        (or of CSV filepaths and directory paths).
+
+    Returns
+    -------
+    sources: [(str, Union[str, UploadedFile])]
+        Name and source (filepath or uploaded file) of each CSV file.
+    """
+    sources = []
 
     if isinstance(path, list):  # Reading files from 'streamlit' UI.
         for file in path:
-            if file is not None:
-                try:
-                    df = pd.read_csv(
-                        filepath_or_buffer=file,
-                        sep=sep,
-                        encoding=encoding,
-                        skip_blank_lines=True,
-                        **kwargs
-                    ).dropna(how="all")
-
-                    df_list.append(df)
-                except Exception as e:
-                    logging.error(f"Failed to read CSV file '{file.name}': {e}")
+            if isinstance(file, str):
+                sources.extend(list_csv_sources(file))
+            elif file is not None:
+                sources.append((file.name, file))
     else:
         abs_path = os.path.abspath(path)
 
         if os.path.isdir(abs_path):
-            for filepath in os.listdir(abs_path):
+            for filepath in sorted(os.listdir(abs_path)):
                 abs_filepath = os.path.join(abs_path, filepath)
 
                 if os.path.isfile(abs_filepath):
-                    try:
-                        df = pd.read_csv(
-                            filepath_or_buffer=abs_filepath,
-                            sep=sep,
-                            encoding=encoding,
-                            skip_blank_lines=True,
-                            **kwargs
-                        ).dropna(how="all")
-
-                        df_list.append(df)
-                    except Exception as e:
-                        logging.error(f"Failed to read CSV file '{abs_filepath}': {e}")
+                    sources.append((abs_filepath, abs_filepath))
         else:
+            sources.append((abs_path, abs_path))
+
+    return sources
+
+
+def sniff_encoding(head: bytes, default: str) -> str:
+    """
+    Sniff the encoding of a file from its first bytes: byte order mark, UTF-16 without byte order mark (null bytes
+    at every other position), UTF-8 and, otherwise, Windows-1252 (files saved by Excel on Windows).
+
+    Parameters
+    ----------
+    head: bytes
+        First bytes of the file (see `SNIFF_SIZE`).
+    default: str
+        Encoding of empty files.
+
+    Returns
+    -------
+    encoding: str
+        File encoding.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    if not head:
+        return default
+
+    if b"\x00" in head:
+        return "utf-16-le" if head[1::2].count(0) > head[0::2].count(0) else "utf-16-be"
+
+    try:
+        # The head may end in the middle of a multibyte character:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        head.decode("cp1252")
+
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def sniff_csv(head: bytes, sep: str, encoding: str) -> (str, str, str):
+    """
+    Sniff the encoding, columns separator and quote character of a CSV file from its first bytes, so that files
+    exported from different sources (e.g. UTF-16 tab-separated Microsoft Teams reports and UTF-8 comma-separated
+    spreadsheets) are read alike.
+
+    Parameters
+    ----------
+    head: bytes
+        First bytes of the file (see `SNIFF_SIZE`).
+    sep: str
+        Default columns separator, kept whenever it is found in the first line.
+    encoding: str
+        Default encoding (of empty files).
+
+    Returns
+    -------
+    encoding: str
+        File encoding.
+    sep: str
+        Columns separator.
+    quotechar: str
+        Quote character.
+    """
+    encoding = sniff_encoding(head, encoding)
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(head)
+    lines = text.splitlines()[:-1] if len(head) >= SNIFF_SIZE else text.splitlines()  # The last one may be cut.
+    lines = [line for line in lines if line.strip()]
+    quotechar = '"'
+
+    if not lines or sep in lines[0]:
+        return encoding, sep, quotechar
+
+    try:
+        dialect = csv.Sniffer().sniff("\n".join(lines), delimiters=CSV_DELIMITERS)
+        sep, quotechar = dialect.delimiter, dialect.quotechar or quotechar
+    except csv.Error:
+        pass
+
+    return encoding, sep, quotechar
+
+
+def _read_csv_pyarrow(content: bytes, sep: str, encoding: str, quotechar: str) -> pd.DataFrame:
+    # 'pyarrow' parses UTF-8 only, so other encodings are decoded first (by Python's C codecs, faster than the
+    # 'pyarrow' transcoder):
+    if codecs.lookup(encoding).name != "utf-8":
+        content = content.decode(encoding).encode("utf-8")
+    elif content.startswith(codecs.BOM_UTF8):
+        content = content[len(codecs.BOM_UTF8):]
+
+    # Columns are read as text, just like the default engine reads Microsoft Teams reports (no numeric columns):
+    first_line = content[:content.find(b"\n") + 1 or len(content)].decode("utf-8")
+    columns = next(csv.reader([first_line.rstrip("\r\n")], delimiter=sep, quotechar=quotechar), [])
+
+    if not columns or len(set(columns)) < len(columns):
+        raise ValueError("missing or duplicated column names")
+
+    table = pyarrow.csv.read_csv(
+        io.BytesIO(content),
+        read_options=pyarrow.csv.ReadOptions(column_names=columns, skip_rows=1),
+        parse_options=pyarrow.csv.ParseOptions(delimiter=sep, quote_char=quotechar),
+        convert_options=pyarrow.csv.ConvertOptions(
+            column_types={column: pyarrow.string() for column in columns}, strings_can_be_null=True
+        )
+    )
+
+    # Blank rows are dropped and missing values set (as `NaN`, like the default engine) before converting the table,
+    # since it is much faster than over object columns:
+    nulls = [table.column(column).is_null().to_numpy(zero_copy_only=False) for column in columns]
+    blank_rows = np.logical_and.reduce(nulls)
+
+    if blank_rows.any():
+        table = table.filter(pyarrow.array(~blank_rows))
+        nulls = [is_null[~blank_rows] for is_null in nulls]
+
+    df = table.to_pandas()
+
+    for column, is_null in zip(columns, nulls):
+        if is_null.any():
+            df.loc[is_null, column] = np.nan
+
+    # Keeping the index of the remaining rows, just like `pd.DataFrame.dropna`:
+    if blank_rows.any():
+        df.index = pd.Index(np.flatnonzero(~blank_rows))
+
+    return df
+
+
+def read_csv(
+        source: Union[str, io.BytesIO],
+        sep: str,
+        encoding: str,
+        sniff: bool = None,
+        engine: str = None,
+        **kwargs
+) -> pd.DataFrame:
+    """
+    Read a single CSV file generated by Microsoft Teams meetings.
+
+    Parameters
+    ----------
+    source: Union[str, io.BytesIO]
+        CSV filepath or buffer.
+    sep: str
+        Columns separator (default one, if sniffed).
+    encoding: str
+        File encoding (default one, if sniffed).
+    sniff: bool
+        Sniff the encoding, columns separator and quote character of the file (see `sniff_csv`). If not defined, uses
+        the application settings.
+    engine: str
+        CSV parser: "pyarrow" (multithreaded, columnar) or "c" (`pd.read_csv` default). Files not supported by
+        'pyarrow' (or if it is not installed, or `kwargs` are given) are read by the "c" engine. If not defined, uses
+        the application settings.
+
+    Returns
+    -------
+    df: pd.DataFrame
+        File content, without blank rows.
+    """
+    csv_input_settings = get_settings()['system']['csv']['input']
+    sniff = csv_input_settings.get('sniff', False) if sniff is None else sniff
+    engine = engine or csv_input_settings.get('engine', "c")
+
+    assert engine in CSV_ENGINES, f"engine '{engine}' not supported ({', '.join(CSV_ENGINES)})."
+
+    quotechar = '"'
+
+    if sniff or engine == "pyarrow":
+        if isinstance(source, str):
+            with open(source, mode="rb") as file:
+                source = file.read()
+        else:
+            source = source.read()
+
+        if sniff:
+            encoding, sep, quotechar = sniff_csv(source[:SNIFF_SIZE], sep, encoding)
+
+        if engine == "pyarrow" and pyarrow is not None and not kwargs:
             try:
-                df = pd.read_csv(
-                    filepath_or_buffer=abs_path,
-                    sep=sep,
-                    encoding=encoding,
-                    skip_blank_lines=True,
-                    **kwargs
-                ).dropna(how="all")
+                return _read_csv_pyarrow(source, sep, encoding, quotechar)
+            except (pyarrow.ArrowException, ValueError) as e:
+                LOGGER.debug(f"Reading CSV file with the default engine ('pyarrow' failed: {e}).")
+
+        source = io.BytesIO(source)
+
+    df = pd.read_csv(
+        filepath_or_buffer=source,
+        sep=sep,
+        encoding=encoding,
+        quotechar=quotechar,
+        skip_blank_lines=True,
+        **kwargs
+    ).dropna(how="all")
+
+    return df
+
+
+def _read_csv_task(source: Union[str, bytes, UploadedFile], options: dict) -> (pd.DataFrame, str, dict):
+    # Errors are returned instead of raised, so they are reported by the caller for each file (even from other
+    # processes), along with the time spent reading, preprocessing and caching each file:
+    timings = {'read_seconds': 0.0, 'preprocess_seconds': 0.0, 'cached_files': 0}
+    start = time.perf_counter()
+
+    try:
+        sep, encoding, kwargs, preprocess = options['sep'], options['encoding'], options['kwargs'], options['preprocess']
+        sniff, engine = options['sniff'], options['engine']
+        cache_dir, cache_key = options['cache_dir'], None
+
+        # Uploaded files are read from their content, since they may have already been read:
+        if not isinstance(source, (str, bytes)):
+            source = source.getvalue()
+
+        if cache_dir:
+            if isinstance(source, str):
+                with open(source, mode="rb") as file:
+                    source = file.read()
+
+            cache_key = hash_content(
+                source, sep, encoding, sniff, engine, sorted(kwargs.items()), options['cache_keys']
+            )
+            df = read_cached_frame(cache_dir, cache_key)
+
+            if df is not None:
+                timings['read_seconds'] = time.perf_counter() - start
+                timings['cached_files'] = 1
+
+                return df, None, timings
+
+        df = read_csv(
+            io.BytesIO(source) if isinstance(source, bytes) else source, sep, encoding, sniff=sniff, engine=engine,
+            **kwargs
+        )
+        timings['read_seconds'] = time.perf_counter() - start
+
+        if preprocess is not None:
+            start = time.perf_counter()
+            df = preprocess(df)
+            timings['preprocess_seconds'] = time.perf_counter() - start
+
+        if cache_key is not None:
+            write_cached_frame(cache_dir, cache_key, df)
+
+        return df, None, timings
+    except Exception as e:
+        return None, str(e), timings
+
+
+def load_csv(
+        path: Union[str, UploadedFile, list],
+        parallel: bool = None,
+        max_workers: int = None,
+        executor: str = None,
+        preprocess: Callable[[pd.DataFrame], pd.DataFrame] = None,
+        cache: bool = None,
+        profiler: StageProfiler = None,
+        **kwargs
+) -> [pd.DataFrame]:
+    """
+    Load CSV files generated by Microsoft Teams meetings.
+
+    Parameters
+    ----------
+    path: Union[str, UploadedFile, list]
+        CSV filepath, directory path (files are read sorted by name) or list of files uploaded through 'streamlit' UI.
+    parallel: bool
+        Read multiple files concurrently. If not defined, uses the application settings.
+    max_workers: int
+        Maximum number of concurrent workers (default: number of CPUs). If not defined, uses the application settings.
+    executor: str
+        Concurrent workers type: "thread" or "process". If not defined, uses the application settings.
+    preprocess: Callable[[pd.DataFrame], pd.DataFrame]
+        Function applied to the content of each file (e.g. `operations.normalize_attendance_list`). It must be a
+        module-level function, so that it can be sent to other processes and identified in the cache.
+    cache: bool
+        Serve files from the on-disk cache (keyed by the file content, reading settings and `preprocess`), caching
+        missing ones. If not defined, uses the application settings.
+    profiler: StageProfiler
+        Stage-level profiler (optional): files read, rows loaded, files failed or served from the cache, and the time
+        spent reading and preprocessing files (summed over concurrent workers).
+
+    Returns
+    -------
+    df_list: [pd.DataFrame]
+        Files content, following the files order. Files that could not be read are logged and skipped.
+    """
+    settings = get_settings()
+    csv_input_settings = settings['system']['csv']['input']
+    cache_settings = settings['system'].get('cache') or {}
+    parallel = csv_input_settings.get('parallel', False) if parallel is None else parallel
+    max_workers = max_workers or csv_input_settings.get('max_workers') or os.cpu_count()
+    executor = executor or csv_input_settings.get('executor', "thread")
+    cache = cache_settings.get('enabled', False) if cache is None else cache
+
+    assert executor in EXECUTORS, f"executor '{executor}' not supported ({', '.join(EXECUTORS)})."
+
+    options = {
+        'sep': csv_input_settings['sep'],
+        'encoding': csv_input_settings['encoding'],
+        'sniff': csv_input_settings.get('sniff', False),
+        'engine': csv_input_settings.get('engine', "c"),
+        'kwargs': kwargs,
+        'preprocess': preprocess,
+        'cache_dir': cache_settings.get('dir', ".cache") if cache else None,
+        # Cached files are only valid for the same preprocessing (and the settings it depends on, such as timestamps):
+        'cache_keys': (
+            f"{preprocess.__module__}.{preprocess.__qualname__}" if preprocess else None,
+            freeze_to_builtins(settings['spreadsheets']['attendance_list']),
+            freeze_to_builtins(settings['system'].get('timestamps') or {})
+        )
+    }
+    sources = list_csv_sources(path)
+
+    # Uploaded files cannot be sent to other processes, only their content:
+    if executor == "process":
+        sources = [(name, source if isinstance(source, str) else source.getvalue()) for name, source in sources]
+
+    with profile_stage(profiler, "load_csv", files=len(sources)) as record:
+        if parallel and len(sources) > 1 and max_workers > 1:
+            pool_executor = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+
+            with pool_executor(max_workers=min(max_workers, len(sources))) as pool:
+                results = list(pool.map(_read_csv_task, [source for _, source in sources], repeat(options)))
+        else:
+            results = [_read_csv_task(source, options) for _, source in sources]
+
+        df_list = []
 
+        for (name, _), (df, error, timings) in zip(sources, results):
+            if error is None:
                 df_list.append(df)
-            except Exception as e:
-                logging.error(f"Failed to read CSV file '{abs_path}': {e}")
+            else:
+                logging.error(f"Failed to read CSV file '{name}': {error}")
+
+            for key, value in timings.items():
+                record[key] = record.get(key, 0) + value
+
+        record['rows'] = sum(len(df) for df in df_list)
+        record['files_failed'] = len(sources) - len(df_list)
 
     return df_list
 
 
+def _iter_chunks(name: str, chunks: Iterator[pd.DataFrame], first_chunk: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    try:
+        with chunks:
+            yield first_chunk.dropna(how="all")
+
+            for chunk in chunks:
+                yield chunk.dropna(how="all")
+    except Exception as e:
+        logging.error(f"Failed to read CSV file '{name}' (rows read so far are kept): {e}")
+
+
+def iter_csv(
+        path: Union[str, UploadedFile, list],
+        chunksize: int = 100000,
+        **kwargs
+) -> Iterator[tuple[str, Iterator[pd.DataFrame]]]:
+    """
+    Iterate over CSV files generated by Microsoft Teams meetings, reading each file in chunks, so that only one chunk
+    is loaded at a time.
+
+    Parameters
+    ----------
+    path: Union[str, UploadedFile, list]
+        CSV filepath, directory path (files are read sorted by name) or list of files uploaded through 'streamlit' UI.
+    chunksize: int
+        Number of rows per chunk.
+
+    Returns
+    -------
+    file_iterator: Iterator[tuple[str, Iterator[pd.DataFrame]]]
+        Name and chunks of each file, read as they are iterated (chunks must be consumed before the next file).
+        Files that could not be read are logged and skipped.
+    """
+    csv_input_settings = get_settings()['system']['csv']['input']
+
+    for name, source in list_csv_sources(path):
+        sep, encoding, quotechar = csv_input_settings['sep'], csv_input_settings['encoding'], '"'
+
+        try:
+            # Uploaded files may have already been read:
+            if not isinstance(source, str):
+                source.seek(0)
+
+            # Only the first bytes are sniffed, so that files are still read in chunks:
+            if csv_input_settings.get('sniff', False):
+                if isinstance(source, str):
+                    with open(source, mode="rb") as file:
+                        head = file.read(SNIFF_SIZE)
+                else:
+                    head = source.read(SNIFF_SIZE)
+                    source.seek(0)
+
+                encoding, sep, quotechar = sniff_csv(head, sep, encoding)
+
+            chunks = pd.read_csv(
+                filepath_or_buffer=source,
+                sep=sep,
+                encoding=encoding,
+                quotechar=quotechar,
+                skip_blank_lines=True,
+                chunksize=chunksize,
+                **kwargs
+            )
+
+            # Reading the first chunk, so that files that cannot be read at all are skipped:
+            first_chunk = next(chunks)
+        except Exception as e:
+            logging.error(f"Failed to read CSV file '{name}': {e}")
+            continue
+
+        yield name, _iter_chunks(name, chunks, first_chunk)
+
+
+def write_csv(df: pd.DataFrame, file: BinaryIO, sep: str, encoding: str, chunksize: int = 100000, **kwargs) -> None:
+    """
+    Write a dataframe as CSV to a binary file, chunk by chunk, so that the whole CSV content is never held in memory
+    (see `pd.DataFrame.to_csv`).
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Dataframe.
+    file: BinaryIO
+        Binary file (or buffer).
+    sep: str
+        Columns separator.
+    encoding: str
+        File encoding.
+    chunksize: int
+        Number of rows per chunk.
+    """
+    # An incremental encoder writes the byte order mark (if any) only once:
+    encoder = codecs.getincrementalencoder(encoding)()
+    header = kwargs.pop("header", True)
+
+    for start in range(0, max(len(df), 1), chunksize):
+        chunk = df.iloc[start:start + chunksize].to_csv(sep=sep, header=header if start == 0 else False, **kwargs)
+        file.write(encoder.encode(chunk))
+
+    file.write(encoder.encode("", final=True))
+
+
 def save_csv(df: pd.DataFrame, path: str, **kwargs) -> None:
     csv_output_settings = get_settings()['system']['csv']['output']
     sep, encoding = csv_output_settings['sep'], csv_output_settings['encoding']
@@ -124,18 +719,33 @@ def save_csv(df: pd.DataFrame, path: str, **kwargs) -> None:
     if os.path.isdir(abs_path):
         os.makedirs(abs_path, exist_ok=True)
         abs_filepath = os.path.join(abs_path, "output.csv")
-        df.to_csv(path_or_buf=abs_filepath, sep=sep, encoding=encoding, **kwargs)
     else:
         os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-        df.to_csv(path_or_buf=abs_path, sep=sep, encoding=encoding, **kwargs)
+        abs_filepath = abs_path
+
+    with open(abs_filepath, mode="wb") as file:
+        write_csv(df, file, sep=sep, encoding=encoding, **kwargs)
 
 
-@st.cache
 def df_to_bytes(df: pd.DataFrame, **kwargs) -> bytes:
     csv_output_settings = get_settings()['system']['csv']['output']
     sep, encoding = csv_output_settings['sep'], csv_output_settings['encoding']
 
-    return df.to_csv(sep=sep, encoding=encoding, index=False, **kwargs).encode(encoding)
+    # Dataframes (and settings) already converted are served from memory, since Streamlit reruns the whole script on
+    # every UI interaction:
+    df_hash = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    df_hash.update(repr((list(df.columns), sorted(kwargs.items()), get_settings_hash())).encode("utf-8"))
+    key = df_hash.hexdigest()
+    content = _BYTES_CACHE.get(key)
+
+    if content is None:
+        with io.BytesIO() as buffer:
+            write_csv(df, buffer, sep=sep, encoding=encoding, **{'index': False, **kwargs})
+            content = buffer.getvalue()
+
+        _BYTES_CACHE.set(key, content)
+
+    return content
 
 
 def setup_logger(
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+import logging
+import time
+import io
+import os
+
+from src.store import AttendanceStore, get_file_hash
+from src.utils import get_settings, list_csv_sources, save_csv
+
+
+class FolderWatcher:
+    """
+    Watch a folder of meeting files (see `utils.load_csv` directory mode), keeping an attendance store (see
+    `store.AttendanceStore`) and the attendance list reports in sync with it.
+
+    Files are polled by their modification time and size, so unchanged files are never read again. Files whose
+    modification time or size changed are hashed, and only files whose content changed are parsed: new files are
+    added to the store, changed files are replaced and deleted files are removed, recalculating only their event
+    dates. Files are processed once they are stable (same modification time and size in two polls), so files still
+    being copied are not read.
+
+    Parameters
+    ----------
+    dirpath: str
+        Watched folder path.
+    output_dir: str
+        Reports directory path.
+    store_filepath: str
+        Attendance store filepath (default: `attendance.db`, in the reports directory).
+    event_start_time: str
+        Event start time (`HH:mm`).
+    event_end_time: str
+        Event end time (`HH:mm`).
+    ignore_inactive_users: bool
+        Ignore users not present at the time the attendance list was generated.
+    """
+    def __init__(
+            self,
+            dirpath: str,
+            output_dir: str,
+            store_filepath: str = None,
+            event_start_time: str = None,
+            event_end_time: str = None,
+            ignore_inactive_users: bool = True
+    ):
+        self.dirpath = os.path.abspath(dirpath)
+        self.output_dir = os.path.abspath(output_dir)
+        self.store = AttendanceStore(
+            store_filepath or os.path.join(self.output_dir, "attendance.db"),
+            event_start_time=event_start_time,
+            event_end_time=event_end_time,
+            ignore_inactive_users=ignore_inactive_users
+        )
+        self._stats = {}  # Modification time and size of each file processed.
+        self._pending = {}  # Modification time and size of each file changed, until it is stable.
+        self._hashes = {}  # Content hash of each file processed.
+        self._synced = False
+
+    def close(self) -> None:
+        self.store.close()
+
+    def __enter__(self) -> "FolderWatcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def scan(self) -> dict:
+        """
+        List the CSV files of the watched folder.
+
+        Returns
+        -------
+        stats: dict
+            Modification time (in nanoseconds) and size of each CSV filepath.
+        """
+        stats = {}
+
+        for _, filepath in list_csv_sources(self.dirpath):
+            if not filepath.lower().endswith(".csv") or os.path.basename(filepath).startswith((".", "~$")):
+                continue
+
+            try:
+                stat = os.stat(filepath)
+            except FileNotFoundError:  # Deleted while listing.
+                continue
+
+            stats[filepath] = (stat.st_mtime_ns, stat.st_size)
+
+        return stats
+
+    def poll(self) -> bool:
+        """
+        Process the files added, changed or deleted since the last poll, saving the reports if the store changed.
+
+        Returns
+        -------
+        changed: bool
+            Whether the store changed.
+        """
+        stats = self.scan()
+        changed_files = {}
+
+        # Files are processed only when they did not change since the previous poll (or on the first poll):
+        for filepath, stat in stats.items():
+            if self._stats.get(filepath) == stat:
+                self._pending.pop(filepath, None)
+            elif self._pending.get(filepath) == stat or not self._synced:
+                changed_files[filepath] = stat
+            else:
+                self._pending[filepath] = stat
+
+        deleted_files = [filepath for filepath in self._stats if filepath not in stats]
+        self._pending = {filepath: stat for filepath, stat in self._pending.items() if filepath in stats}
+
+        if not changed_files and not deleted_files and self._synced:
+            return False
+
+        first_poll = not self._synced
+        previous_hashes = set(self._hashes.values())
+        contents = {}
+
+        for filepath in deleted_files:
+            del self._stats[filepath]
+            del self._hashes[filepath]
+
+        for filepath, stat in changed_files.items():
+            try:
+                with open(filepath, mode="rb") as file:
+                    content = file.read()
+            except OSError as e:
+                logging.error(f"Failed to read CSV file '{filepath}': {e}")
+                continue
+
+            file_hash = get_file_hash(content)
+            self._pending.pop(filepath, None)
+            self._stats[filepath] = stat
+
+            # Touched files whose content did not change are not parsed again:
+            if self._hashes.get(filepath) != file_hash:
+                self._hashes[filepath] = file_hash
+                contents[file_hash] = (filepath, content)
+
+        hashes = set(self._hashes.values())
+
+        # The store follows the folder: on the first poll, files removed while not watching are removed as well:
+        stored_hashes = set(self.store.get_files()) if first_poll else previous_hashes
+        removed_hashes = sorted(stored_hashes - hashes)
+        new_files = []
+
+        # Files are added from the content already read (just like files uploaded through 'streamlit' UI):
+        for file_hash, (filepath, content) in contents.items():
+            if file_hash not in stored_hashes:
+                file = io.BytesIO(content)
+                file.name = filepath
+                new_files.append(file)
+
+        self._synced = True
+
+        if not removed_hashes and not new_files:
+            # Reports are saved at least once, even if the store was already in sync with the folder:
+            if first_poll:
+                self.save_reports()
+
+            return False
+
+        logging.info(f"Updating the attendance store ({len(new_files)} files added, {len(removed_hashes)} removed)...")
+
+        if removed_hashes:
+            self.store.remove(removed_hashes)
+
+        if new_files:
+            self.store.add(new_files)
+
+        self.save_reports()
+
+        return True
+
+    def save_reports(self) -> None:
+        """
+        Save the attendance list, the overall attendance list and the attendance list count (users per event date)
+        from the store, replacing each report only once it is completely written.
+        """
+        attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+        col_name = attendance_list_settings['user_name']
+        col_date = attendance_list_settings['date']
+        col_attendees = attendance_list_settings['attendees']
+
+        df = self.store.get_attendance_list()
+        df_count = df.groupby(col_date, sort=False)[col_name].nunique().rename(col_attendees).reset_index()
+        reports = {
+            "attendance_list": df,
+            "attendance_list_overall": self.store.get_attendance_list(calculate_overall_uptime=True),
+            "attendance_list_count": df_count
+        }
+
+        for name, df_report in reports.items():
+            filepath = os.path.join(self.output_dir, f"{name}.csv")
+            save_csv(df_report, f"{filepath}.tmp", index=False)
+            os.replace(f"{filepath}.tmp", filepath)
+
+        logging.info(
+            f"Reports saved at '{self.output_dir}' ({len(df_count)} dates, {len(reports['attendance_list_overall'])} "
+            f"users)."
+        )
+
+    def run(self, interval: float = 5.0) -> None:
+        """
+        Poll the watched folder until interrupted.
+
+        Parameters
+        ----------
+        interval: float
+            Time between polls (in seconds).
+        """
+        logging.info(f"Watching '{self.dirpath}' (every {interval}s)...")
+
+        while True:
+            start = time.perf_counter()
+
+            try:
+                self.poll()
+            except Exception as e:
+                logging.exception(f"Failed to update the reports: {e}")
+
+            time.sleep(max(interval - (time.perf_counter() - start), 0))
@@ -5,11 +5,16 @@
 # "People matter, results count"
 
 from datetime import datetime
+from typing import Union
 import streamlit as st
+import pandas as pd
 import logging
 import time
 
-from src.utils import setup_logger, load_csv, df_to_bytes, get_settings, sting_to_time, time_to_string
+from src.utils import setup_logger, get_settings, sting_to_time, time_to_string
+from src.export import EXPORT_FORMATS, MIME_TYPES, get_report_sheets
+from src.memo import get_files_keys, get_attendance_list_memoized, get_attendance_timeline_memoized, export_memoized
+from src.profiling import StageProfiler
 from src import operations
 
 
@@ -44,8 +49,11 @@ def main() -> None:
     ignore_users = []
     block_duplicates = True
     block_lucky = False
+    weight_by = operations.VOUCHER_WEIGHTS[0]
+    seed = None
     calculate_overall_uptime = False
-    df_list = None
+    min_presence = None
+    export_format = EXPORT_FORMATS[0]
     df = None
 
     st.sidebar.markdown("""---""")
@@ -59,25 +67,65 @@ def main() -> None:
             help="Calculates overall uptime per user (useful for multiple events)"
         )
 
+    if operation_type == operations.ATTENDANCE_TIMELINE:
+        timeline_settings = get_settings()['spreadsheets']['operations'].get('attendance_timeline') or {}
+        min_presence = st.sidebar.slider(
+            "Minimum presence (%)",
+            min_value=0,
+            max_value=100,
+            value=int(round(timeline_settings.get('min_presence', 0.75) * 100)),
+            help="Minimum percentage of the event time slot attended to consider that a user was present"
+        ) / 100
+
+    if operation_type != operations.ATTENDANCE_LIST_COUNT:
+        export_format = st.sidebar.selectbox(
+            "Export format",
+            EXPORT_FORMATS,
+            help="XLSX attendance lists have one sheet per event date, plus an overall sheet (timelines have a "
+                 "timeline and a presence sheet)"
+        )
+
+    st.sidebar.markdown("""---""")
+    st.sidebar.write('**DEBUG**')
+    show_stages = st.sidebar.checkbox(
+        "Show pipeline stages",
+        value=False,
+        help="Shows the time spent (and rows/users processed) by each stage of the attendance list calculation"
+    )
+    profile_memory = st.sidebar.checkbox(
+        "Profile memory",
+        value=False,
+        disabled=not show_stages,
+        help="Also shows the peak memory allocated by each stage (slower)"
+    )
+    profiler = StageProfiler(memory=profile_memory) if show_stages else None
+
     if input_files:
-        df_list = load_csv(input_files)
-        df = operations.get_attendance_list(
-            df_list=df_list,
+        # Memoized, so that UI interactions that do not change the attendance list are answered immediately:
+        df = get_attendance_list_memoized(
+            files=input_files,
             event_start_time=time_to_string(event_start_time),
             event_end_time=time_to_string(event_end_time),
             ignore_inactive_users=ignore_inactive_users,
-            calculate_overall_uptime=calculate_overall_uptime
+            calculate_overall_uptime=calculate_overall_uptime,
+            profiler=profiler
         )
 
         users_list = operations.extract_users_list(df=df)
 
+    if profiler is not None and profiler.records:
+        with st.expander("Pipeline stages", expanded=True):
+            df_stages = profiler.to_frame()
+            st.dataframe(df_stages, use_container_width=True)
+            st.caption(f"Total: {df_stages['seconds'].sum():.3f}s")
+
     if operation_type == operations.ATTENDANCE_LIST_DRAW_VOUCHER:
         num_vouchers = st.sidebar.slider("Number of vouchers", min_value=1, max_value=10, value=3)
         settings = operations.get_settings()
 
         drop_users = settings['spreadsheets']['operations']['giveaway_voucher']['drop_users']
-        drop_users = [operations.format_user_name(n) for n in drop_users] if drop_users else []
-        drop_users = sorted(set([n for n in drop_users if n in users_list]))
+        drop_users = operations.format_user_names(pd.Series(drop_users, dtype=object)) if drop_users else []
+        drop_users = sorted(set(drop_users).intersection(users_list))
 
         ignore_users = st.sidebar.multiselect("Ignore users", users_list, drop_users)
         block_duplicates = st.sidebar.checkbox(
@@ -90,6 +138,17 @@ def main() -> None:
             value=False,
             help="Ignore users who have already been drawn"
         )
+        weight_by = st.sidebar.selectbox(
+            "Draw weights",
+            operations.VOUCHER_WEIGHTS,
+            help="Chance of each user: the same for all users, or proportional to their overall attendance or uptime"
+        )
+        seed = st.sidebar.text_input(
+            "Seed",
+            value="",
+            help="Random seed, to reproduce a previous draw (leave it blank for a new draw)"
+        )
+        seed = int(seed) if seed.strip().isdigit() else None
 
     if st.sidebar.button("Run") and input_files:
         logging.debug(f"Executing operation '{operation_type}'...")
@@ -103,13 +162,84 @@ def main() -> None:
         elif operation_type == operations.ATTENDANCE_LIST:
             st.write("Attendance list:")
             st.dataframe(df, use_container_width=True)
-            csv = df_to_bytes(df)
 
+            def get_frames() -> Union[pd.DataFrame, dict]:
+                if export_format != "xlsx":
+                    return df
+
+                return get_report_sheets(
+                    df=get_attendance_list_memoized(
+                        files=input_files,
+                        event_start_time=time_to_string(event_start_time),
+                        event_end_time=time_to_string(event_end_time),
+                        ignore_inactive_users=ignore_inactive_users
+                    ),
+                    df_overall=get_attendance_list_memoized(
+                        files=input_files,
+                        event_start_time=time_to_string(event_start_time),
+                        event_end_time=time_to_string(event_end_time),
+                        ignore_inactive_users=ignore_inactive_users,
+                        calculate_overall_uptime=True
+                    )
+                )
+
+            # Exported once per attendance list and format (the XLSX format includes both attendance lists):
+            export_key = (
+                operations.ATTENDANCE_LIST,
+                tuple(get_files_keys(input_files)),
+                time_to_string(event_start_time),
+                time_to_string(event_end_time),
+                ignore_inactive_users,
+                calculate_overall_uptime or export_format == "xlsx"
+            )
+            st.download_button(
+                label="Download",
+                data=export_memoized(export_key, get_frames, export_format=export_format),
+                file_name=f"attendance_list.{export_format}",
+                mime=MIME_TYPES[export_format],
+            )
+        elif operation_type == operations.ATTENDANCE_TIMELINE:
+            attendance_list_settings = get_settings()['spreadsheets']['attendance_list']
+            col_date = attendance_list_settings['date']
+            col_timestamp = attendance_list_settings['timestamp']
+            col_attendees = attendance_list_settings['attendees']
+            col_peak_attendees = attendance_list_settings['peak_attendees']
+            col_present = attendance_list_settings['present']
+
+            df_timeline, df_presence = get_attendance_timeline_memoized(
+                files=input_files,
+                event_start_time=time_to_string(event_start_time),
+                event_end_time=time_to_string(event_end_time),
+                ignore_inactive_users=ignore_inactive_users,
+                min_presence=min_presence,
+                profiler=profiler
+            )
+
+            # Attendees per minute of each event date, on the same time axis:
+            df_chart = df_timeline.assign(**{col_timestamp: df_timeline[col_timestamp].dt.strftime("%H:%M")})
+            st.write("Attendees per minute:")
+            st.line_chart(df_chart.pivot(index=col_timestamp, columns=col_date, values=col_attendees))
+
+            df_peaks = df_timeline.groupby(col_date)[col_peak_attendees].max()
+            df_present = df_presence.groupby(col_date)[col_present].sum()
+            st.dataframe(pd.concat([df_peaks, df_present], axis=1), use_container_width=True)
+
+            st.write("Presence:")
+            st.dataframe(df_presence, use_container_width=True)
+            frames = {"Timeline": df_timeline, "Presence": df_presence} if export_format == "xlsx" else df_presence
+            export_key = (
+                operations.ATTENDANCE_TIMELINE,
+                tuple(get_files_keys(input_files)),
+                time_to_string(event_start_time),
+                time_to_string(event_end_time),
+                ignore_inactive_users,
+                min_presence
+            )
             st.download_button(
                 label="Download",
-                data=csv,
-                file_name="attendance_list.csv",
-                mime="text/csv",
+                data=export_memoized(export_key, lambda: frames, export_format=export_format),
+                file_name=f"attendance_timeline.{export_format}",
+                mime=MIME_TYPES[export_format],
             )
         elif operation_type == operations.ATTENDANCE_LIST_DRAW_VOUCHER:
             # Displaying progress bar on screen:
@@ -121,23 +251,39 @@ def main() -> None:
 
             pbar.empty()
 
+            weights = None
+
+            if weight_by != operations.VOUCHER_WEIGHTS[0]:
+                df_overall = get_attendance_list_memoized(
+                    files=input_files,
+                    event_start_time=time_to_string(event_start_time),
+                    event_end_time=time_to_string(event_end_time),
+                    ignore_inactive_users=ignore_inactive_users,
+                    calculate_overall_uptime=True
+                )
+                weights = operations.get_voucher_weights(df_overall, weight_by=weight_by)
+
             # Fetching and displaying the list of winners on the screen:
             df = operations.giveaway_vouchers(
                 users_list=users_list,
                 number=num_vouchers,
                 block_duplicates=block_duplicates,
                 ignore_users=ignore_users,
-                block_lucky=block_lucky
+                block_lucky=block_lucky,
+                weights=weights,
+                seed=seed
             )
             st.write("List of winners:")
             st.dataframe(df, use_container_width=True)
-            csv = df_to_bytes(df)
+            st.caption(f"Seed: {df.attrs['seed']}")
 
+            # Winners are few, so they are their own key:
+            export_key = (operations.ATTENDANCE_LIST_DRAW_VOUCHER, tuple(df.itertuples(index=False)))
             st.download_button(
                 label="Download",
-                data=csv,
-                file_name="vouchers_winners.csv",
-                mime="text/csv",
+                data=export_memoized(export_key, lambda: df, export_format=export_format),
+                file_name=f"vouchers_winners.{export_format}",
+                mime=MIME_TYPES[export_format],
             )
 
 
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Capgemini (Brazil) - www.capgemini.com/br-pt
+# "People matter, results count"
+
+import argparse
+import logging
+import sys
+
+from src.utils import setup_logger, get_settings, set_settings_filepath
+from src.watcher import FolderWatcher
+
+
+setup_logger(__name__)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Keep attendance list reports in sync with a folder of CSV files.")
+    parser.add_argument("dirpath", help="watched folder path (CSV files generated by Microsoft Teams meetings)")
+    parser.add_argument("-o", "--output-dir", default="output", help="reports directory path")
+    parser.add_argument("--store", default=None, help="attendance store filepath (default: 'attendance.db' in reports)")
+    parser.add_argument("--interval", type=float, default=5.0, help="time between polls (in seconds)")
+    parser.add_argument("--once", action="store_true", help="update the reports once and exit (e.g. from cron)")
+    parser.add_argument("--start-time", default=None, help="event start time (`HH:mm`)")
+    parser.add_argument("--end-time", default=None, help="event end time (`HH:mm`)")
+    parser.add_argument("--keep-inactive-users", action="store_true", help="do not ignore inactive users")
+    parser.add_argument("--settings", default=None, help="settings filepath (default: 'src/assets/settings.yml')")
+    args = parser.parse_args()
+
+    set_settings_filepath(args.settings)
+    event_settings = get_settings()['spreadsheets']['event']
+
+    with FolderWatcher(
+        args.dirpath,
+        args.output_dir,
+        store_filepath=args.store,
+        event_start_time=args.start_time or event_settings['start_time'],
+        event_end_time=args.end_time or event_settings['end_time'],
+        ignore_inactive_users=not args.keep_inactive_users
+    ) as watcher:
+        if args.once:
+            watcher.poll()
+            return 0
+
+        try:
+            watcher.run(interval=args.interval)
+        except KeyboardInterrupt:
+            logging.info("Watcher stopped.")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())